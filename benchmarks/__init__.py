@@ -0,0 +1,6 @@
+"""
+基准测试
+========
+
+引擎与后处理步骤的性能基准。用法见 run_benchmarks.py。
+"""
@@ -0,0 +1,139 @@
+"""
+基准测试语料
+============
+
+生成确定性的合成测试图像：线稿、文字、渐变、照片风格，
+每类按多个分辨率生成。相同的种子和尺寸总是得到逐字节相同的 PNG，
+因此不同机器、不同时间的基准结果可以直接比较。
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+
+CORPUS_DIR = Path(__file__).parent / ".corpus"
+
+DEFAULT_SIZES = (256, 1024, 2048)
+KINDS = ("line_art", "text", "gradient", "photo")
+
+
+@dataclass(frozen=True)
+class CorpusImage:
+    kind: str
+    size: int
+    path: Path
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}@{self.size}"
+
+    @property
+    def pixels(self) -> int:
+        return self.size * self.size
+
+
+def _line_art(size: int, rng: np.random.Generator) -> Image.Image:
+    img = Image.new("L", (size, size), 255)
+    draw = ImageDraw.Draw(img)
+    width = max(1, size // 128)
+    for _ in range(24):
+        x0, y0, x1, y1 = (rng.random(4) * size).tolist()
+        draw.line([(x0, y0), (x1, y1)], fill=0, width=width)
+    for _ in range(12):
+        cx, cy = (rng.random(2) * size).tolist()
+        r = float(rng.uniform(0.03, 0.15) * size)
+        draw.ellipse([cx - r, cy - r, cx + r, cy + r], outline=0, width=width)
+    for _ in range(6):
+        x0, y0 = (rng.random(2) * size * 0.8).tolist()
+        w, h = (rng.uniform(0.05, 0.2, 2) * size).tolist()
+        draw.rectangle([x0, y0, x0 + w, y0 + h], fill=0)
+    return img.convert("RGB")
+
+
+def _text(size: int, rng: np.random.Generator) -> Image.Image:
+    # 不依赖系统字体：用笔画块拼出类似字形的图案，保证跨平台确定性
+    img = Image.new("L", (size, size), 255)
+    draw = ImageDraw.Draw(img)
+    cell = max(8, size // 24)
+    stroke = max(1, cell // 6)
+    for row in range(1, size // cell - 1, 2):
+        for col in range(1, size // cell - 1):
+            if rng.random() < 0.15:
+                continue
+            x, y = col * cell, row * cell
+            for _ in range(3):
+                sx, sy, ex, ey = (rng.integers(0, 4, 4) * (cell - stroke) / 3).tolist()
+                draw.line([(x + sx, y + sy), (x + ex, y + ey)], fill=0, width=stroke)
+    return img.convert("RGB")
+
+
+def _gradient(size: int, rng: np.random.Generator) -> Image.Image:
+    y, x = np.mgrid[0:size, 0:size].astype(np.float32) / size
+    angle = float(rng.uniform(0, np.pi))
+    t = np.cos(angle) * x + np.sin(angle) * y
+    t = (t - t.min()) / max(float(t.max() - t.min()), 1e-6)
+    c0, c1 = rng.integers(0, 256, (2, 3)).astype(np.float32)
+    arr = c0 + (c1 - c0) * t[..., None]
+    # 叠加几块不同颜色的圆，让渐变图也有明确的边界
+    img = Image.fromarray(arr.astype(np.uint8), "RGB")
+    draw = ImageDraw.Draw(img)
+    for _ in range(5):
+        cx, cy = (rng.random(2) * size).tolist()
+        r = float(rng.uniform(0.05, 0.2) * size)
+        draw.ellipse([cx - r, cy - r, cx + r, cy + r], fill=tuple(rng.integers(0, 256, 3).tolist()))
+    return img
+
+
+def _photo(size: int, rng: np.random.Generator) -> Image.Image:
+    # 低频色块 + 中频纹理 + 噪声，近似自然照片的统计特性
+    low = rng.integers(0, 256, (8, 8, 3)).astype(np.uint8)
+    base = Image.fromarray(low, "RGB").resize((size, size), Image.BICUBIC)
+    img = base.copy()
+    draw = ImageDraw.Draw(img)
+    for _ in range(40):
+        cx, cy = (rng.random(2) * size).tolist()
+        r = float(rng.uniform(0.01, 0.08) * size)
+        draw.ellipse([cx - r, cy - r, cx + r, cy + r], fill=tuple(rng.integers(0, 256, 3).tolist()))
+    img = img.filter(ImageFilter.GaussianBlur(radius=max(1, size // 256)))
+    arr = np.asarray(img).astype(np.int16) + rng.normal(0, 8, (size, size, 3)).astype(np.int16)
+    return Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8), "RGB")
+
+
+_GENERATORS = {
+    "line_art": _line_art,
+    "text": _text,
+    "gradient": _gradient,
+    "photo": _photo,
+}
+
+
+def generate_image(kind: str, size: int, seed: int = 0) -> Image.Image:
+    """生成一张合成图像；种子由 kind/size/seed 共同决定"""
+    if kind not in _GENERATORS:
+        raise ValueError(f"未知的语料类型: {kind}")
+    kind_id = KINDS.index(kind)
+    rng = np.random.default_rng([seed, kind_id, size])
+    return _GENERATORS[kind](size, rng)
+
+
+def build_corpus(kinds: Iterable[str] = KINDS, sizes: Iterable[int] = DEFAULT_SIZES,
+                 out_dir: Optional[Path] = None, seed: int = 0) -> List[CorpusImage]:
+    """生成（或复用已缓存的）语料图像，返回描述列表"""
+    out_dir = Path(out_dir) if out_dir else CORPUS_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+    items = []
+    for kind in kinds:
+        for size in sizes:
+            path = out_dir / f"{kind}_{size}_s{seed}.png"
+            if not path.exists():
+                generate_image(kind, size, seed).save(path, format="PNG")
+            items.append(CorpusImage(kind, size, path))
+    return items
+
+
+def corpus_index(items: Iterable[CorpusImage]) -> Dict[str, CorpusImage]:
+    return {item.key: item for item in items}
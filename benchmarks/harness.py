@@ -0,0 +1,314 @@
+"""
+基准测试框架
+============
+
+对每个矢量化引擎和后处理步骤在合成语料上计时，结果以 JSON 基线保存，
+并可与已保存的基线比较、标记性能回退。
+
+用例分两组：
+- engine:*  各引擎适配器（PotracePipeline / VTracerAdapter / TraceAdapter / DiffVG）
+- post:*    后处理步骤（边缘模式改写、SVG 栅格化、质量评分、SLIC 分割）
+
+不可用的引擎（缺少可执行文件或依赖）会被记录为 skipped，而不是失败。
+"""
+
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.corpus import CorpusImage, KINDS
+
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+
+@dataclass
+class BenchCase:
+    """一个基准用例：对一张语料图像执行一次被测操作"""
+    name: str
+    run: Callable[[CorpusImage], Any]
+    kinds: Tuple[str, ...] = KINDS
+    needs_svg: bool = False  # 后处理用例需要先有一份引擎输出，此时以 run(svg, image) 调用
+
+
+@dataclass
+class CaseResult:
+    case: str
+    image: str
+    status: str = "ok"
+    runs: List[float] = field(default_factory=list)
+    output_bytes: int = 0
+    error: str = ""
+    quality: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        return f"{self.case}|{self.image}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"status": self.status}
+        if self.runs:
+            data.update({
+                "median_s": statistics.median(self.runs),
+                "min_s": min(self.runs),
+                "mean_s": statistics.fmean(self.runs),
+                "repeat": len(self.runs),
+                "output_bytes": self.output_bytes,
+            })
+        if self.error:
+            data["error"] = self.error
+        if self.quality:
+            data["quality"] = self.quality
+        return data
+
+
+# ----------------------------------------------------------------------
+# 用例定义
+# ----------------------------------------------------------------------
+
+# 引擎用例：(用例名, 注册表中的引擎名, 参数, 适用的语料类型)
+ENGINE_CASES: Tuple[Tuple[str, str, Dict[str, Any], Tuple[str, ...]], ...] = (
+    ("engine:mkbitmap+potrace", "mkbitmap+potrace", {}, KINDS),
+    ("engine:potrace", "potrace", {}, KINDS),
+    ("engine:color-potrace", "彩色potrace", {}, KINDS),
+    ("engine:contour", "内置追踪", {}, KINDS),
+    ("engine:superpixel", "超像素", {}, ("gradient", "photo")),
+    ("engine:vtracer", "vtracer", {}, KINDS),
+    ("engine:Trace(.NET)", "Trace(.NET)", {}, KINDS),
+    ("engine:DiffVG", "DiffVG", {"num_paths": 16, "iterations": 50}, ("photo", "gradient")),
+)
+
+
+def _engine_case(name: str, engine: str, params: Dict[str, Any],
+                 kinds: Tuple[str, ...]) -> BenchCase:
+    from src.tools.registry import registry
+    return BenchCase(name, lambda img: registry.run(engine, img.path, params), kinds=kinds)
+
+
+def build_cases() -> Tuple[List[BenchCase], Dict[str, str]]:
+    """构造所有可运行的用例，返回 (用例列表, {不可用用例: 原因})
+
+    引擎通过注册表运行，与界面使用同一套长期存活的适配器实例。
+    """
+    from src.tools.registry import registry
+
+    cases: List[BenchCase] = []
+    skipped: Dict[str, str] = {}
+
+    for name, engine, params, kinds in ENGINE_CASES:
+        # 不可用时跳过，而不是让注册表回退到其他引擎
+        if not registry.available(engine):
+            skipped[name] = registry.error(engine)
+            continue
+        adapter = registry.adapter(engine)
+        if hasattr(adapter, "trace_exe") and not Path(str(adapter.trace_exe)).exists():
+            skipped[name] = f"未找到 {adapter.trace_exe}"
+            continue
+        cases.append(_engine_case(name, engine, params, kinds))
+
+    if registry.available("potrace"):
+        potrace = registry.adapter("potrace")
+        cases.append(BenchCase("post:edge_mode", lambda svg, img: potrace._apply_edge_mode(svg, False),
+                               needs_svg=True))
+    else:
+        skipped["post:edge_mode"] = registry.error("potrace")
+
+    from src.processing.svg_raster import rasterize_svg
+    from src.processing.metrics import score_svg
+    from src.processing.color_segment import SegmentParams, segment_and_sample_colors
+    from src.processing.quantize import quantize
+    from src.processing.bitmap import PackedBitmap
+    from src.tools.potrace_adapter import load_gray
+
+    cases.append(BenchCase("post:rasterize", lambda svg, img: rasterize_svg(svg, img.size, img.size),
+                           needs_svg=True))
+    cases.append(BenchCase("post:score", lambda svg, img: score_svg(svg, img.path), needs_svg=True))
+    cases.append(BenchCase("post:color_segment",
+                           lambda img: segment_and_sample_colors(img.path, SegmentParams()),
+                           kinds=("gradient", "photo")))
+    cases.append(BenchCase("post:color_segment_fast",
+                           lambda img: segment_and_sample_colors(img.path, SegmentParams(fast=True)),
+                           kinds=("gradient", "photo")))
+    cases.append(BenchCase("post:quantize", lambda img: quantize(img.path, 16),
+                           kinds=("gradient", "photo")))
+    cases.append(BenchCase("post:pack_bitmap",
+                           lambda img: PackedBitmap.from_threshold(load_gray(img.path)).despeckle(2).to_pbm(),
+                           kinds=("line_art", "text")))
+    return cases, skipped
+
+
+# ----------------------------------------------------------------------
+# 执行
+# ----------------------------------------------------------------------
+
+def _output_size(result: Any) -> int:
+    if isinstance(result, str):
+        return len(result.encode("utf-8"))
+    if hasattr(result, "nbytes"):
+        return int(result.nbytes)
+    return 0
+
+
+def _time(fn: Callable[[], Any], repeat: int, warmup: int) -> Tuple[List[float], Any]:
+    result = None
+    for _ in range(warmup):
+        result = fn()
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - t0)
+    return runs, result
+
+
+def run_benchmarks(images: List[CorpusImage], cases: List[BenchCase], repeat: int = 3,
+                   warmup: int = 1, score: bool = False,
+                   log: Callable[[str], None] = print) -> List[CaseResult]:
+    """在所有语料上执行所有用例
+
+    Args:
+        images: 语料图像
+        cases: 用例列表（来自 build_cases）
+        repeat: 每个用例计时次数，取中位数
+        warmup: 计时前的预热次数（首次调用包含进程启动/缓存冷启动）
+        score: 是否对引擎输出计算保真度指标
+    """
+    from src.processing.metrics import score_svg
+
+    results: List[CaseResult] = []
+    engine_cases = [c for c in cases if c.name.startswith("engine:")]
+    post_cases = [c for c in cases if not c.name.startswith("engine:")]
+
+    for img in images:
+        reference_svg: Optional[str] = None
+        for case in engine_cases:
+            if img.kind not in case.kinds:
+                continue
+            res = CaseResult(case.name, img.key)
+            try:
+                res.runs, svg = _time(lambda: case.run(img), repeat, warmup)
+                res.output_bytes = _output_size(svg)
+                if reference_svg is None and isinstance(svg, str):
+                    reference_svg = svg
+                if score and isinstance(svg, str):
+                    res.quality = {k: v for k, v in score_svg(svg, img.path).to_dict().items()
+                                   if k in ("psnr", "ssim", "edge_f1", "node_count")}
+            except Exception as e:
+                res.status, res.error = "error", str(e)
+            log(_format_line(res))
+            results.append(res)
+
+        for case in post_cases:
+            if img.kind not in case.kinds:
+                continue
+            res = CaseResult(case.name, img.key)
+            if case.needs_svg and reference_svg is None:
+                res.status, res.error = "skipped", "没有可用的引擎输出"
+                results.append(res)
+                continue
+            if case.needs_svg:
+                fn = lambda: case.run(reference_svg, img)
+            else:
+                fn = lambda: case.run(img)
+            try:
+                res.runs, out = _time(fn, repeat, warmup)
+                res.output_bytes = _output_size(out)
+            except Exception as e:
+                res.status, res.error = "error", str(e)
+            log(_format_line(res))
+            results.append(res)
+    return results
+
+
+def _format_line(res: CaseResult) -> str:
+    if res.status != "ok":
+        return f"  {res.key:<48} {res.status}: {res.error[:60]}"
+    return f"  {res.key:<48} {statistics.median(res.runs) * 1000:10.1f} ms"
+
+
+# ----------------------------------------------------------------------
+# 基线保存与比较
+# ----------------------------------------------------------------------
+
+def machine_info() -> Dict[str, Any]:
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def results_document(results: List[CaseResult], skipped: Dict[str, str],
+                     repeat: int) -> Dict[str, Any]:
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "repeat": repeat,
+            **machine_info(),
+        },
+        "skipped": skipped,
+        "results": {r.key: r.to_dict() for r in results},
+    }
+
+
+def baseline_path(name: str) -> Path:
+    path = Path(name)
+    if path.suffix == ".json" or path.parent != Path("."):
+        return path
+    return BASELINE_DIR / f"{name}.json"
+
+
+def save_baseline(doc: Dict[str, Any], name: str) -> Path:
+    path = baseline_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def load_baseline(name: str) -> Dict[str, Any]:
+    return json.loads(baseline_path(name).read_text(encoding="utf-8"))
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.2,
+            min_delta_s: float = 0.005) -> Tuple[List[str], int]:
+    """比较两份结果，返回 (报告行, 回退数量)
+
+    中位耗时比基线慢超过 threshold（相对）且超过 min_delta_s（绝对）即判为回退，
+    绝对阈值用于忽略毫秒级用例的计时抖动。
+    """
+    lines = []
+    regressions = 0
+    cur, base = current["results"], baseline["results"]
+    for key in sorted(set(cur) | set(base)):
+        c, b = cur.get(key), base.get(key)
+        if c is None:
+            lines.append(f"  MISSING    {key}")
+            continue
+        if b is None:
+            lines.append(f"  NEW        {key}")
+            continue
+        if c.get("status") != "ok" or b.get("status") != "ok":
+            if b.get("status") == "ok" and c.get("status") == "error":
+                regressions += 1
+                lines.append(f"  BROKEN     {key}: {c.get('error', '')[:60]}")
+            continue
+        t_cur, t_base = c["median_s"], b["median_s"]
+        ratio = t_cur / t_base if t_base > 0 else float("inf")
+        delta = t_cur - t_base
+        if ratio > 1 + threshold and delta > min_delta_s:
+            tag = "REGRESSION"
+            regressions += 1
+        elif ratio < 1 - threshold and -delta > min_delta_s:
+            tag = "FASTER"
+        else:
+            tag = "ok"
+        lines.append(f"  {tag:<10} {key:<48} {t_base * 1000:9.1f} -> {t_cur * 1000:9.1f} ms ({ratio:5.2f}x)")
+    return lines, regressions
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+引擎基准测试入口
+
+示例::
+
+    # 运行全部用例并保存为基线
+    python -m benchmarks.run_benchmarks --save-baseline default
+
+    # 升级引擎后与基线比较，出现回退时返回非零退出码
+    python -m benchmarks.run_benchmarks --compare default --fail-on-regression
+
+    # 只测小图上的 potrace，并输出质量指标
+    python -m benchmarks.run_benchmarks --cases engine:potrace --sizes 256 --score
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# 允许直接以脚本方式运行
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.corpus import DEFAULT_SIZES, KINDS, build_corpus
+from benchmarks.harness import (
+    build_cases, compare, load_baseline, results_document, run_benchmarks, save_baseline,
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="RasterVectorStudio 引擎基准测试")
+    parser.add_argument("--kinds", nargs="+", default=list(KINDS), choices=KINDS,
+                        help="语料类型")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES),
+                        help="语料边长（像素）")
+    parser.add_argument("--cases", nargs="+", default=None,
+                        help="只运行指定用例（如 engine:potrace post:score），支持前缀匹配")
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例的计时次数")
+    parser.add_argument("--warmup", type=int, default=1, help="计时前的预热次数")
+    parser.add_argument("--score", action="store_true", help="同时记录引擎输出的保真度指标")
+    parser.add_argument("--output", type=Path, default=None, help="结果 JSON 输出路径")
+    parser.add_argument("--save-baseline", metavar="NAME", default=None,
+                        help="把结果保存为 benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", default=None,
+                        help="与指定基线比较（名称或 JSON 路径）")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="判定回退的相对变慢比例（默认 0.2 即 20%%）")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="出现回退时以退出码 1 结束")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    print("📦 准备语料...")
+    images = build_corpus(args.kinds, args.sizes)
+
+    cases, skipped = build_cases()
+    if args.cases:
+        cases = [c for c in cases if any(c.name.startswith(p) for p in args.cases)]
+        skipped = {k: v for k, v in skipped.items() if any(k.startswith(p) for p in args.cases)}
+    for name, reason in skipped.items():
+        print(f"⚠️ 跳过 {name}: {reason}")
+
+    print(f"⏱️ 运行 {len(cases)} 个用例 × {len(images)} 张图像 (repeat={args.repeat})")
+    results = run_benchmarks(images, cases, repeat=args.repeat, warmup=args.warmup, score=args.score)
+    doc = results_document(results, skipped, args.repeat)
+
+    if args.output:
+        args.output.write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"💾 结果已保存: {args.output}")
+    if args.save_baseline:
+        path = save_baseline(doc, args.save_baseline)
+        print(f"💾 基线已保存: {path}")
+
+    if args.compare:
+        baseline = load_baseline(args.compare)
+        lines, regressions = compare(doc, baseline, threshold=args.threshold)
+        print(f"\n📊 与基线 {args.compare} 比较 (创建于 {baseline['meta'].get('created', '?')}):")
+        print("\n".join(lines))
+        if regressions:
+            print(f"\n❌ 发现 {regressions} 项性能回退")
+            if args.fail_on_regression:
+                return 1
+        else:
+            print("\n✅ 没有性能回退")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+启动耗时预算检查
+
+多次以子进程启动应用（窗口可用后自动退出），取“启动进程 → 窗口可用”耗时的中位数，
+超过预算时以退出码 1 结束，防止启动变慢的改动悄悄进入。
+
+示例::
+
+    # 默认预算，启动 3 次
+    python -m benchmarks.startup_budget
+
+    # 指定预算并打印最后一次的阶段与导入明细
+    python -m benchmarks.startup_budget --budget 4 --details
+
+    # 没有显示器的 Linux 机器上
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.startup_budget
+
+预算也可以通过环境变量 RVS_STARTUP_BUDGET_S 配置。
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+# 允许直接以脚本方式运行
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.utils.startup import median_ready, profile_startup
+
+
+DEFAULT_BUDGET_S = float(os.environ.get("RVS_STARTUP_BUDGET_S", "5.0"))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="RasterVectorStudio 启动耗时预算检查")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_S,
+                        help="窗口可用耗时上限（秒）")
+    parser.add_argument("--repeat", type=int, default=3, help="启动次数，取中位数")
+    parser.add_argument("--timeout", type=float, default=120.0, help="单次启动的超时（秒）")
+    parser.add_argument("--importtime", action="store_true",
+                        help="计时时同时收集 -X importtime（会略微拖慢启动）")
+    parser.add_argument("--details", action="store_true", help="打印最后一次启动的阶段与导入明细")
+    parser.add_argument("--output", type=Path, default=None, help="结果 JSON 输出路径")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    script = PROJECT_ROOT / "start.py"
+
+    reports = []
+    for i in range(args.repeat):
+        report = profile_startup(script, importtime=args.importtime, timeout=args.timeout)
+        status = f"{report.ready_s:.2f}s" if report.ready_s is not None else report.error
+        print(f"  启动 {i + 1}/{args.repeat}: {status}")
+        reports.append(report)
+
+    if args.details:
+        # 明细总是带上导入耗时，单独再启动一次
+        print()
+        print(profile_startup(script, importtime=True, timeout=args.timeout).format())
+
+    ready = median_ready(reports)
+    if args.output:
+        doc = {
+            "budget_s": args.budget,
+            "median_ready_s": ready,
+            "runs": [r.to_dict() for r in reports],
+        }
+        args.output.write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"💾 结果已保存: {args.output}")
+
+    if ready is None:
+        print("\n❌ 应用没有成功启动")
+        return 1
+    if ready > args.budget:
+        print(f"\n❌ 启动耗时 {ready:.2f}s 超出预算 {args.budget:.2f}s")
+        return 1
+    print(f"\n✅ 启动耗时 {ready:.2f}s，预算 {args.budget:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
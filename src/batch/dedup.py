@@ -0,0 +1,114 @@
+"""
+重复输入检测
+============
+
+批量输入里常有完全相同的文件（重复拷贝）和几乎相同的图像（重新扫描、重新导出）：
+
+- 完全相同：按内容哈希（清单中已有）判断，BatchRunner 直接复用已有的 SVG，不再矢量化；
+- 近似重复：按感知哈希（src.processing.perceptual_hash）的汉明距离判断，
+  只标记出来写入报告，是否合并由人决定。
+
+感知哈希按内容哈希缓存在清单中，重新运行时只为新文件解码缩略图。
+
+用法::
+
+    from src.batch.dedup import near_duplicates, write_report
+
+    plan = runner.plan(inputs)
+    dups = near_duplicates(plan.hashes, runner.manifest, max_distance=6)
+    write_report(dups, out_dir / "duplicates.csv")
+"""
+
+import csv
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.batch.manifest import Manifest
+
+
+HASH_CHUNK = 1024  # 每批解码的缩略图数
+
+
+@dataclass
+class Duplicate:
+    """input_path 与 similar_to（更早出现的输入）重复"""
+    input_path: Path
+    similar_to: Path
+    distance: int      # 感知哈希的汉明距离；完全相同时为 0
+    exact: bool        # 内容完全相同
+
+
+def exact_duplicates(hashes: Dict[Path, str]) -> List[Duplicate]:
+    """内容完全相同的输入，每个都指向同组中排序最前的那个"""
+    first: Dict[str, Path] = {}
+    dups = []
+    for path in sorted(hashes):
+        original = first.setdefault(hashes[path], path)
+        if original != path:
+            dups.append(Duplicate(path, original, 0, True))
+    return dups
+
+
+def near_duplicates(hashes: Dict[Path, str], manifest: Optional[Manifest] = None,
+                    max_distance: int = 6, method: str = "phash",
+                    workers: Optional[int] = None, include_exact: bool = True) -> List[Duplicate]:
+    """查找近似重复的输入
+
+    Args:
+        hashes: 输入路径 -> 内容哈希（Plan.hashes）
+        manifest: 给定时从中读取和缓存感知哈希
+        max_distance: 64 位感知哈希的汉明距离不超过该值视为近似重复
+        method: "phash" 或 "dhash"
+        include_exact: 结果中同时包含内容完全相同的输入
+    """
+    from src.processing.perceptual_hash import HashIndex, hash_images
+
+    # 内容相同的文件只算一次，以排序最前的路径为代表
+    representative: Dict[str, Path] = {}
+    for path in sorted(hashes):
+        representative.setdefault(hashes[path], path)
+    digests = list(representative)
+
+    values = manifest.perceptual_hashes(method, digests) if manifest is not None else {}
+    missing = [d for d in digests if d not in values]
+    if missing:
+        computed = {}
+        with ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 2)) as pool:
+            for i in range(0, len(missing), HASH_CHUNK):
+                chunk = missing[i:i + HASH_CHUNK]
+                results = hash_images([representative[d] for d in chunk], method, executor=pool)
+                computed.update((d, v) for d, v in zip(chunk, results) if v is not None)
+        if manifest is not None and computed:
+            manifest.store_perceptual_hashes(method, computed)
+        values.update(computed)
+
+    index = HashIndex(max_distance)
+    indexed: List[str] = []
+    dups = exact_duplicates(hashes) if include_exact else []
+    for digest in digests:
+        value = values.get(digest)
+        if value is None:
+            continue  # 无法解码，矢量化时会报错
+        matches = index.query(value)
+        if matches:
+            ident, distance = matches[0]
+            dups.append(Duplicate(representative[digest], representative[indexed[ident]],
+                                  distance, False))
+        index.add(value)
+        indexed.append(digest)
+    return dups
+
+
+def write_report(dups: List[Duplicate], path: Path):
+    """写出 CSV 报告：输入, 相似于, 距离, 类型"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(["input", "similar_to", "distance", "kind"])
+        for dup in sorted(dups, key=lambda d: (str(d.similar_to), d.distance, str(d.input_path))):
+            writer.writerow([dup.input_path, dup.similar_to, dup.distance,
+                             "exact" if dup.exact else "near"])
@@ -0,0 +1,362 @@
+"""
+批处理清单
+==========
+
+大批量矢量化（十万级文件）的进度记录在一个 SQLite 文件里：每个输入的内容哈希、
+引擎、参数、状态、耗时和输出位置。进程中途崩溃后重新运行同一批次时：
+
+- 已完成且输入未改变（内容哈希相同）、输出仍存在的项直接跳过；
+- 失败的项重试（超过最大尝试次数的除外）；
+- 上次运行中断时处于“运行中”的项重新处理。
+
+清单还按内容哈希缓存图像的感知哈希（src.batch.dedup 查找近似重复时使用）。
+
+哈希只在文件大小或修改时间变化时重新计算，未改变的大目录重新规划只需 stat。
+状态更新先写入内存缓冲区，按条数或时间批量提交到一个事务中，
+避免每个文件一次 fsync；崩溃时最多丢失最近一次提交之后的状态，这些项下次会重做。
+
+用法::
+
+    from src.batch.manifest import Manifest
+
+    with Manifest(out_dir / "manifest.sqlite") as manifest:
+        plan = manifest.plan(inputs, "vtracer", params)
+        for item in plan.todo:
+            ...
+            manifest.complete(item, svg_path, elapsed_s)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# 状态
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+HASH_CHUNK = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    input_path   TEXT    NOT NULL,
+    engine       TEXT    NOT NULL,
+    params_key   TEXT    NOT NULL,
+    params       TEXT    NOT NULL,
+    size         INTEGER,
+    mtime_ns     INTEGER,
+    content_hash TEXT,
+    status       TEXT    NOT NULL,
+    output_path  TEXT,
+    error        TEXT,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    started      REAL,
+    finished     REAL,
+    elapsed_s    REAL,
+    PRIMARY KEY (input_path, engine, params_key)
+);
+CREATE INDEX IF NOT EXISTS items_status ON items (status);
+CREATE INDEX IF NOT EXISTS items_hash ON items (content_hash);
+CREATE TABLE IF NOT EXISTS image_hashes (
+    content_hash TEXT NOT NULL,
+    method       TEXT NOT NULL,
+    value        TEXT NOT NULL,
+    PRIMARY KEY (content_hash, method)
+);
+"""
+
+
+def file_hash(path: Path) -> str:
+    """文件内容哈希（BLAKE2b-128，十六进制）"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def params_key(params: Dict[str, Any]) -> str:
+    """参数的规范化键：同一组参数无论顺序如何都得到相同的键"""
+    canonical = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class ManifestItem:
+    """清单中的一项（一个输入在一组引擎参数下）"""
+    input_path: Path
+    engine: str
+    params_key: str
+    content_hash: Optional[str] = None
+    size: Optional[int] = None
+    mtime_ns: Optional[int] = None
+    status: str = PENDING
+    output_path: Optional[Path] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+
+@dataclass
+class Plan:
+    """一次运行的计划"""
+    todo: List[ManifestItem] = field(default_factory=list)
+    done: int = 0          # 已完成且未改变，跳过
+    retry: int = 0         # 失败或中断后重试
+    changed: int = 0       # 输入内容已改变，重新处理
+    gave_up: int = 0       # 超过最大尝试次数
+    missing: int = 0       # 输入文件不存在
+    duplicates: int = 0    # 待处理项中与其他输入内容相同、可复用输出的
+    hashes: Dict[Path, str] = field(default_factory=dict)  # 所有存在的输入 -> 内容哈希
+
+    def format(self) -> str:
+        line = (f"待处理 {len(self.todo)}（重试 {self.retry}，已改变 {self.changed}），"
+                f"跳过已完成 {self.done}，放弃 {self.gave_up}，缺失 {self.missing}")
+        if self.duplicates:
+            line += f"，其中 {self.duplicates} 个与其他输入相同，将复用结果"
+        return line
+
+
+class Manifest:
+    """SQLite 批处理清单（线程安全）
+
+    Args:
+        path: 清单文件路径
+        flush_every: 缓冲多少条状态更新后提交
+        flush_interval_s: 距上次提交超过该时间也会提交
+    """
+
+    def __init__(self, path: Path, flush_every: int = 500, flush_interval_s: float = 2.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self.flush_interval_s = flush_interval_s
+        self._lock = threading.Lock()
+        self._pending: List[Tuple] = []
+        self._last_flush = time.monotonic()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        # WAL：写入时其他进程仍可读取进度；NORMAL 在 WAL 下崩溃也不会损坏数据库
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self) -> "Manifest":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._db.close()
+
+    # ------------------------------------------------------------------
+    # 规划
+    # ------------------------------------------------------------------
+
+    def plan(self, inputs: Iterable, engine: str, params: Dict[str, Any],
+             output_for=None, max_attempts: int = 3, workers: Optional[int] = None) -> Plan:
+        """对比清单决定哪些输入需要处理，并把它们登记为 pending
+
+        Args:
+            output_for: 输入路径 -> 预期输出路径；给定时，输出文件丢失的已完成项也会重做，
+                待处理项登记时即记录其输出路径（重启后沿用，见 assigned_outputs）
+            max_attempts: 失败次数达到该值的项不再重试
+        """
+        key = params_key(params)
+        params_json = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+        inputs = [Path(p).absolute() for p in inputs]
+        self.flush()
+        with self._lock:
+            rows = {
+                row[0]: row for row in self._db.execute(
+                    "SELECT input_path, size, mtime_ns, content_hash, status, output_path, attempts "
+                    "FROM items WHERE engine = ? AND params_key = ?", (engine, key))
+            }
+
+        def inspect(path: Path):
+            try:
+                st = path.stat()
+            except OSError:
+                return path, None, None, None
+            row = rows.get(str(path))
+            # 大小和修改时间都没变时沿用记录的哈希，不重新读文件
+            if row and row[1] == st.st_size and row[2] == st.st_mtime_ns and row[3]:
+                return path, st.st_size, st.st_mtime_ns, row[3]
+            try:
+                return path, st.st_size, st.st_mtime_ns, file_hash(path)
+            except OSError:
+                return path, None, None, None
+
+        # 哈希计算在 hashlib 中释放 GIL，多线程可以并行读盘和计算
+        with ThreadPoolExecutor(max_workers=workers or min(8, (os.cpu_count() or 2))) as pool:
+            inspected = list(pool.map(inspect, inputs))
+
+        plan = Plan()
+        upserts = []
+        for path, size, mtime_ns, digest in inspected:
+            if digest is None:
+                plan.missing += 1
+                continue
+            plan.hashes[path] = digest
+            row = rows.get(str(path))
+            attempts = 0
+            if row is not None:
+                _, _, _, old_hash, status, output, attempts = row
+                unchanged = old_hash == digest
+                if unchanged and status == DONE:
+                    expected = output_for(path) if output_for else (Path(output) if output else None)
+                    if expected is None or Path(expected).exists():
+                        plan.done += 1
+                        continue
+                if not unchanged:
+                    plan.changed += 1
+                    attempts = 0
+                elif status == FAILED and attempts >= max_attempts:
+                    plan.gave_up += 1
+                    continue
+                else:
+                    # 失败、中断（pending/running）或输出文件丢失
+                    plan.retry += 1
+            plan.todo.append(ManifestItem(path, engine, key, digest, size, mtime_ns,
+                                          attempts=attempts))
+            expected = output_for(path) if output_for else None
+            upserts.append((str(path), engine, key, params_json, size, mtime_ns, digest,
+                            PENDING, str(expected) if expected else None, attempts))
+
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT INTO items (input_path, engine, params_key, params, size, mtime_ns, "
+                "content_hash, status, output_path, attempts) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (input_path, engine, params_key) DO UPDATE SET "
+                "size = excluded.size, mtime_ns = excluded.mtime_ns, "
+                "content_hash = excluded.content_hash, status = excluded.status, "
+                "output_path = COALESCE(excluded.output_path, output_path), "
+                "attempts = excluded.attempts, error = NULL",
+                upserts)
+            self._db.execute("COMMIT")
+        return plan
+
+    # ------------------------------------------------------------------
+    # 状态更新（缓冲后批量提交）
+    # ------------------------------------------------------------------
+
+    def start(self, item: ManifestItem):
+        item.status = RUNNING
+        item.attempts += 1
+        self._queue(item, started=time.time())
+
+    def complete(self, item: ManifestItem, output_path: Optional[Path], elapsed_s: float):
+        item.status = DONE
+        item.output_path = Path(output_path) if output_path else None
+        item.error = None
+        self._queue(item, finished=time.time(), elapsed_s=elapsed_s)
+
+    def fail(self, item: ManifestItem, error: str, elapsed_s: Optional[float] = None):
+        item.status = FAILED
+        item.error = error
+        self._queue(item, finished=time.time(), elapsed_s=elapsed_s)
+
+    def _queue(self, item: ManifestItem, started: Optional[float] = None,
+               finished: Optional[float] = None, elapsed_s: Optional[float] = None):
+        row = (item.status, str(item.output_path) if item.output_path else None, item.error,
+               item.attempts, started, finished, elapsed_s,
+               str(item.input_path), item.engine, item.params_key)
+        with self._lock:
+            self._pending.append(row)
+            due = (len(self._pending) >= self.flush_every
+                   or time.monotonic() - self._last_flush >= self.flush_interval_s)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """把缓冲的状态更新在一个事务中提交"""
+        with self._lock:
+            rows, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+            if not rows:
+                return
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "UPDATE items SET status = ?, output_path = COALESCE(?, output_path), error = ?, "
+                "attempts = ?, started = COALESCE(?, started), finished = ?, elapsed_s = ? "
+                "WHERE input_path = ? AND engine = ? AND params_key = ?",
+                rows)
+            self._db.execute("COMMIT")
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def counts(self, engine: Optional[str] = None) -> Dict[str, int]:
+        """各状态的项数"""
+        self.flush()
+        sql = "SELECT status, COUNT(*) FROM items"
+        args: Tuple = ()
+        if engine:
+            sql += " WHERE engine = ?"
+            args = (engine,)
+        with self._lock:
+            return dict(self._db.execute(sql + " GROUP BY status", args).fetchall())
+
+    def assigned_outputs(self, engine: str, key: str) -> Dict[Path, Path]:
+        """同一引擎和参数下已分配的 {输入路径: 输出路径}（含未完成的项）"""
+        self.flush()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT input_path, output_path FROM items WHERE engine = ? AND params_key = ? "
+                "AND output_path IS NOT NULL", (engine, key)).fetchall()
+        return {Path(path): Path(output) for path, output in rows}
+
+    def outputs_by_hash(self, engine: str, key: str) -> Dict[str, Path]:
+        """同一引擎和参数下已完成项的 {内容哈希: 输出路径}"""
+        self.flush()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT content_hash, output_path FROM items WHERE engine = ? AND params_key = ? "
+                "AND status = ? AND content_hash IS NOT NULL AND output_path IS NOT NULL "
+                "ORDER BY finished", (engine, key, DONE)).fetchall()
+        return {digest: Path(output) for digest, output in rows}
+
+    def perceptual_hashes(self, method: str, digests: Iterable[str]) -> Dict[str, int]:
+        """读取缓存的感知哈希 {内容哈希: 值}"""
+        digests = list(digests)
+        found = {}
+        with self._lock:
+            # SQLite 单条语句的参数个数有上限，分批查询
+            for i in range(0, len(digests), 500):
+                chunk = digests[i:i + 500]
+                rows = self._db.execute(
+                    f"SELECT content_hash, value FROM image_hashes WHERE method = ? "
+                    f"AND content_hash IN ({', '.join('?' * len(chunk))})", (method, *chunk))
+                found.update((digest, int(value, 16)) for digest, value in rows)
+        return found
+
+    def store_perceptual_hashes(self, method: str, values: Dict[str, int]):
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR REPLACE INTO image_hashes (content_hash, method, value) VALUES (?, ?, ?)",
+                [(digest, method, f"{value:016x}") for digest, value in values.items()])
+            self._db.execute("COMMIT")
+
+    def failures(self, limit: int = 20) -> List[Tuple[str, str, int]]:
+        """最近失败的项：(输入, 错误, 尝试次数)"""
+        self.flush()
+        with self._lock:
+            return self._db.execute(
+                "SELECT input_path, error, attempts FROM items WHERE status = ? "
+                "ORDER BY finished DESC LIMIT ?", (FAILED, limit)).fetchall()
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+批量矢量化
+==========
+
+用指定引擎处理整个目录，进度记录在输出目录的 SQLite 清单中（src.batch.manifest），
+中断后重新运行同一命令只处理未完成、已改变或失败的文件。
+
+示例::
+
+    # 处理 scans 目录（递归），输出保持相同的目录结构
+    python -m src.batch.run D:/scans --engine vtracer --output D:/svg
+
+    # 指定参数，8 个并发
+    python -m src.batch.run D:/scans -e mkbitmap+potrace -p threshold=140 -p turdsize=5 \\
+        --output D:/svg --workers 8
+
+    # 另外列出近似重复的输入（感知哈希距离不超过 6），写入 <输出目录>/duplicates.csv
+    python -m src.batch.run D:/scans -o D:/svg --near-dups
+
+调用外部程序的引擎通过 registry.arun() 在一个事件循环中并发等待，
+进程内计算的引擎在线程池中运行。内容完全相同的输入（包括以前运行中处理过的）
+只矢量化一次，其余直接复用其 SVG（--no-dedup 关闭）。
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 允许直接以脚本方式运行
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.batch.manifest import Manifest, ManifestItem, Plan, params_key
+
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tif", ".tiff", ".webp",
+                  ".pbm", ".pgm", ".ppm", ".pnm"}
+MANIFEST_NAME = "manifest.sqlite"
+
+
+def collect_inputs(paths: Iterable) -> List[Tuple[Path, Path]]:
+    """展开目录，返回 [(图像文件, 计算相对输出路径用的根目录)]"""
+    found = {}
+    for p in map(Path, paths):
+        p = p.absolute()
+        if p.is_dir():
+            for dirpath, _, filenames in os.walk(p):
+                for name in sorted(filenames):
+                    if Path(name).suffix.lower() in IMAGE_SUFFIXES:
+                        found.setdefault(Path(dirpath) / name, p)
+        elif p.suffix.lower() in IMAGE_SUFFIXES:
+            found.setdefault(p, p.parent)
+    return list(found.items())
+
+
+def output_path(input_path: Path, root: Path, out_dir: Path) -> Path:
+    """输出保持输入相对根目录的结构，扩展名改为 .svg"""
+    return out_dir / input_path.relative_to(root).with_suffix(".svg")
+
+
+def write_atomic(path: Path, text: str):
+    """先写临时文件再替换，崩溃时不会留下写了一半的 SVG"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".part")
+    tmp.write_text(text, encoding="utf-8")
+    tmp.replace(path)
+
+
+@dataclass
+class BatchStats:
+    total: int = 0
+    done: int = 0
+    failed: int = 0
+    reused: int = 0        # done 中复用重复输入结果的
+    started: float = 0.0
+
+    def format(self) -> str:
+        finished = self.done + self.failed
+        elapsed = time.monotonic() - self.started
+        rate = finished / elapsed if elapsed > 0 else 0.0
+        line = f"  {finished}/{self.total}（失败 {self.failed}，复用 {self.reused}）{rate:.1f} 个/秒"
+        if rate > 0 and finished < self.total:
+            from src.utils.cost_model import format_eta
+            line += f"，剩余约 {format_eta((self.total - finished) / rate)}"
+        return line
+
+
+class BatchRunner:
+    """用一个引擎和一组参数处理输入，结果与状态写入清单
+
+    Args:
+        engine: 注册表中的引擎名
+        params: 引擎参数（按参数表补全并转换类型后记入清单）
+        out_dir: 输出目录
+        manifest: 清单；为 None 时使用 out_dir/manifest.sqlite
+        workers: 同时处理的文件数
+        timeout: 单个文件的超时（秒）
+        dedup: 内容与已完成项相同的输入直接复制其 SVG
+    """
+
+    def __init__(self, engine: str, params: Optional[Dict[str, Any]], out_dir: Path,
+                 manifest: Optional[Manifest] = None, workers: Optional[int] = None,
+                 timeout: Optional[float] = None, max_attempts: int = 3, dedup: bool = True):
+        from src.tools.registry import registry
+
+        self.registry = registry
+        self.engine = engine
+        spec = registry.spec(engine)
+        unknown = spec.unknown(params)
+        if unknown:
+            # 拼错的参数名（如 treshold）会被 resolve() 丢弃，整批按默认参数运行并记入清单
+            known = ", ".join(p.name for p in spec.params) or "无"
+            raise ValueError(f"未知参数: {', '.join(unknown)}（{engine} 支持: {known}）")
+        self.params = spec.resolve(params)
+        self.params_key = params_key(self.params)
+        self.out_dir = Path(out_dir).absolute()
+        self.manifest = manifest or Manifest(self.out_dir / MANIFEST_NAME)
+        self.workers = workers or os.cpu_count() or 4
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.dedup = dedup
+        self.reused = 0
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch")
+        # 输入 -> 输出的分配在多次 plan() 之间（热文件夹逐个规划）和重启之间保持不变，
+        # 同名不同扩展名的输入不会写到同一个 SVG
+        self._outputs: Optional[Dict[Path, Path]] = None
+        self._taken: Dict[Path, Path] = {}
+        self._outputs_lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # 内容哈希 -> 已完成的输出；首次规划时从清单加载，之后在内存中维护
+        self._done_by_hash: Optional[Dict[str, Path]] = None
+        # 内容哈希 -> 正在处理的同内容输入（完成时置结果），相同内容的其他输入等待它
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def output_for(self, path: Path) -> Path:
+        """已分配给输入的输出路径（未规划过的输入按默认规则计算）"""
+        with self._outputs_lock:
+            out = self._outputs.get(path) if self._outputs is not None else None
+        return out or output_path(path, path.parent, self.out_dir)
+
+    def _assign_outputs(self, inputs: List[Tuple[Path, Path]]):
+        with self._outputs_lock:
+            if self._outputs is None:
+                self._outputs = self.manifest.assigned_outputs(self.engine, self.params_key)
+                self._taken = {out: path for path, out in self._outputs.items()}
+            for path, root in inputs:
+                path = path.absolute()
+                if path in self._outputs:
+                    continue
+                out = output_path(path, root, self.out_dir)
+                if out in self._taken:
+                    # a.png 和 a.jpg 在同一目录：后到的保留原扩展名，输出为 a.jpg.svg
+                    out = out.with_name(path.name + ".svg")
+                    n = 1
+                    while out in self._taken:
+                        n += 1
+                        out = out.with_name(f"{path.name}.{n}.svg")
+                self._outputs[path] = out
+                self._taken[out] = path
+
+    def plan(self, inputs: List[Tuple[Path, Path]]) -> Plan:
+        self._assign_outputs(inputs)
+        plan = self.manifest.plan([p for p, _ in inputs], self.engine, self.params,
+                                  output_for=self.output_for, max_attempts=self.max_attempts)
+        if self.dedup and plan.todo:
+            if self._done_by_hash is None:
+                self._done_by_hash = self.manifest.outputs_by_hash(self.engine, self.params_key)
+            seen = set()
+            for item in plan.todo:
+                source = self._done_by_hash.get(item.content_hash)
+                if item.content_hash in seen or (source is not None and source.exists()):
+                    plan.duplicates += 1
+                seen.add(item.content_hash)
+        return plan
+
+    async def run(self, items: List[ManifestItem], report_every_s: float = 2.0) -> BatchStats:
+        """并发处理计划中的项"""
+        stats = BatchStats(total=len(items), started=time.monotonic())
+        last_report = time.monotonic()
+
+        reused_before = self.reused
+
+        async def one(item: ManifestItem):
+            nonlocal last_report
+            ok = await self.process(item)
+            if ok:
+                stats.done += 1
+            else:
+                stats.failed += 1
+            stats.reused = self.reused - reused_before
+            if time.monotonic() - last_report >= report_every_s:
+                last_report = time.monotonic()
+                print(stats.format())
+
+        await asyncio.gather(*(one(item) for item in items))
+        self.manifest.flush()
+        return stats
+
+    async def process(self, item: ManifestItem) -> bool:
+        """处理一项，返回是否成功（失败记入清单，不抛出）
+
+        同时处理的项数不超过 workers（所有调用方共享）。
+        """
+        out = self.output_for(item.input_path)
+        digest = item.content_hash if self.dedup else None
+        if digest is None:
+            return await self._limited(item, out)
+
+        # 同内容的输入正在处理时等它完成；它失败则由第一个醒来的等待者接着处理
+        while digest in self._inflight:
+            await asyncio.shield(self._inflight[digest])
+        if self._done_by_hash is None:
+            self._done_by_hash = self.manifest.outputs_by_hash(self.engine, self.params_key)
+        source = self._done_by_hash.get(digest)
+        if source is not None and source != out and source.exists():
+            return self._reuse(item, source, out)
+
+        done = self._inflight[digest] = asyncio.get_running_loop().create_future()
+        try:
+            return await self._limited(item, out)
+        finally:
+            del self._inflight[digest]
+            done.set_result(None)
+
+    def _reuse(self, item: ManifestItem, source: Path, out: Path) -> bool:
+        """复制内容相同的输入已有的 SVG"""
+        self.manifest.start(item)
+        try:
+            if out != source:
+                write_atomic(out, source.read_text(encoding="utf-8"))
+        except OSError as e:
+            self.manifest.fail(item, f"复用 {source} 失败: {e}", 0.0)
+            return False
+        self.manifest.complete(item, out, 0.0)
+        self.reused += 1
+        return True
+
+    async def _limited(self, item: ManifestItem, out: Path) -> bool:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        async with self._semaphore:
+            return await self._process(item, out)
+
+    async def _process(self, item: ManifestItem, out: Path) -> bool:
+        self.manifest.start(item)
+        started = time.perf_counter()
+        try:
+            svg = await asyncio.wait_for(
+                self.registry.arun(self.engine, item.input_path, self.params, executor=self._executor),
+                self.timeout)
+            if not svg.lstrip().startswith("<"):
+                raise RuntimeError(f"引擎没有返回 SVG: {svg[:200]}")
+            write_atomic(out, svg)
+        except asyncio.TimeoutError:
+            self.manifest.fail(item, f"超过 {self.timeout:g}s 未完成", time.perf_counter() - started)
+            return False
+        except Exception as e:
+            self.manifest.fail(item, str(e), time.perf_counter() - started)
+            return False
+        self.manifest.complete(item, out, time.perf_counter() - started)
+        if self._done_by_hash is not None and item.content_hash:
+            self._done_by_hash[item.content_hash] = out
+        return True
+
+    def close(self):
+        self.manifest.close()
+        self._executor.shutdown(wait=False)
+
+
+# ----------------------------------------------------------------------
+# 命令行
+# ----------------------------------------------------------------------
+
+def load_profile(path: Path) -> Tuple[str, Dict[str, Any]]:
+    """读取引擎配置 JSON：{"engine": ..., "params": {...}}
+
+    也接受自动调参的输出（src.processing.autotune），取其中的 "best" 作为参数。
+    """
+    import json
+    doc = json.loads(Path(path).read_text(encoding="utf-8"))
+    params = doc.get("params") or doc.get("best") or {}
+    return doc.get("engine", "mkbitmap+potrace"), dict(params)
+
+
+def report_near_duplicates(runner: BatchRunner, plan: Plan, max_distance: int, method: str):
+    from src.batch.dedup import near_duplicates, write_report
+
+    t0 = time.perf_counter()
+    dups = near_duplicates(plan.hashes, runner.manifest, max_distance, method, runner.workers)
+    report = runner.out_dir / "duplicates.csv"
+    write_report(dups, report)
+    exact = sum(d.exact for d in dups)
+    print(f"🔍 完全相同 {exact} 个，近似重复 {len(dups) - exact} 个"
+          f"（用时 {time.perf_counter() - t0:.1f}s），报告: {report}")
+    for dup in [d for d in dups if not d.exact][:10]:
+        print(f"  ≈ {dup.input_path.name} ~ {dup.similar_to.name}（距离 {dup.distance}）")
+
+
+def parse_params(items: List[str]) -> Dict[str, str]:
+    params = {}
+    for item in items:
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise SystemExit(f"参数格式应为 name=value: {item}")
+        params[name.strip()] = value.strip()
+    return params
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="RasterVectorStudio 批量矢量化")
+    parser.add_argument("inputs", nargs="+", type=Path, help="图像文件或目录（递归）")
+    parser.add_argument("--profile", type=Path, default=None, help="引擎配置 JSON（engine + params）")
+    parser.add_argument("-e", "--engine", default=None, help="引擎名称（覆盖配置文件）")
+    parser.add_argument("-p", "--param", action="append", default=[], metavar="NAME=VALUE",
+                        help="引擎参数，可多次指定（覆盖配置文件）")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="输出目录")
+    parser.add_argument("--manifest", type=Path, default=None,
+                        help=f"清单文件（默认 <输出目录>/{MANIFEST_NAME}）")
+    parser.add_argument("--workers", type=int, default=None, help="同时处理的文件数（默认 CPU 核数）")
+    parser.add_argument("--timeout", type=float, default=None, help="单个文件的超时（秒）")
+    parser.add_argument("--max-attempts", type=int, default=3, help="失败多少次后不再重试")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="内容相同的输入也分别矢量化（默认复用已有结果）")
+    parser.add_argument("--near-dups", type=int, nargs="?", const=6, default=None, metavar="DISTANCE",
+                        help="列出近似重复的输入（感知哈希汉明距离，默认 6），写入 <输出目录>/duplicates.csv")
+    parser.add_argument("--hash-method", choices=("phash", "dhash"), default="phash",
+                        help="近似重复检测使用的感知哈希")
+    parser.add_argument("--dry-run", action="store_true", help="只显示计划，不处理")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    from src.tools.registry import registry
+    engine, params = load_profile(args.profile) if args.profile else ("mkbitmap+potrace", {})
+    engine = args.engine or engine
+    params.update(parse_params(args.param))
+    if engine not in registry:
+        print(f"❌ 不支持的引擎: {engine}（可用: {', '.join(registry.names())}）")
+        return 2
+
+    manifest = Manifest(args.manifest) if args.manifest else None
+    try:
+        runner = BatchRunner(engine, params, args.output, manifest,
+                             args.workers, args.timeout, args.max_attempts,
+                             dedup=not args.no_dedup)
+    except ValueError as e:
+        print(f"❌ 参数无效: {e}")
+        return 2
+
+    try:
+        t0 = time.perf_counter()
+        inputs = collect_inputs(args.inputs)
+        plan = runner.plan(inputs)
+        print(f"📋 共 {len(inputs)} 个文件，{plan.format()}（规划用时 {time.perf_counter() - t0:.1f}s）")
+        if args.near_dups is not None:
+            report_near_duplicates(runner, plan, args.near_dups, args.hash_method)
+        if args.dry_run or not plan.todo:
+            return 0
+        stats = asyncio.run(runner.run(plan.todo))
+        print(stats.format())
+        for path, error, attempts in runner.manifest.failures(10):
+            print(f"  ❌ {path}（第 {attempts} 次）: {error}")
+        print(f"✅ 完成 {stats.done}，失败 {stats.failed}，清单: {runner.manifest.path}")
+        return 1 if stats.failed else 0
+    except KeyboardInterrupt:
+        print("\n已中断，重新运行同一命令即可继续")
+        return 130
+    finally:
+        runner.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+热文件夹
+========
+
+监视一个目录，新到或被修改的图像一旦写完就自动矢量化，输出到指定目录：
+
+- Linux 上用 inotify（通过 ctypes 调用，无额外依赖），事件到达后立即处理；
+  其他平台或网络共享（SMB/NFS 上其他机器写入的文件不产生 inotify 事件）
+  用 --poll 定时扫描；
+- 扫描仪和网络拷贝会分多次写入，文件大小和修改时间连续 --settle 秒不变、
+  且图像头可以解析时才认为写完（防抖）；
+- 进度记录在批处理清单中（src.batch.manifest），启动时先补处理停机期间到达的文件，
+  已处理且未改变的文件不会重复处理。
+
+示例::
+
+    python -m src.batch.watch D:/scans -o D:/svg --profile line_art.json
+    python -m src.batch.watch /mnt/share/scans -o /srv/svg -e vtracer --poll 5
+
+引擎配置（--profile）是 JSON 文件::
+
+    {"engine": "mkbitmap+potrace", "params": {"threshold": 140, "turdsize": 5}}
+"""
+
+import argparse
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+# 允许直接以脚本方式运行
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.batch.run import IMAGE_SUFFIXES, BatchRunner, collect_inputs, load_profile, parse_params
+
+
+# inotify 事件掩码（<sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+_EVENT = struct.Struct("iIII")
+
+
+def _wanted(path: Path) -> bool:
+    """只处理图像；跳过隐藏文件和常见的临时文件"""
+    name = path.name
+    return (path.suffix.lower() in IMAGE_SUFFIXES and not name.startswith((".", "~"))
+            and not name.endswith((".part", ".tmp", ".crdownload")))
+
+
+class InotifyWatcher:
+    """基于 inotify 的递归目录监视（仅 Linux）"""
+
+    def __init__(self, root: Path, recursive: bool = True):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self.root = root
+        self.recursive = recursive
+        self._dirs: Dict[int, Path] = {}
+        self.overflowed = False
+        self.watch_tree(root)
+
+    @staticmethod
+    def supported() -> bool:
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            return hasattr(ctypes.CDLL(ctypes.util.find_library("c") or None), "inotify_init1")
+        except OSError:
+            return False
+
+    def watch_tree(self, directory: Path) -> List[Path]:
+        """监视目录（递归时包括子目录），返回其中已有的文件（新建目录时可能已有内容）"""
+        files = []
+        for dirpath, dirnames, filenames in os.walk(directory):
+            wd = self._add_watch(self.fd, os.fsencode(dirpath), _WATCH_MASK)
+            if wd < 0:
+                print(f"⚠️ 无法监视 {dirpath}: {os.strerror(ctypes.get_errno())}")
+            else:
+                self._dirs[wd] = Path(dirpath)
+            files.extend(Path(dirpath) / name for name in filenames)
+            if not self.recursive:
+                break
+        return files
+
+    def read(self) -> List[Path]:
+        """读取所有待处理事件，返回有变化的文件"""
+        changed = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    # 事件队列溢出，丢失了事件，需要全量扫描
+                    self.overflowed = True
+                    continue
+                if mask & IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None or not name:
+                    continue
+                path = directory / name
+                if mask & IN_ISDIR:
+                    if self.recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                        changed.extend(self.watch_tree(path))
+                else:
+                    changed.append(path)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """定时扫描目录，比较文件大小和修改时间（适用于任何平台和网络共享）"""
+
+    def __init__(self, root: Path, recursive: bool = True):
+        self.root = root
+        self.recursive = recursive
+        self._seen: Dict[Path, Tuple[int, int]] = {}
+        self.scan()
+
+    def scan(self) -> List[Path]:
+        """返回自上次扫描以来新增或改变的文件"""
+        changed = []
+        current = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = Path(dirpath) / name
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                current[path] = (st.st_size, st.st_mtime_ns)
+                if self._seen.get(path) != current[path]:
+                    changed.append(path)
+            if not self.recursive:
+                break
+        self._seen = current
+        return changed
+
+
+class HotFolder:
+    """热文件夹：发现文件 → 等待写完 → 交给 BatchRunner 处理
+
+    Args:
+        root: 监视的目录
+        runner: 批处理执行器（引擎、参数、输出目录和清单）
+        settle_s: 文件大小和修改时间需要保持不变的时间
+        poll_s: 轮询模式的扫描间隔；为 None 时尽量使用 inotify
+    """
+
+    def __init__(self, root: Path, runner: BatchRunner, settle_s: float = 2.0,
+                 poll_s: Optional[float] = None, recursive: bool = True):
+        self.root = Path(root).absolute()
+        self.runner = runner
+        self.settle_s = settle_s
+        self.poll_s = poll_s
+        self.recursive = recursive
+        self.incomplete_timeout_s = max(60.0, 10 * settle_s)
+        # 路径 -> (首次发现时间, 最近一次变化时间, 最近一次看到的 (大小, 修改时间))
+        self._pending: Dict[Path, Tuple[float, float, Optional[Tuple[int, int]]]] = {}
+        self._active: Set[Path] = set()
+        self._tasks: Set[asyncio.Future] = set()
+        self.processed = 0
+        self.failed = 0
+
+    def _ignored(self, path: Path) -> bool:
+        # 输出目录在监视目录里面时，不要处理自己的输出
+        return not _wanted(path) or self.runner.out_dir in path.parents
+
+    def notice(self, paths: List[Path]):
+        now = time.monotonic()
+        for path in paths:
+            if self._ignored(path):
+                continue
+            first, _, seen = self._pending.get(path, (now, now, None))
+            self._pending[path] = (first, now, seen)
+
+    def _existing(self) -> List[Tuple[Path, Path]]:
+        """目录中已有的图像（不递归时只列出顶层文件）"""
+        if self.recursive:
+            return collect_inputs([self.root])
+        return [(p, self.root) for p in sorted(self.root.iterdir())
+                if p.is_file() and p.suffix.lower() in IMAGE_SUFFIXES]
+
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        stop = stop or asyncio.Event()
+        loop = asyncio.get_running_loop()
+
+        watcher = None
+        if self.poll_s is None and InotifyWatcher.supported():
+            watcher = InotifyWatcher(self.root, self.recursive)
+            loop.add_reader(watcher.fd, lambda: self.notice(watcher.read()))
+            print(f"👀 正在监视 {self.root}（inotify）")
+        else:
+            poller = await loop.run_in_executor(None, PollingWatcher, self.root, self.recursive)
+            print(f"👀 正在监视 {self.root}（每 {self.poll_s or 2.0:g}s 扫描一次）")
+        # 开始监视后再补处理停机期间到达或改变的文件，两者之间到达的文件不会漏掉
+        catch_up = asyncio.ensure_future(self._catch_up())
+
+        tick = min(0.5, self.settle_s / 2) if self.settle_s > 0 else 0.1
+        next_poll = time.monotonic()
+        try:
+            while not stop.is_set():
+                if watcher is None and time.monotonic() >= next_poll:
+                    self.notice(await loop.run_in_executor(None, poller.scan))
+                    next_poll = time.monotonic() + (self.poll_s or 2.0)
+                elif watcher is not None and watcher.overflowed:
+                    watcher.overflowed = False
+                    print("⚠️ inotify 事件队列溢出，重新扫描")
+                    existing = await loop.run_in_executor(None, self._existing)
+                    self.notice([p for p, _ in existing])
+                self._dispatch_settled()
+                try:
+                    await asyncio.wait_for(stop.wait(), tick)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if watcher is not None:
+                loop.remove_reader(watcher.fd)
+                watcher.close()
+            # 停止前结束所有处理中的作业，之后调用方才能安全地关闭清单；
+            # 中断的项在清单中保持 running，下次启动时重试
+            catch_up.cancel()
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(catch_up, *self._tasks, return_exceptions=True)
+
+    async def _catch_up(self):
+        """把目录中已有的文件作为一个批次处理（清单会跳过已完成且未改变的）
+
+        已经收到事件的文件（可能还在写入，或正在处理）留给事件处理；
+        补处理中的文件登记在 _active 里，期间到达的事件等补处理结束后再处理，
+        届时清单会跳过未再改变的文件，同一文件不会同时处理两次。
+        """
+        loop = asyncio.get_running_loop()
+        existing = await loop.run_in_executor(None, self._existing)
+        existing = [(p, root) for p, root in existing
+                    if not self._ignored(p) and p not in self._pending and p not in self._active]
+        claimed = {p for p, _ in existing}
+        self._active.update(claimed)
+        try:
+            plan = await loop.run_in_executor(None, self.runner.plan, existing)
+            if not plan.todo:
+                return
+            print(f"📋 补处理已有文件：{plan.format()}")
+            stats = await self.runner.run(plan.todo)
+            self.processed += stats.done
+            self.failed += stats.failed
+            print(f"📋 补处理完成：{stats.format().strip()}")
+        finally:
+            self._active.difference_update(claimed)
+
+    def _dispatch_settled(self):
+        """把大小和修改时间已稳定 settle_s 秒的文件交给处理"""
+        now = time.monotonic()
+        for path, (first, changed, seen) in list(self._pending.items()):
+            if path in self._active:
+                continue
+            try:
+                st = path.stat()
+            except OSError:
+                # 被删除或移走
+                del self._pending[path]
+                continue
+            current = (st.st_size, st.st_mtime_ns)
+            if current != seen:
+                self._pending[path] = (first, now, current)
+                continue
+            if now - changed < self.settle_s or st.st_size == 0:
+                continue
+            del self._pending[path]
+            self._active.add(path)
+            task = asyncio.ensure_future(self._process(path, first))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, path: Path, first_seen: float):
+        loop = asyncio.get_running_loop()
+        try:
+            complete = await loop.run_in_executor(None, _image_complete, path)
+            if not complete and time.monotonic() - first_seen < self.incomplete_timeout_s:
+                # 大小虽然稳定但图像还不完整（例如慢速网络拷贝中途停顿），稍后再检查；
+                # 一直无法解析的文件超时后照常处理，失败记入清单
+                self._pending[path] = (first_seen, time.monotonic(), None)
+                return
+            root = self.root if self.root in path.parents else path.parent
+            plan = await loop.run_in_executor(None, self.runner.plan, [(path, root)])
+            for item in plan.todo:
+                ok = await self.runner.process(item)
+                latency = time.monotonic() - first_seen
+                if ok:
+                    self.processed += 1
+                    print(f"✅ {path.name} → {item.output_path}（发现后 {latency:.1f}s）")
+                else:
+                    self.failed += 1
+                    print(f"❌ {path.name}: {item.error}")
+            self.runner.manifest.flush()
+        finally:
+            self._active.discard(path)
+
+
+def _image_complete(path: Path) -> bool:
+    """图像头可以解析且数据完整（截断的文件 verify() 会失败）"""
+    try:
+        from PIL import Image
+        with Image.open(path) as img:
+            img.verify()
+        return True
+    except Exception:
+        return False
+
+
+# ----------------------------------------------------------------------
+# 命令行
+# ----------------------------------------------------------------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="RasterVectorStudio 热文件夹：自动矢量化新到的图像")
+    parser.add_argument("folder", type=Path, help="监视的目录")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="输出目录")
+    parser.add_argument("--profile", type=Path, default=None, help="引擎配置 JSON（engine + params）")
+    parser.add_argument("-e", "--engine", default=None, help="引擎名称（覆盖配置文件）")
+    parser.add_argument("-p", "--param", action="append", default=[], metavar="NAME=VALUE",
+                        help="引擎参数，可多次指定（覆盖配置文件）")
+    parser.add_argument("--workers", type=int, default=None, help="同时处理的文件数（默认 CPU 核数）")
+    parser.add_argument("--timeout", type=float, default=None, help="单个文件的超时（秒）")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="文件大小和修改时间保持不变多少秒后才处理")
+    parser.add_argument("--poll", type=float, nargs="?", const=2.0, default=None, metavar="SECONDS",
+                        help="使用轮询代替 inotify（网络共享上需要），可指定扫描间隔")
+    parser.add_argument("--no-recursive", action="store_true", help="不监视子目录")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if not args.folder.is_dir():
+        print(f"❌ 目录不存在: {args.folder}")
+        return 2
+    engine, params = load_profile(args.profile) if args.profile else ("mkbitmap+potrace", {})
+    engine = args.engine or engine
+    params.update(parse_params(args.param))
+    try:
+        runner = BatchRunner(engine, params, args.output, workers=args.workers, timeout=args.timeout)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+
+    hot = HotFolder(args.folder, runner, settle_s=args.settle, poll_s=args.poll,
+                    recursive=not args.no_recursive)
+    print(f"引擎: {engine}  参数: {runner.params}")
+    try:
+        asyncio.run(hot.run())
+    except KeyboardInterrupt:
+        print(f"\n已停止：处理 {hot.processed}，失败 {hot.failed}")
+    finally:
+        runner.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,6 +12,7 @@
 from pathlib import Path
 import sys
 import os
+import shutil
 
 
 def is_frozen():
@@ -62,6 +63,10 @@ class ProjectPaths:
         
         # 样式文件
         self.STYLES_QSS = self.SRC_DIR / "gui" / "styles.qss"
+
+        # 用户数据目录（打包环境下项目根目录是只读的临时目录）
+        self.USER_DATA_DIR = Path(os.environ.get("RVS_DATA_DIR", Path.home() / ".rastervectorstudio"))
+        self.TIMINGS_DIR = self.USER_DATA_DIR / "timings"
     
     def _find_potrace(self):
         """查找 potrace.exe"""
@@ -74,7 +79,7 @@ class ProjectPaths:
         for path in possible_paths:
             if path.exists():
                 return path.resolve()
-        return None
+        return self._which("potrace")
     
     def _find_mkbitmap(self):
         """查找 mkbitmap.exe"""
@@ -87,7 +92,7 @@ class ProjectPaths:
         for path in possible_paths:
             if path.exists():
                 return path.resolve()
-        return None
+        return self._which("mkbitmap")
     
     def _find_trace(self):
         """查找 Trace(.NET) 可执行文件"""
@@ -129,7 +134,12 @@ class ProjectPaths:
         for path in possible_paths:
             if path.exists():
                 return path.resolve()
-        return None
+        return self._which("vtracer")
+    
+    def _which(self, name):
+        """在系统 PATH 中查找（Linux/macOS 上通过包管理器安装的工具没有 .exe 后缀）"""
+        found = shutil.which(name)
+        return Path(found).resolve() if found else None
     
     def ensure_project_root_in_path(self):
         """确保项目根目录在 sys.path 中，用于绝对导入"""
@@ -1,7 +1,91 @@
+import time
+from concurrent.futures import Future
 from pathlib import Path
 from PyQt5.QtWidgets import QWidget, QVBoxLayout
 from PyQt5.QtWebChannel import QWebChannel
 from ..config.paths import get_resource_path
+from ..utils import startup
+
+
+# 页面 loadFinished 之后 Paper.js 还要在 setTimeout 里初始化，轮询到编辑器 API 可用为止
+_READY_PROBE = ("typeof paper !== 'undefined' && !!paper.project"
+                " && typeof window.loadSvg === 'function'")
+_READY_POLL_MS = 20
+_READY_TIMEOUT_S = 15.0
+
+_prewarmed = None
+
+
+class EditorPage:
+    """一个加载了 paperjs_editor_pro.html 的 QWebEngineView 及其就绪状态
+
+    ready 是一个 Future：编辑器 API 可用时结果为 True，页面加载失败或超时为 False。
+    它的回调都在 Qt 主线程中执行。
+    """
+
+    def __init__(self):
+        from PyQt5.QtWebEngineWidgets import QWebEngineView
+        from PyQt5.QtCore import QUrl
+        from .webchannel_interface import WebChannelInterface
+
+        self.ready: Future = Future()
+        self.view = QWebEngineView()
+
+        # WebChannel 必须在页面加载前设置；MainWindow 引用在接管时再填入
+        self.channel = QWebChannel(self.view.page())
+        self.view.page().setWebChannel(self.channel)
+        self.interface = WebChannelInterface(None)
+        self.channel.registerObject("backend", self.interface)
+
+        self.load_started = time.perf_counter()
+        self.view.loadFinished.connect(self._on_load_finished)
+        self.view.load(QUrl.fromLocalFile(str(get_resource_path("web/paperjs_editor_pro.html"))))
+
+    def _on_load_finished(self, ok: bool):
+        startup.add("editor_page_load", self.load_started, ok=bool(ok))
+        if not ok:
+            self._resolve(False)
+            return
+        self._deadline = time.perf_counter() + _READY_TIMEOUT_S
+        self._probe()
+
+    def _probe(self):
+        from PyQt5.QtCore import QTimer
+
+        def on_result(available):
+            if available:
+                startup.add("editor_api_ready", self.load_started)
+                self._resolve(True)
+            elif time.perf_counter() > self._deadline:
+                print("编辑器初始化超时")
+                self._resolve(False)
+            else:
+                QTimer.singleShot(_READY_POLL_MS, self._probe)
+
+        self.view.page().runJavaScript(_READY_PROBE, on_result)
+
+    def _resolve(self, ok: bool):
+        if not self.ready.done():
+            startup.mark("editor_loaded")
+            self.ready.set_result(ok)
+
+
+def prewarm():
+    """在应用启动时（QApplication 创建后）立即开始加载编辑器页面
+
+    QtWebEngine 的渲染进程和页面加载与主窗口构造并行进行，
+    SvgEditorWidget 初始化时直接接管这个页面。
+    """
+    global _prewarmed
+    if _prewarmed is None:
+        _prewarmed = EditorPage()
+    return _prewarmed
+
+
+def _take_prewarmed():
+    global _prewarmed
+    page, _prewarmed = _prewarmed, None
+    return page
 
 
 class SvgEditorWidget(QWidget):
@@ -11,6 +95,7 @@ class SvgEditorWidget(QWidget):
     def __init__(self, parent=None, main_window=None):
         super().__init__(parent)
         self.view = None  # 延迟初始化
+        self.page = None
         self.main_window = main_window  # 保存MainWindow引用以便通信
         self.lay = QVBoxLayout(self)
         self.lay.setContentsMargins(0, 0, 0, 0)
@@ -26,41 +111,62 @@ class SvgEditorWidget(QWidget):
             self._init_web_view()
 
     def _init_web_view(self):
-        from PyQt5.QtWebEngineWidgets import QWebEngineView
-        from PyQt5.QtCore import QUrl
-        
-        self.view = QWebEngineView(self)
+        # 优先接管启动时预热的页面，没有时现在开始加载
+        self.page = _take_prewarmed() or EditorPage()
+        self.view = self.page.view
         self.lay.addWidget(self.view)
-        
+
         # 设置WebChannel以便与JavaScript通信
-        if self.main_window:
-            from .webchannel_interface import WebChannelInterface
-            
-            self.channel = QWebChannel(self.view.page())
-            self.view.page().setWebChannel(self.channel)
-            
-            # 使用专门的接口对象，而不是直接暴露 MainWindow
-            self.interface = WebChannelInterface(self.main_window)
-            self.channel.registerObject("backend", self.interface)
-        
-        # 加载专业版Paper.js编辑器页面
-        html_path = get_resource_path("web/paperjs_editor_pro.html")
-        self.view.load(QUrl.fromLocalFile(str(html_path)))
-        self.view.loadFinished.connect(self._on_loaded)
+        self.page.interface.main_window = self.main_window
+        self.channel = self.page.channel
+        self.interface = self.page.interface
+        self.page.ready.add_done_callback(lambda f: self._on_loaded(f.result()))
 
     def _on_loaded(self, ok: bool):
         self._ready = bool(ok)
-        if self._ready and self._svg_text and self.view:
-            # 页面就绪后使用Paper.js的API加载SVG
-            script = f"window.loadSvg && window.loadSvg(`{self._escape_js(self._svg_text)}`);"
-            self.view.page().runJavaScript(script)
 
-    def load_svg(self, svg: str):
+    def when_ready(self, callback):
+        """编辑器就绪（或加载失败）后以 True/False 调用 callback；已就绪时立即调用"""
+        if self.page is None:
+            self.init_web_view()
+        self.page.ready.add_done_callback(lambda f: callback(f.result()))
+
+    def load_svg(self, svg: str, timeline=None, callback=None):
+        """加载SVG到Paper.js画布；编辑器尚未就绪时等就绪后再加载
+
+        Args:
+            timeline: 可选的作业计时对象，记录等待就绪、转义和 window.loadSvg 的耗时
+            callback: 可选，前端处理完成后调用（加载失败时以 None 调用）
+        """
         self._svg_text = svg or ""
-        # 使用Paper.js API注入SVG内容
-        if self._ready and self.view:
-            script = f"window.loadSvg && window.loadSvg(`{self._escape_js(self._svg_text)}`);"
-            self.view.page().runJavaScript(script)
+        svg_text = self._svg_text
+        waited = not self._ready
+        requested = time.perf_counter()
+
+        def inject(ready):
+            if not ready or not self.view:
+                if callback:
+                    callback(None)
+                return
+            if timeline is not None and waited:
+                timeline.add("editor_wait", requested)
+            # 使用Paper.js API注入SVG内容
+            started = time.perf_counter()
+            script = f"window.loadSvg && window.loadSvg(`{self._escape_js(svg_text)}`);"
+            if timeline is not None:
+                timeline.add("js_escape", started, svg_chars=len(svg_text))
+            sent = time.perf_counter()
+
+            def on_done(result):
+                # runJavaScript 的回调在页面执行完脚本后才触发，覆盖了 Paper.js 的导入时间
+                if timeline is not None:
+                    timeline.add("window.loadSvg", sent)
+                if callback:
+                    callback(result)
+
+            self.view.page().runJavaScript(script, on_done)
+
+        self.when_ready(inject)
 
     def get_svg(self) -> str:
         # 使用Paper.js API从前端获取当前SVG内容
@@ -101,16 +207,8 @@ class SvgEditorWidget(QWidget):
             callback(self._svg_text)
     
     def set_svg_async(self, svg: str, callback=None):
-        """异步设置SVG内容"""
-        self._svg_text = svg or ""
-        if self._ready and self.view:
-            script = f"window.loadSvg && window.loadSvg(`{self._escape_js(self._svg_text)}`);"
-            if callback:
-                self.view.page().runJavaScript(script, callback)
-            else:
-                self.view.page().runJavaScript(script)
-        elif callback:
-            callback(True)
+        """异步设置SVG内容（编辑器未就绪时等就绪后加载）"""
+        self.load_svg(svg, callback=callback)
     
     def set_tool(self, tool_name: str):
         """设置当前工具"""
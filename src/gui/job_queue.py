@@ -0,0 +1,316 @@
+"""
+矢量化作业队列
+==============
+
+界面上的所有矢量化作业都提交到这里，由有界的 QThreadPool 并行执行：
+
+- 交互作业（点击“开始矢量化”）优先级高，会排到已排队的批量作业前面；
+- 批量作业（一次选择多张图像）以低优先级排队，空闲的工作线程依次取用；
+- 每个作业有自己的状态、计时和结果，界面通过信号更新作业列表；
+- 引擎通过 src.utils.progress.report() 报告数值进度，作业提交时用耗时模型
+  （src.utils.cost_model）预测耗时，成功结束后把实际耗时记入模型。
+
+适配器实例来自引擎注册表，由所有工作线程共享；每个作业有独立的临时目录。
+已结束作业的 SVG 结果只保留最近 keep_results 个（以及编辑器中显示的作业），
+大批量作业不会让内存无限增长。
+"""
+
+import itertools
+import os
+from collections import deque
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+# 作业状态
+QUEUED = "排队中"
+RUNNING = "运行中"
+DONE = "完成"
+FAILED = "失败"
+CANCELLED = "已取消"
+
+# QThreadPool 优先级：数值大的先执行
+PRIORITY_INTERACTIVE = 10
+PRIORITY_BULK = 0
+
+# 默认保留结果的已结束作业数
+KEEP_RESULTS = 32
+
+
+def default_workers() -> int:
+    """默认并行度：留一个核给界面线程"""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+@dataclass(eq=False)
+class VectorizeJob:
+    """一个矢量化作业"""
+    job_id: int
+    engine: str
+    input_path: Path
+    params: Dict[str, Any]
+    priority: int = PRIORITY_BULK
+    status: str = QUEUED
+    message: str = ""
+    result: Optional[str] = None
+    result_dropped: bool = False          # 结果已被释放（超出保留数量）
+    error: str = ""
+    timeline: Any = None
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    cancel_requested: bool = False
+    fraction: Optional[float] = None      # 引擎报告的进度，未报告时为 None
+    pixels: Optional[int] = None
+    predicted_s: Optional[float] = None   # 耗时模型的预测
+
+    @property
+    def interactive(self) -> bool:
+        return self.priority >= PRIORITY_INTERACTIVE
+
+    @property
+    def active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+    @property
+    def elapsed_s(self) -> Optional[float]:
+        if self.started is None:
+            return None
+        return (self.finished or time.time()) - self.started
+
+    @property
+    def progress(self) -> Optional[float]:
+        """估计的完成比例：优先用引擎报告的进度，否则按预测耗时推算（最多 95%）"""
+        if self.status == DONE:
+            return 1.0
+        if self.fraction is not None:
+            return self.fraction
+        elapsed = self.elapsed_s
+        if elapsed is None or not self.predicted_s:
+            return None
+        return min(elapsed / self.predicted_s, 0.95)
+
+    @property
+    def remaining_s(self) -> Optional[float]:
+        """估计的剩余秒数"""
+        if not self.active:
+            return 0.0
+        elapsed = self.elapsed_s
+        if elapsed is None:
+            return self.predicted_s
+        if self.fraction:
+            return elapsed * (1.0 - self.fraction) / self.fraction
+        if self.predicted_s:
+            return max(self.predicted_s - elapsed, 0.0)
+        return None
+
+    @property
+    def overrun(self) -> bool:
+        """运行时间已超过预测的 3 倍（可能参数过大或卡住）"""
+        elapsed = self.elapsed_s
+        return bool(self.predicted_s and elapsed and elapsed > 3.0 * max(self.predicted_s, 1.0))
+
+
+class _JobRunnable(QRunnable):
+    def __init__(self, queue: "JobQueue", job: VectorizeJob):
+        super().__init__()
+        # 由 JobQueue 持有引用，避免 Qt 删除后 Python 端仍在使用
+        self.setAutoDelete(False)
+        self.queue = queue
+        self.job = job
+
+    def run(self):
+        self.queue._execute(self.job)
+
+
+class JobQueue(QObject):
+    """有界线程池上的优先级作业队列（信号都在主线程中接收）"""
+
+    job_added = pyqtSignal(object)
+    job_changed = pyqtSignal(object)
+    job_progress = pyqtSignal(object, str)
+    job_finished = pyqtSignal(object)
+
+    def __init__(self, max_workers: Optional[int] = None, parent=None,
+                 keep_results: int = KEEP_RESULTS):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers or default_workers())
+        self.keep_results = keep_results
+        self.jobs: List[VectorizeJob] = []
+        # 持有结果的已结束作业（从旧到新）；pinned 是编辑器中显示的作业，不会被释放
+        self._with_results: deque = deque()
+        self.pinned: Optional[VectorizeJob] = None
+        self._runnables: Dict[int, _JobRunnable] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def max_workers(self) -> int:
+        return self.pool.maxThreadCount()
+
+    # ------------------------------------------------------------------
+    # 提交与取消
+    # ------------------------------------------------------------------
+
+    def submit(self, engine: str, input_path, params: Optional[Dict[str, Any]] = None,
+               priority: int = PRIORITY_BULK) -> VectorizeJob:
+        """提交一个作业，返回作业对象"""
+        from src.utils.cost_model import cost_model, image_pixels
+        from src.utils.timing import Timeline
+
+        input_path = Path(input_path)
+        params = dict(params or {})
+        job = VectorizeJob(next(self._ids), engine, input_path, params, priority)
+        job.pixels = image_pixels(input_path)
+        try:
+            job.predicted_s = cost_model.predict(engine, job.pixels, params)
+        except Exception as e:
+            print(f"耗时预测失败: {e}")
+        job.timeline = Timeline(f"{engine}:{input_path.name}")
+        job.timeline.meta.update(engine=engine, input=str(input_path), params=params,
+                                 priority=priority)
+        runnable = _JobRunnable(self, job)
+        with self._lock:
+            if job.interactive:
+                # 交互作业的结果会显示到编辑器
+                self.pinned = job
+            self.jobs.append(job)
+            self._runnables[job.job_id] = runnable
+        self.job_added.emit(job)
+        self.pool.start(runnable, priority)
+        return job
+
+    def pin(self, job: VectorizeJob):
+        """标记编辑器中显示的作业，其结果不会被释放"""
+        with self._lock:
+            self.pinned = job
+
+    def cancel(self, job: VectorizeJob) -> bool:
+        """取消作业：排队中的直接移出队列，运行中的在结束后丢弃结果"""
+        if not job.active:
+            return False
+        job.cancel_requested = True
+        runnable = self._runnables.get(job.job_id)
+        if job.status == QUEUED and runnable is not None and self.pool.tryTake(runnable):
+            self._finish(job, CANCELLED)
+        return True
+
+    def cancel_queued(self) -> int:
+        """取消所有尚未开始的作业，返回取消数量"""
+        count = 0
+        for job in list(self.jobs):
+            if job.status == QUEUED and self.cancel(job):
+                count += 1
+        return count
+
+    def clear_finished(self) -> List[VectorizeJob]:
+        """从列表中移除已结束的作业，返回被移除的作业"""
+        with self._lock:
+            removed = [j for j in self.jobs if not j.active]
+            self.jobs = [j for j in self.jobs if j.active]
+            self._with_results = deque(j for j in self._with_results if j.active)
+        return removed
+
+    def remaining_s(self) -> Optional[float]:
+        """队列全部完成的估计剩余秒数（按工作线程数均摊）；没有可预测的作业时为 None"""
+        estimates = [j.remaining_s for j in self.jobs if j.active]
+        known = [e for e in estimates if e is not None]
+        if not known:
+            return None
+        return sum(known) / min(self.max_workers, len(estimates))
+
+    def counts(self) -> Dict[str, int]:
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0, CANCELLED: 0}
+        for job in self.jobs:
+            counts[job.status] += 1
+        return counts
+
+    def shutdown(self, wait_ms: int = 3000) -> bool:
+        """取消排队的作业并等待运行中的作业结束"""
+        self.cancel_queued()
+        self.pool.clear()
+        return self.pool.waitForDone(wait_ms)
+
+    # ------------------------------------------------------------------
+    # 执行（在线程池中）
+    # ------------------------------------------------------------------
+
+    def _execute(self, job: VectorizeJob):
+        from src.tools.registry import registry
+        from src.utils.cost_model import cost_model
+        from src.utils.progress import Progress
+        from src.utils.scratch import scratch
+
+        if job.cancel_requested:
+            self._finish(job, CANCELLED)
+            return
+        job.status = RUNNING
+        job.started = time.time()
+        self.job_changed.emit(job)
+
+        def progress(message: str):
+            job.message = message
+            self.job_progress.emit(job, message)
+
+        def numeric(fraction: float, message: str):
+            job.fraction = fraction
+            if message:
+                job.message = message
+            self.job_progress.emit(job, job.message)
+
+        timeline = job.timeline
+        try:
+            # 中间文件都放在本作业独立的临时目录里，作业结束后整体删除
+            with timeline.activate(), Progress(numeric).activate(), \
+                    scratch.job("vectorize") as job_dir:
+                started = timeline.clock()
+                result = registry.run(job.engine, job.input_path, job.params,
+                                      job_dir=job_dir, progress=progress)
+                seconds = timeline.clock() - started
+                timeline.meta["worker_total_ms"] = round(seconds * 1000.0, 3)
+            job.result = result
+            status = CANCELLED if job.cancel_requested else DONE
+        except Exception as e:
+            job.error = str(e)
+            status = CANCELLED if job.cancel_requested else FAILED
+        if status == DONE:
+            # 记录耗时失败不影响已经得到的结果
+            try:
+                cost_model.record(job.engine, job.pixels, job.params, seconds)
+            except Exception as e:
+                print(f"耗时记录失败: {e}")
+        timeline.meta["status"] = status
+        timeline.meta["predicted_s"] = job.predicted_s
+        timeline.dump_json()
+        self._finish(job, status)
+
+    def _finish(self, job: VectorizeJob, status: str):
+        job.status = status
+        job.finished = time.time()
+        if status == CANCELLED:
+            job.result = None
+        with self._lock:
+            self._runnables.pop(job.job_id, None)
+            if job.result is not None:
+                self._with_results.append(job)
+                self._drop_old_results()
+        self.job_finished.emit(job)
+
+    def _drop_old_results(self):
+        """释放超出保留数量的旧结果（调用方持有锁）"""
+        excess = len(self._with_results) - self.keep_results
+        for old in list(self._with_results):
+            if excess <= 0:
+                break
+            if old is self.pinned:
+                continue
+            old.result = None
+            old.result_dropped = True
+            self._with_results.remove(old)
+            excess -= 1
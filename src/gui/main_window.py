@@ -1,6 +1,7 @@
 from pathlib import Path
 from typing import Optional
 import os
+import time
 
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QFileDialog, QMessageBox,
@@ -239,191 +240,56 @@ class ScalableImageLabel(QLabel):
 
 # 延迟导入，避免在QApplication创建前导入QWidget子类
 # from src.gui.editor_widget import SvgEditorWidget
-# 工具适配器也延迟导入
-# from src.tools.potrace_adapter import PotracePipeline
-# from src.tools.trace_adapter import TraceAdapter
-# from src.tools.tracegui_adapter import TraceGuiAdapter
-# from src.tools.vtracer_adapter import VTracerAdapter
+# 工具适配器由引擎注册表在首次使用时导入
+# from src.tools.registry import registry
+# 矢量化作业由作业队列在线程池中执行
+# from src.gui.job_queue import JobQueue
 
 
-class VectorizeWorker(QThread):
-    """矢量化工作线程"""
-    finished = pyqtSignal(str)  # 发送生成的SVG内容
-    error = pyqtSignal(str)     # 发送错误信息
-    progress = pyqtSignal(str)  # 发送进度信息
+class AutoTuneWorker(QThread):
+    """自动调参工作线程"""
+    finished = pyqtSignal(object)  # 发送 AutoTuneResult
+    error = pyqtSignal(str)
+    progress = pyqtSignal(str)
 
-    def __init__(self, engine, input_path, params, output_path=None):
+    def __init__(self, engine, input_path, base_params, time_budget_s=60.0, min_fidelity=0.9):
         super().__init__()
+        import threading
         self.engine = engine
         self.input_path = input_path
-        self.params = params
-        self.output_path = output_path or str(Path(input_path).with_suffix('.svg'))
-        self._is_cancelled = False
+        self.base_params = base_params
+        self.time_budget_s = time_budget_s
+        self.min_fidelity = min_fidelity
+        self._cancel_event = threading.Event()
 
     def cancel(self):
-        """取消运行"""
-        self._is_cancelled = True
+        self._cancel_event.set()
 
     def run(self):
-        temp_files = []  # 用于跟踪临时文件
         try:
-            if self._is_cancelled:
-                return
-                
-            self.progress.emit("正在初始化...")
-            
-            if self._is_cancelled:
-                return
-            if self.engine == "mkbitmap+potrace":
-                # 延迟导入避免Qt问题
-                from src.tools.potrace_adapter import PotracePipeline
-                pipeline = PotracePipeline()
-                
-                # 生成唯一的临时文件名
-                temp_pbm = Path(self.input_path).with_suffix(f".temp_{os.getpid()}.pbm")
-                temp_files.append(temp_pbm)
-                
-                self.progress.emit("正在运行mkbitmap...")
-                svg_text = pipeline.run(
-                    self.input_path,
-                    threshold=self.params.get('threshold', 128),
-                    turdsize=self.params.get('turdsize', 2),
-                    alphamax=self.params.get('alphamax', 1.0),
-                    edge_mode=self.params.get('edge_mode', False),
-                    debug=self.params.get('debug', False),
-                    filter_radius=self.params.get('filter_radius', 4),
-                    scale_factor=self.params.get('scale_factor', 2),
-                    blur_radius=self.params.get('blur_radius', 0.0),
-                    turnpolicy=self.params.get('turnpolicy', 'minority'),
-                    opttolerance=self.params.get('opttolerance', 0.2),
-                    unit=self.params.get('unit', 10),
-                    invert=self.params.get('invert', False),
-                    longcurve=self.params.get('longcurve', False),
-                )
-            elif self.engine == "mkbitmap":
-                from src.tools.potrace_adapter import PotracePipeline
-                pipeline = PotracePipeline()
-                
-                temp_pbm = Path(self.input_path).with_suffix(f".temp_{os.getpid()}.pbm")
-                temp_files.append(temp_pbm)
-                
-                self.progress.emit("正在运行mkbitmap...")
-                pbm_path = pipeline.run_mkbitmap_only(
-                    self.input_path,
-                    temp_pbm,
-                    threshold=self.params.get('threshold', 128),
-                    debug=self.params.get('debug', False),
-                    filter_radius=self.params.get('filter_radius', 4),
-                    scale_factor=self.params.get('scale_factor', 2),
-                    blur_radius=self.params.get('blur_radius', 0.0),
-                    invert=self.params.get('invert', False),
-                )
-                svg_text = f"已生成PBM文件: {pbm_path}"
-            elif self.engine == "potrace":
-                from src.tools.potrace_adapter import PotracePipeline
-                pipeline = PotracePipeline()
-                self.progress.emit("正在运行potrace...")
-                svg_text = pipeline.run_potrace_only(
-                    self.input_path,
-                    turdsize=self.params.get('turdsize', 2),
-                    alphamax=self.params.get('alphamax', 1.0),
-                    edge_mode=self.params.get('edge_mode', False),
-                    debug=self.params.get('debug', False),
-                    turnpolicy=self.params.get('turnpolicy', 'minority'),
-                    opttolerance=self.params.get('opttolerance', 0.2),
-                    unit=self.params.get('unit', 10),
-                    longcurve=self.params.get('longcurve', False),
-                )
-            elif self.engine == "Trace(.NET)":
-                from src.tools.trace_adapter import TraceAdapter
-                adapter = TraceAdapter()
-                self.progress.emit("正在运行Trace...")
-                svg_text = adapter.run(self.input_path)
-            elif self.engine == "vtracer":
-                try:
-                    from src.tools.vtracer_adapter import VTracerAdapter
-                    adapter = VTracerAdapter()
-                    self.progress.emit("正在运行vtracer...")
-                    svg_text = adapter.run(
-                        self.input_path,
-                        colormode=self.params.get('colormode', 'color'),
-                        mode=self.params.get('mode', 'spline'),
-                        filter_speckle=self.params.get('filter_speckle', 4),
-                        path_precision=self.params.get('path_precision', 8)
-                    )
-                except Exception as e:
-                    raise RuntimeError(f"vtracer不可用: {e}")
-            elif self.engine == "DiffVG":
-                try:
-                    # 尝试使用Python 3.12优化版本
-                    try:
-                        from src.tools.diffvg_adapter_py312 import DiffVGAdapter
-                        adapter = DiffVGAdapter()
-                        self.progress.emit("正在初始化 DiffVG Python 3.12...")
-                    except ImportError:
-                        # 回退到原版本
-                        from src.tools.diffvg_adapter_real import DiffVGAdapter
-                        adapter = DiffVGAdapter()
-                        self.progress.emit("正在初始化 DiffVG...")
-                    
-                    # 使用统一的参数调用
-                    if hasattr(adapter, 'vectorize'):
-                        # 检查是否是新版本API (返回布尔值)
-                        if hasattr(adapter, 'vectorize_simple'):
-                            result = adapter.vectorize(
-                                self.input_path,
-                                self.output_path,
-                                num_shapes=self.params.get('num_paths', 50),
-                                max_iter=self.params.get('iterations', 200),
-                                use_pytorch=self.params.get('use_pytorch', False)
-                            )
-                            if result:
-                                # 读取生成的SVG文件
-                                with open(self.output_path, 'r', encoding='utf-8') as f:
-                                    svg_text = f.read()
-                            else:
-                                raise RuntimeError("DiffVG矢量化失败")
-                        else:
-                            # 旧版本API - 直接返回SVG内容
-                            svg_text = adapter.vectorize(
-                                self.input_path,
-                                num_paths=self.params.get('num_paths', 50),
-                                iterations=self.params.get('iterations', 200),
-                                learning_rate=self.params.get('learning_rate', 0.01),
-                                mode=self.params.get('mode', 'painterly'),
-                                loss_type=self.params.get('loss_type', 'lpips')
-                            )
-                    else:
-                        raise RuntimeError("DiffVG适配器缺少vectorize方法")
-                except Exception as e:
-                    raise RuntimeError(f"DiffVG不可用: {e}")
-            else:
-                raise ValueError(f"不支持的引擎: {self.engine}")
-
-            self.progress.emit("完成!")
-            self.finished.emit(svg_text)
-
+            from src.processing.autotune import autotune
+            result = autotune(
+                self.engine, self.input_path, base_params=self.base_params,
+                time_budget_s=self.time_budget_s, min_fidelity=self.min_fidelity,
+                progress=self.progress.emit, cancel_event=self._cancel_event,
+            )
+            self.finished.emit(result)
         except Exception as e:
             self.error.emit(str(e))
-        finally:
-            # 清理临时文件
-            for temp_file in temp_files:
-                if temp_file.exists():
-                    try:
-                        temp_file.unlink()
-                        print(f"临时文件已删除: {temp_file}")
-                    except Exception as e:
-                        print(f"删除临时文件失败 {temp_file}: {e}")
 
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("RasterVectorStudio - 位图转矢量与本地SVG编辑")
+        from src.utils import startup
         self._init_state()
-        self._init_tools() 
-        self._load_styles()
-        self._init_ui()
+        with startup.phase("init_tools"):
+            self._init_tools()
+        with startup.phase("load_styles"):
+            self._load_styles()
+        with startup.phase("init_ui"):
+            self._init_ui()
         self._update_all_property_displays()  # 初始化UI显示
 
     def _init_state(self):
@@ -431,7 +297,10 @@ class MainWindow(QMainWindow):
         self.input_path: Optional[Path] = None
         self.output_svg: Optional[Path] = None
         self._pixmap: Optional[QPixmap] = None
-        self.worker: Optional[VectorizeWorker] = None
+        self.jobs = None  # 作业队列，在 _init_tools 中创建
+        self._current_job = None  # 结果需要显示到编辑器的交互作业
+        self._job_items = {}  # 作业ID -> 作业列表中的行
+        self.autotune_worker = None
         self.current_mode = "select"  # 当前工具模式
         self.current_panel_mode = "convert"  # 当前面板模式（convert/draw）
         self.editor = None  # 延迟初始化
@@ -443,55 +312,43 @@ class MainWindow(QMainWindow):
         self.has_selection = False  # 新增：用于跟踪是否有选中项
 
     def _init_tools(self):
-        """初始化工具适配器 - 使用局部导入确保QApplication已存在"""
-        # ✅ 局部导入：在这个方法内部导入，此时 QApplication 肯定已经存在了！
-        # 这样可以避免在模块加载时意外触发Qt组件创建
-        
-        try:
-            from src.tools.potrace_adapter import PotracePipeline
-            self.potrace = PotracePipeline()
-        except Exception as e:
-            print(f"加载 potrace 工具失败: {e}")
-            self.potrace = None
-            
-        try:
-            from src.tools.trace_adapter import TraceAdapter
-            self.trace = TraceAdapter()
-        except Exception as e:
-            print(f"加载 trace 工具失败: {e}")
-            self.trace = None
-            
-        try:
-            from src.tools.tracegui_adapter import TraceGuiAdapter
-            self.tracegui = TraceGuiAdapter()
-        except Exception as e:
-            print(f"加载 tracegui 工具失败: {e}")
-            self.tracegui = None
-            
-        try:
-            from src.tools.vtracer_adapter import VTracerAdapter
-            self.vtracer = VTracerAdapter()
-        except Exception as e:
-            print(f"加载 vtracer 工具失败: {e}")
-            self.vtracer = None
-            
-        try:
-            # 尝试使用Python 3.12优化版本
-            try:
-                from src.tools.diffvg_adapter_py312 import DiffVGAdapter
-                self.diffvg = DiffVGAdapter()
-                print(f"✅ DiffVG Python 3.12 版本加载成功")
-                print(f"📊 DiffVG 状态: {self.diffvg.get_info()}")
-            except ImportError:
-                # 回退到原版本
-                from src.tools.diffvg_adapter_real import DiffVGAdapter
-                self.diffvg = DiffVGAdapter()
-                print(f"⚠️ 使用DiffVG备用版本")
-                print(f"📊 DiffVG 状态: {self.diffvg.get_engine_info()}")
-        except Exception as e:
-            print(f"❌ 加载 DiffVG 工具失败: {e}")
-            self.diffvg = None
-        
+        """初始化引擎注册表
+
+        这里只读取引擎元数据（名称、参数表），不创建适配器；
+        适配器在窗口显示后由后台线程预加载，或在第一次使用时加载。
+        """
+        from src.tools.registry import registry
+        from src.gui.job_queue import JobQueue
+        self.engines = registry
+        self._engines_preloading = False
+
+        self.jobs = JobQueue(parent=self)
+        self.jobs.job_added.connect(self._on_job_added)
+        self.jobs.job_changed.connect(self._on_job_changed)
+        self.jobs.job_progress.connect(self._on_job_progress)
+        self.jobs.job_finished.connect(self._on_job_finished)
+        # 有作业在运行时定期刷新耗时、进度和剩余时间
+        self._job_clock = QTimer(self)
+        self._job_clock.setInterval(500)
+        self._job_clock.timeout.connect(self._tick_jobs)
+
+    def _preload_engines(self):
+        """窗口显示后在后台创建适配器实例，之后所有作业复用"""
+        if self._engines_preloading:
+            return
+        self._engines_preloading = True
+        from src.utils import startup
+        started = time.perf_counter()
+
+        def report(status):
+            startup.add("engine_preload", started, engines=len(status))
+            startup.mark("engines_preloaded")
+            for name, error in status.items():
+                if error:
+                    print(f"加载 {name} 引擎失败: {error}")
+
+        self.engines.preload_async(callback=report)
+
     # 删除之前的延迟获取方法，因为现在在_init_tools中直接初始化
 
     def _load_styles(self):
@@ -627,6 +484,9 @@ class MainWindow(QMainWindow):
             from src.gui.editor_widget import SvgEditorWidget
             self.editor = SvgEditorWidget(main_window=self)
             web_layout.addWidget(self.editor)
+            # 接管启动时预热的页面（没有预热时现在开始加载），不等窗口显示
+            self.editor.init_web_view()
+            self.editor._web_view_initialized = True
         except Exception as e:
             web_layout.addWidget(QLabel(f"编辑器加载失败: {e}"))
             self.editor = None
@@ -779,10 +639,7 @@ class MainWindow(QMainWindow):
         # 引擎选择
         layout.addWidget(QLabel("引擎选择:"))
         self.cmb_engine = QComboBox()
-        self.cmb_engine.addItems([
-            "mkbitmap+potrace", "mkbitmap", "potrace",
-            "Trace(.NET)", "vtracer", "DiffVG"
-        ])
+        self.cmb_engine.addItems(self.engines.names())
         self.cmb_engine.currentTextChanged.connect(self._on_engine_changed)
         layout.addWidget(self.cmb_engine)
 
@@ -812,6 +669,8 @@ class MainWindow(QMainWindow):
         self._create_trace_params()
         self._create_vtracer_params()
         self._create_diffvg_params()
+        self._create_color_potrace_params()
+        self._create_superpixel_params()
 
         layout.addStretch()
 
@@ -820,11 +679,25 @@ class MainWindow(QMainWindow):
         self.progress_bar.setVisible(False)
         layout.addWidget(self.progress_bar)
 
+        # 自动调参按钮
+        self.btn_autotune = QPushButton("🎯 自动调参")
+        self.btn_autotune.setToolTip("在时间预算内并行搜索参数，选择满足质量要求且体积最小的设置")
+        self.btn_autotune.clicked.connect(self._autotune)
+        layout.addWidget(self.btn_autotune)
+
         # 开始按钮
         self.btn_run = QPushButton("⚡ 开始矢量化")
         self.btn_run.setObjectName("PrimaryButton")
         self.btn_run.clicked.connect(self._vectorize)
         layout.addWidget(self.btn_run)
+
+        # 批量加入队列
+        self.btn_enqueue = QPushButton("📥 批量加入队列")
+        self.btn_enqueue.setToolTip("选择多张图像，用当前引擎和参数以低优先级排队处理")
+        self.btn_enqueue.clicked.connect(self._enqueue_batch)
+        layout.addWidget(self.btn_enqueue)
+
+        layout.addWidget(self._create_job_list())
         
         # 添加到堆叠面板
         self.mode_stack.addWidget(convert_widget)
@@ -1399,9 +1272,97 @@ class MainWindow(QMainWindow):
         layout.addStretch()
         self.param_stack.addWidget(widget)
 
+    def _create_color_potrace_params(self):
+        """创建彩色分层 potrace 的参数面板"""
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setSpacing(8)
+
+        info_label = QLabel("先把图像量化为若干种颜色，每种颜色单独用 potrace 追踪，\n"
+                           "各颜色层并行处理，最后叠放成一个分组 SVG。")
+        info_label.setWordWrap(True)
+        layout.addWidget(info_label)
+
+        # 颜色数
+        layout.addWidget(QLabel("颜色数:"))
+        self.sp_color_potrace_colors = QSpinBox()
+        self.sp_color_potrace_colors.setRange(2, 64)
+        self.sp_color_potrace_colors.setValue(8)
+        self.sp_color_potrace_colors.setToolTip("量化后的颜色数量，每种颜色对应一个图层")
+        layout.addWidget(self.sp_color_potrace_colors)
+
+        # 噪点过滤
+        layout.addWidget(QLabel("噪点过滤:"))
+        self.sp_color_potrace_turdsize = QSpinBox()
+        self.sp_color_potrace_turdsize.setRange(0, 1000)
+        self.sp_color_potrace_turdsize.setValue(2)
+        self.sp_color_potrace_turdsize.setToolTip("过滤小于此大小的斑点，减少噪点")
+        layout.addWidget(self.sp_color_potrace_turdsize)
+
+        # 平滑度
+        layout.addWidget(QLabel("平滑度:"))
+        self.sp_color_potrace_alphamax = QDoubleSpinBox()
+        self.sp_color_potrace_alphamax.setRange(0.0, 2.0)
+        self.sp_color_potrace_alphamax.setSingleStep(0.1)
+        self.sp_color_potrace_alphamax.setValue(1.0)
+        self.sp_color_potrace_alphamax.setToolTip("控制曲线平滑度，值越大曲线越平滑")
+        layout.addWidget(self.sp_color_potrace_alphamax)
+
+        self.chk_color_potrace_stacked = QCheckBox("叠放模式")
+        self.chk_color_potrace_stacked.setChecked(True)
+        self.chk_color_potrace_stacked.setToolTip("每层同时覆盖上方各层的区域，避免色块之间出现缝隙")
+        layout.addWidget(self.chk_color_potrace_stacked)
+
+        layout.addStretch()
+        self.param_stack.addWidget(widget)
+
+    def _create_superpixel_params(self):
+        """创建超像素矢量化的参数面板"""
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setSpacing(8)
+
+        info_label = QLabel("用 SLIC 把图像分成超像素，相邻区域共用同一条简化后的边界，\n"
+                           "每个区域填充其平均颜色。无需外部程序。")
+        info_label.setWordWrap(True)
+        layout.addWidget(info_label)
+
+        # 超像素数量
+        layout.addWidget(QLabel("区域数量:"))
+        self.sp_superpixel_segments = QSpinBox()
+        self.sp_superpixel_segments.setRange(10, 20000)
+        self.sp_superpixel_segments.setValue(400)
+        self.sp_superpixel_segments.setToolTip("超像素的近似数量，越多细节越丰富")
+        layout.addWidget(self.sp_superpixel_segments)
+
+        # 紧凑度
+        layout.addWidget(QLabel("紧凑度:"))
+        self.dsb_superpixel_compactness = QDoubleSpinBox()
+        self.dsb_superpixel_compactness.setRange(0.1, 100.0)
+        self.dsb_superpixel_compactness.setValue(10.0)
+        self.dsb_superpixel_compactness.setToolTip("越大区域形状越规则，越小越贴合颜色边界")
+        layout.addWidget(self.dsb_superpixel_compactness)
+
+        # 简化容差
+        layout.addWidget(QLabel("边界简化:"))
+        self.dsb_superpixel_tolerance = QDoubleSpinBox()
+        self.dsb_superpixel_tolerance.setRange(0.0, 10.0)
+        self.dsb_superpixel_tolerance.setSingleStep(0.5)
+        self.dsb_superpixel_tolerance.setValue(1.0)
+        self.dsb_superpixel_tolerance.setToolTip("边界简化的容差（像素），0 为保留像素阶梯")
+        layout.addWidget(self.dsb_superpixel_tolerance)
+
+        self.chk_superpixel_fast = QCheckBox("快速分割")
+        self.chk_superpixel_fast.setChecked(True)
+        self.chk_superpixel_fast.setToolTip("在缩小的图像上分割后放大标签，大图速度快一个数量级")
+        layout.addWidget(self.chk_superpixel_fast)
+
+        layout.addStretch()
+        self.param_stack.addWidget(widget)
+
     def _on_engine_changed(self, engine_name):
         """引擎切换时更新参数面板"""
-        if engine_name in ["mkbitmap+potrace", "mkbitmap", "potrace"]:
+        if engine_name in ["mkbitmap+potrace", "mkbitmap", "potrace", "内置追踪"]:
             self.param_stack.setCurrentIndex(0)  # Potrace 参数
         elif engine_name == "Trace(.NET)":
             self.param_stack.setCurrentIndex(1)  # Trace 参数
@@ -1409,6 +1370,10 @@ class MainWindow(QMainWindow):
             self.param_stack.setCurrentIndex(2)  # VTracer 参数
         elif engine_name == "DiffVG":
             self.param_stack.setCurrentIndex(3)  # DiffVG 参数
+        elif engine_name == "彩色potrace":
+            self.param_stack.setCurrentIndex(4)  # 彩色分层参数
+        elif engine_name == "超像素":
+            self.param_stack.setCurrentIndex(5)  # 超像素参数
 
     def _set_mode(self, mode_name):
         """切换工具模式，并通知前端JS"""
@@ -1525,15 +1490,19 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "提示", "请先选择位图文件")
             return
 
-        if self.worker and self.worker.isRunning():
-            QMessageBox.warning(self, "提示", "正在处理中，请稍候...")
-            return
-
         engine = self.cmb_engine.currentText()
+        params = self._collect_params(engine)
+
+        # 交互作业优先于已排队的批量作业；结果显示到编辑器
+        from src.gui.job_queue import PRIORITY_INTERACTIVE
+        self._current_job = self.jobs.submit(engine, self.input_path, params,
+                                             priority=PRIORITY_INTERACTIVE)
+        self.lbl_status.setText("正在处理...")
 
-        # 收集参数
+    def _collect_params(self, engine):
+        """从界面控件收集指定引擎的参数"""
         params = {}
-        if engine in ["mkbitmap+potrace", "mkbitmap", "potrace"]:
+        if engine in ["mkbitmap+potrace", "mkbitmap", "potrace", "内置追踪"]:
             params = {
                 'threshold': self.sp_threshold.value(),
                 'turdsize': self.sp_turdsize.value(),
@@ -1551,6 +1520,20 @@ class MainWindow(QMainWindow):
                 'invert': self.chk_invert.isChecked(),
                 'longcurve': self.chk_longcurve.isChecked(),
             }
+        elif engine == "彩色potrace":
+            params = {
+                'n_colors': self.sp_color_potrace_colors.value(),
+                'turdsize': self.sp_color_potrace_turdsize.value(),
+                'alphamax': self.sp_color_potrace_alphamax.value(),
+                'stacked': self.chk_color_potrace_stacked.isChecked(),
+            }
+        elif engine == "超像素":
+            params = {
+                'n_segments': self.sp_superpixel_segments.value(),
+                'compactness': self.dsb_superpixel_compactness.value(),
+                'tolerance': self.dsb_superpixel_tolerance.value(),
+                'fast': self.chk_superpixel_fast.isChecked(),
+            }
         elif engine == "vtracer":
             params = {
                 'colormode': self.cmb_vtracer_colormode.currentText(),
@@ -1570,41 +1553,226 @@ class MainWindow(QMainWindow):
                 'mode': self.cmb_diffvg_mode.currentText(),
                 'loss_type': self.cmb_diffvg_loss.currentText(),
             }
+        return params
 
-        # 启动处理
-        self._start_vectorize_worker(engine, params)
+    def _autotune(self):
+        """在时间预算内自动搜索当前引擎的参数"""
+        if not self.input_path:
+            QMessageBox.warning(self, "提示", "请先选择位图文件")
+            return
+        if self.autotune_worker and self.autotune_worker.isRunning():
+            self.autotune_worker.cancel()
+            self.lbl_status.setText("正在停止自动调参...")
+            return
 
-    def _start_vectorize_worker(self, engine, params):
-        """启动矢量化工作线程"""
-        # 清理之前的线程
-        if self.worker:
-            self._cleanup_worker()
-            
-        # 显示进度
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setRange(0, 0)  # 不确定进度
-        self.btn_run.setEnabled(False)
-        self.lbl_status.setText("正在处理...")
+        engine = self.cmb_engine.currentText()
+        from src.processing.autotune import SEARCH_SPACES
+        if engine not in SEARCH_SPACES:
+            QMessageBox.information(self, "提示", f"自动调参仅支持: {', '.join(SEARCH_SPACES)}")
+            return
 
-        # 创建并启动工作线程
-        # 生成输出路径
-        if hasattr(self, 'output_path') and self.output_path:
-            output_path = self.output_path
-        else:
-            if self.input_path:
-                output_path = str(Path(self.input_path).with_suffix('.svg'))
-            else:
-                output_path = 'output.svg'
-        
-        self.worker = VectorizeWorker(engine, self.input_path, params, output_path)
-        self.worker.finished.connect(self._on_vectorize_finished)
-        self.worker.error.connect(self._on_vectorize_error)
-        self.worker.progress.connect(self._on_vectorize_progress)
-        self.worker.start()
+        self.autotune_worker = AutoTuneWorker(engine, self.input_path, self._collect_params(engine))
+        self.autotune_worker.finished.connect(self._on_autotune_finished)
+        self.autotune_worker.error.connect(self._on_autotune_error)
+        self.autotune_worker.progress.connect(self._on_vectorize_progress)
+        self.btn_autotune.setText("⏹ 停止调参")
+        self.autotune_worker.start()
+
+    def _on_autotune_finished(self, result):
+        """把搜索到的参数写回界面控件"""
+        self.btn_autotune.setText("🎯 自动调参")
+        self.autotune_worker = None
+        if not result.best:
+            QMessageBox.warning(self, "自动调参", result.summary())
+            return
 
-    def _on_vectorize_finished(self, result):
+        widgets = {
+            'threshold': self.sp_threshold,
+            'turdsize': self.sp_turdsize,
+            'alphamax': self.sp_alphamax,
+            'opttolerance': self.sp_opttolerance,
+            'filter_speckle': self.sp_vtracer_filter_speckle,
+            'path_precision': self.sp_vtracer_path_precision,
+        }
+        for name, value in result.best.params.items():
+            if name in widgets:
+                widgets[name].setValue(value)
+        self.lbl_status.setText(result.summary())
+        print(f"自动调参结果: {result.best.params}")
+
+    def _on_autotune_error(self, error_msg):
+        self.btn_autotune.setText("🎯 自动调参")
+        self.autotune_worker = None
+        QMessageBox.critical(self, "自动调参失败", error_msg)
+        self.lbl_status.setText("自动调参失败")
+
+    def _enqueue_batch(self):
+        """选择多张图像，用当前引擎和参数加入队列"""
+        files, _ = QFileDialog.getOpenFileNames(
+            self, "选择要批量处理的位图", str(self.input_path.parent) if self.input_path else "",
+            "Images (*.png *.jpg *.jpeg *.bmp *.tif *.tiff *.gif)")
+        if not files:
+            return
+        engine = self.cmb_engine.currentText()
+        params = self._collect_params(engine)
+        for f in files:
+            self.jobs.submit(engine, f, params)
+        self.lbl_status.setText(f"已加入队列: {len(files)} 个作业")
+
+    def _create_job_list(self):
+        """作业列表：每个作业一行，显示状态和耗时"""
+        from PyQt5.QtWidgets import QTreeWidget
+
+        group = QGroupBox("作业队列")
+        layout = QVBoxLayout(group)
+        layout.setContentsMargins(5, 5, 5, 5)
+
+        self.job_list = QTreeWidget()
+        self.job_list.setHeaderLabels(["图像", "引擎", "状态", "耗时"])
+        self.job_list.setRootIsDecorated(False)
+        self.job_list.setMinimumHeight(120)
+        self.job_list.setToolTip("双击已完成的作业，把结果加载到编辑器")
+        self.job_list.itemDoubleClicked.connect(self._on_job_double_clicked)
+        layout.addWidget(self.job_list)
+
+        buttons = QHBoxLayout()
+        btn_cancel = QPushButton("取消所选")
+        btn_cancel.clicked.connect(self._cancel_selected_jobs)
+        buttons.addWidget(btn_cancel)
+        btn_clear = QPushButton("清除已结束")
+        btn_clear.clicked.connect(self._clear_finished_jobs)
+        buttons.addWidget(btn_clear)
+        layout.addLayout(buttons)
+        return group
+
+    def _job_for_item(self, item):
+        job_id = item.data(0, Qt.UserRole)
+        return next((j for j in self.jobs.jobs if j.job_id == job_id), None)
+
+    def _update_job_item(self, job):
+        from src.gui.job_queue import RUNNING
+        item = self._job_items.get(job.job_id)
+        if item is None:
+            return
+        from src.utils.cost_model import format_eta
+        status = job.status
+        if job.status == RUNNING:
+            fraction = job.progress
+            if fraction is not None:
+                status = f"{job.status} {fraction:.0%}"
+            if job.message:
+                status = f"{status}: {job.message}"
+        elif job.error:
+            status = f"{job.status}: {job.error}"
+        item.setText(2, status)
+        item.setToolTip(2, status)
+        elapsed = job.elapsed_s
+        text = f"{elapsed:.1f}s" if elapsed is not None else ""
+        if job.predicted_s is not None:
+            text = f"{text} / ~{format_eta(job.predicted_s)}" if text else f"~{format_eta(job.predicted_s)}"
+        if job.overrun:
+            text = f"⚠ {text}"
+            item.setToolTip(3, "运行时间已超过预计的 3 倍")
+        item.setText(3, text)
+
+    def _on_job_added(self, job):
+        from PyQt5.QtWidgets import QTreeWidgetItem
+        prefix = "⚡ " if job.interactive else ""
+        item = QTreeWidgetItem([prefix + job.input_path.name, job.engine, job.status, ""])
+        item.setData(0, Qt.UserRole, job.job_id)
+        item.setToolTip(0, str(job.input_path))
+        self.job_list.addTopLevelItem(item)
+        self._job_items[job.job_id] = item
+        self._update_queue_status()
+
+    def _on_job_changed(self, job):
+        self._update_job_item(job)
+        self._update_queue_status()
+
+    def _on_job_progress(self, job, message):
+        self._update_job_item(job)
+        if job is self._current_job:
+            self._on_vectorize_progress(message)
+            self._update_queue_status()
+
+    def _on_job_finished(self, job):
+        from src.gui.job_queue import DONE, FAILED
+        self._update_job_item(job)
+        if job is not self._current_job:
+            self._update_queue_status()
+            return
+        self._current_job = None
+        self._update_queue_status()
+        if job.status == DONE:
+            self._on_vectorize_finished(job.result, job.timeline)
+        elif job.status == FAILED:
+            self._on_vectorize_error(job.error)
+
+    def _on_job_double_clicked(self, item, column):
+        job = self._job_for_item(item)
+        if job and job.result is not None:
+            self.jobs.pin(job)
+            self._on_vectorize_finished(job.result, job.timeline)
+        elif job and job.result_dropped:
+            self.lbl_status.setText(f"{job.input_path.name} 的结果已释放，请重新矢量化")
+
+    def _cancel_selected_jobs(self):
+        for item in self.job_list.selectedItems():
+            job = self._job_for_item(item)
+            if job:
+                self.jobs.cancel(job)
+
+    def _clear_finished_jobs(self):
+        for job in self.jobs.clear_finished():
+            item = self._job_items.pop(job.job_id, None)
+            if item is not None:
+                self.job_list.takeTopLevelItem(self.job_list.indexOfTopLevelItem(item))
+
+    def _tick_jobs(self):
+        from src.gui.job_queue import RUNNING
+        for job in self.jobs.jobs:
+            if job.status == RUNNING:
+                self._update_job_item(job)
+        self._update_queue_status()
+
+    def _update_queue_status(self):
+        """根据队列状态显示/隐藏进度条
+
+        当前交互作业有进度（引擎报告或按耗时模型推算）时显示百分比和剩余时间，
+        否则显示不确定进度。
+        """
+        from src.gui.job_queue import QUEUED, RUNNING
+        from src.utils.cost_model import format_eta
+        counts = self.jobs.counts()
+        running, queued = counts[RUNNING], counts[QUEUED]
+        busy = running + queued > 0
+        self.progress_bar.setVisible(busy)
+        if not busy:
+            self._job_clock.stop()
+            return
+        if not self._job_clock.isActive():
+            self._job_clock.start()
+
+        job = self._current_job
+        fraction = job.progress if job is not None else None
+        if fraction is None:
+            self.progress_bar.setRange(0, 0)  # 不确定进度
+            self.progress_bar.setFormat("")
+        else:
+            self.progress_bar.setRange(0, 1000)
+            self.progress_bar.setValue(int(fraction * 1000))
+            remaining = job.remaining_s
+            eta = f"  剩余约 {format_eta(remaining)}" if remaining is not None else ""
+            self.progress_bar.setFormat(f"{fraction:.0%}{eta}")
+
+        tooltip = f"运行中 {running} / 排队 {queued} （并行 {self.jobs.max_workers}）"
+        queue_eta = self.jobs.remaining_s()
+        if queue_eta is not None:
+            tooltip += f"\n全部完成约需 {format_eta(queue_eta)}"
+        self.progress_bar.setToolTip(tooltip)
+
+    def _on_vectorize_finished(self, result, timeline=None):
         """矢量化完成处理"""
-        self._cleanup_worker()
 
         if result.startswith("已生成PBM文件:"):
             QMessageBox.information(self, "完成", result)
@@ -1618,47 +1786,41 @@ class MainWindow(QMainWindow):
                 # 确保编辑器已经初始化
                 self._ensure_editor_initialized()
                 
-                # 添加延迟以确保Web视图完全加载
-                def load_svg_delayed():
-                    try:
-                        if self.editor:
-                            print("正在加载SVG到编辑器...")
-                            print(f"SVG内容预览: {result[:200]}...")
-                            self.editor.load_svg(result)
-                            print("SVG加载到编辑器完成")
-                            
-                            # 额外的延迟确保Paper.js处理完成
-                            def verify_load():
-                                script = "paper.project.activeLayer.children.length"
-                                def check_result(count):
-                                    print(f"编辑器中的对象数量: {count}")
-                                    if count and int(count) > 0:
-                                        print("✓ SVG已成功加载到Paper.js画布")
-                                    else:
-                                        print("✗ SVG可能未正确加载到画布")
-                                
-                                if hasattr(self.editor, 'view') and self.editor.view:
-                                    self.editor.view.page().runJavaScript(script, check_result)
-                            
-                            QTimer.singleShot(1000, verify_load)
+                def verify_load(_):
+                    """window.loadSvg 执行完毕后检查画布中的对象数量"""
+                    self._on_job_timing_complete(timeline)
+                    script = "paper.project.activeLayer.children.length"
+                    def check_result(count):
+                        print(f"编辑器中的对象数量: {count}")
+                        if count and int(count) > 0:
+                            print("✓ SVG已成功加载到Paper.js画布")
                         else:
-                            print("警告：编辑器为None")
-                    except Exception as e:
-                        print(f"延迟加载SVG失败: {e}")
+                            print("✗ SVG可能未正确加载到画布")
+                    
+                    if self.editor and self.editor.view:
+                        self.editor.view.page().runJavaScript(script, check_result)
                 
                 # 立即加载到文本编辑器
-                self.text_editor.setPlainText(result)
+                if timeline:
+                    with timeline.span("text_editor_fill"):
+                        self.text_editor.setPlainText(result)
+                else:
+                    self.text_editor.setPlainText(result)
                 print("SVG已加载到文本编辑器")
                 
-                # 延迟200ms加载到Web编辑器，确保其完全初始化
-                QTimer.singleShot(200, load_svg_delayed)
+                # 编辑器就绪后立即加载（已就绪时马上加载，不做固定延迟）
+                if self.editor:
+                    print("正在加载SVG到编辑器...")
+                    self.editor.load_svg(result, timeline=timeline, callback=verify_load)
+                else:
+                    print("警告：编辑器为None")
                 
                 # 切换到Web编辑器标签页以显示结果
                 if hasattr(self, 'editor_tabs'):
                     self.editor_tabs.setCurrentIndex(0)  # Web编辑器是第一个标签
                     print("已切换到Web编辑器标签页")
                 
-                self.lbl_status.setText("矢量化完成！")
+                self._show_timing_summary("矢量化完成！", timeline)
                 print("矢量化处理完成")
                 
             except Exception as e:
@@ -1669,6 +1831,20 @@ class MainWindow(QMainWindow):
                 if hasattr(self, 'editor_tabs'):
                     self.editor_tabs.setCurrentIndex(1)  # 切换到文本编辑器
 
+    def _show_timing_summary(self, prefix, timeline):
+        """在状态栏显示各阶段耗时摘要"""
+        summary = timeline.summary() if timeline else ""
+        self.lbl_status.setText(f"{prefix}  ⏱ {summary}" if summary else prefix)
+
+    def _on_job_timing_complete(self, timeline):
+        """编辑器加载完成后，刷新状态栏摘要并写出完整的计时JSON"""
+        if not timeline:
+            return
+        self._show_timing_summary("矢量化完成！", timeline)
+        path = timeline.dump_json()
+        if path:
+            print(f"计时数据已保存: {path}")
+
     def _ensure_editor_initialized(self):
         """确保编辑器已正确初始化"""
         if hasattr(self, 'editor') and self.editor:
@@ -1693,7 +1869,6 @@ class MainWindow(QMainWindow):
 
     def _on_vectorize_error(self, error_msg):
         """矢量化错误处理"""
-        self._cleanup_worker()
         QMessageBox.critical(self, "矢量化失败", f"处理失败:\n{error_msg}")
         self.lbl_status.setText("处理失败")
 
@@ -1701,37 +1876,6 @@ class MainWindow(QMainWindow):
         """更新进度信息"""
         self.lbl_status.setText(message)
 
-    def _cleanup_worker(self):
-        """清理工作线程"""
-        if self.worker:
-            # 取消线程运行
-            if hasattr(self.worker, 'cancel'):
-                self.worker.cancel()
-            
-            # 断开所有信号连接
-            try:
-                self.worker.finished.disconnect()
-                self.worker.error.disconnect()
-                self.worker.progress.disconnect()
-            except:
-                pass  # 忽略断开连接时的错误
-            
-            # 如果线程还在运行，等待其结束
-            if self.worker.isRunning():
-                self.worker.wait(1000)  # 等待1秒
-                
-                # 如果还没结束，强制终止
-                if self.worker.isRunning():
-                    self.worker.terminate()
-                    self.worker.wait(1000)  # 再等待1秒
-            
-            # 删除线程对象
-            self.worker.deleteLater()
-            self.worker = None
-            
-        self.progress_bar.setVisible(False)
-        self.btn_run.setEnabled(True)
-
     def _save_svg(self):
         """保存SVG文件"""
         svg_content = None
@@ -1817,34 +1961,25 @@ class MainWindow(QMainWindow):
             except Exception as e:
                 print(f"清理Web编辑器时出错: {e}")
         
-        # 清理工作线程
-        if self.worker:
-            try:
-                if self.worker.isRunning():
-                    self.worker.terminate()
-                    if not self.worker.wait(3000):  # 等待3秒
-                        print("工作线程无法正常终止")
-                
-                # 断开信号连接
-                try:
-                    self.worker.finished.disconnect()
-                    self.worker.error.disconnect()
-                    self.worker.progress.disconnect()
-                except:
-                    pass
-                
-                # 删除线程对象
-                self.worker.deleteLater()
-                self.worker = None
-                print("工作线程已清理。")
-            except Exception as e:
-                print(f"清理工作线程时出错: {e}")
+        # 停止自动调参
+        if self.autotune_worker and self.autotune_worker.isRunning():
+            self.autotune_worker.cancel()
+            self.autotune_worker.wait(3000)
+
+        # 停止作业队列：取消排队的作业，等待运行中的作业结束
+        if self.jobs:
+            if not self.jobs.shutdown(3000):
+                print("仍有作业在运行，退出时不再等待")
+            else:
+                print("作业队列已清理。")
         
         print("清理操作完成。")
 
     def showEvent(self, event):
         """重写显示事件 - 在窗口首次显示时初始化Web视图"""
         super().showEvent(event)
+        # 先让窗口显示出来，再在后台加载引擎
+        QTimer.singleShot(0, self._preload_engines)
         # 简单延迟初始化Web视图
         if hasattr(self, 'editor') and self.editor and hasattr(self.editor, 'init_web_view'):
             if not hasattr(self.editor, '_web_view_initialized'):
@@ -0,0 +1,299 @@
+"""
+自动调参
+========
+
+在给定的时间 / 体积预算内，为 potrace 与 vtracer 搜索参数：
+
+1. 粗网格：在各参数的候选值上做笛卡尔积（过大时确定性抽样）
+2. 局部细化：围绕当前最优的若干候选，在相邻取值之间继续搜索
+
+每个候选并行运行引擎并用 metrics 模块打分，得到
+(保真度, SVG 字节数, 运行耗时) 三个目标，最终在 Pareto 前沿上选出：
+满足质量要求的最便宜的参数；若没有候选达标，则取保真度最高的参数。
+
+用法::
+
+    from src.processing.autotune import autotune
+    result = autotune("mkbitmap+potrace", "input.png", time_budget_s=30, min_fidelity=0.9)
+    print(result.best.params)
+"""
+
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.processing.metrics import load_reference, score_svg
+
+
+@dataclass(frozen=True)
+class ParamSpec:
+    """一个可调参数：取值范围、粗网格候选值和类型"""
+    name: str
+    low: float
+    high: float
+    grid: Tuple[float, ...]
+    integer: bool = False
+
+    def clamp(self, value: float):
+        value = min(max(value, self.low), self.high)
+        return int(round(value)) if self.integer else round(float(value), 4)
+
+
+# 各引擎的搜索空间，范围与界面上的控件保持一致
+SEARCH_SPACES: Dict[str, Tuple[ParamSpec, ...]] = {
+    "mkbitmap+potrace": (
+        ParamSpec("threshold", 0, 255, (96, 128, 160), integer=True),
+        ParamSpec("turdsize", 0, 1000, (0, 2, 8), integer=True),
+        ParamSpec("alphamax", 0.0, 2.0, (0.6, 1.0, 1.3)),
+        ParamSpec("opttolerance", 0.0, 1.0, (0.2, 0.5)),
+    ),
+    "vtracer": (
+        ParamSpec("filter_speckle", 0, 100, (2, 4, 8, 16), integer=True),
+        ParamSpec("path_precision", 1, 20, (2, 4, 8), integer=True),
+    ),
+}
+
+
+@dataclass
+class Candidate:
+    """一次候选评估的结果"""
+    params: Dict[str, Any]
+    fidelity: float = 0.0
+    svg_bytes: int = 0
+    runtime_s: float = 0.0
+    metrics: Dict[str, float] = field(default_factory=dict)
+    error: str = ""
+    stage: str = "grid"
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+    def dominates(self, other: "Candidate") -> bool:
+        """保真度不低、体积不大、耗时不长，且至少一项严格更好"""
+        no_worse = (self.fidelity >= other.fidelity and self.svg_bytes <= other.svg_bytes
+                    and self.runtime_s <= other.runtime_s)
+        better = (self.fidelity > other.fidelity or self.svg_bytes < other.svg_bytes
+                  or self.runtime_s < other.runtime_s)
+        return no_worse and better
+
+
+@dataclass
+class AutoTuneResult:
+    engine: str
+    best: Optional[Candidate]
+    pareto: List[Candidate]
+    candidates: List[Candidate]
+    elapsed_s: float
+    met_quality: bool
+
+    def summary(self) -> str:
+        if not self.best:
+            return "自动调参失败：没有成功的候选"
+        b = self.best
+        status = "达标" if self.met_quality else "未达标，取保真度最高"
+        return (f"{len(self.candidates)} 个候选 / {self.elapsed_s:.1f}s，{status}: "
+                f"保真度 {b.fidelity:.3f}，{b.svg_bytes / 1024:.1f} KB，{b.runtime_s:.2f}s")
+
+
+def default_fidelity(metrics: Dict[str, float]) -> float:
+    """保真度：SSIM 与边缘 F1 的平均，二者都在 [0, 1]"""
+    return 0.5 * metrics["ssim"] + 0.5 * metrics["edge_f1"]
+
+
+def _engine_runner(engine: str) -> Callable[[Path, Dict[str, Any]], str]:
+    if engine not in SEARCH_SPACES:
+        raise ValueError(f"不支持自动调参的引擎: {engine}")
+    from src.tools.registry import registry
+    registry.adapter(engine)  # 不可用时立即报错，而不是每个候选都失败
+    return lambda path, params: registry.run(engine, path, params)
+
+
+# ----------------------------------------------------------------------
+# 候选生成
+# ----------------------------------------------------------------------
+
+def _grid(space: Sequence[ParamSpec], max_candidates: int, seed: int) -> List[Dict[str, Any]]:
+    combos = [dict(zip([s.name for s in space], values))
+              for values in itertools.product(*[s.grid for s in space])]
+    if len(combos) > max_candidates:
+        combos = random.Random(seed).sample(combos, max_candidates)
+    return combos
+
+
+def _neighbours(params: Dict[str, Any], space: Sequence[ParamSpec], level: int) -> List[Dict[str, Any]]:
+    """在每个参数上向两侧各走半个网格步长（逐级减半）"""
+    out = []
+    for spec in space:
+        grid = sorted(spec.grid)
+        base_step = (grid[-1] - grid[0]) / max(len(grid) - 1, 1) if len(grid) > 1 else (spec.high - spec.low) / 4
+        step = base_step / (2 ** level)
+        if spec.integer:
+            step = max(1, int(round(step)))
+        for direction in (-1, 1):
+            value = spec.clamp(params[spec.name] + direction * step)
+            if value != params[spec.name]:
+                out.append({**params, spec.name: value})
+    return out
+
+
+def _key(params: Dict[str, Any]) -> Tuple:
+    return tuple(sorted(params.items()))
+
+
+# ----------------------------------------------------------------------
+# 选择
+# ----------------------------------------------------------------------
+
+def pareto_front(candidates: Sequence[Candidate]) -> List[Candidate]:
+    ok = [c for c in candidates if c.ok]
+    return [c for c in ok if not any(o.dominates(c) for o in ok if o is not c)]
+
+
+def select_best(front: Sequence[Candidate], min_fidelity: float) -> Tuple[Optional[Candidate], bool]:
+    """达标者中取最小体积（再比耗时）；无人达标时取保真度最高者"""
+    if not front:
+        return None, False
+    passing = [c for c in front if c.fidelity >= min_fidelity]
+    if passing:
+        return min(passing, key=lambda c: (c.svg_bytes, c.runtime_s)), True
+    return max(front, key=lambda c: (c.fidelity, -c.svg_bytes)), False
+
+
+# ----------------------------------------------------------------------
+# 主流程
+# ----------------------------------------------------------------------
+
+def autotune(engine: str, input_path, base_params: Optional[Dict[str, Any]] = None,
+             time_budget_s: float = 60.0, max_bytes: Optional[int] = None,
+             min_fidelity: float = 0.9, max_grid: int = 48, refine_rounds: int = 2,
+             refine_top: int = 3, workers: Optional[int] = None,
+             fidelity_fn: Callable[[Dict[str, float]], float] = default_fidelity,
+             progress: Optional[Callable[[str], None]] = None,
+             cancel_event: Optional[threading.Event] = None, seed: int = 0) -> AutoTuneResult:
+    """在预算内搜索最佳参数
+
+    Args:
+        engine: "mkbitmap+potrace" 或 "vtracer"
+        input_path: 输入图像
+        base_params: 不参与搜索的固定参数（如 turnpolicy、colormode）
+        time_budget_s: 总时间预算；超时后不再提交新候选，已在运行的会等待完成
+        max_bytes: SVG 体积上限，超过的候选视为不可行
+        min_fidelity: 质量要求（见 default_fidelity）
+        max_grid: 粗网格最多评估的组合数
+        refine_rounds: 局部细化轮数
+        refine_top: 每轮围绕多少个最优候选细化
+        workers: 并行度，默认等于 CPU 核数
+        progress: 进度回调，接收一行文字
+        cancel_event: 置位后尽快停止
+    """
+    if engine not in SEARCH_SPACES:
+        raise ValueError(f"不支持自动调参的引擎: {engine}")
+    input_path = Path(input_path)
+    space = SEARCH_SPACES[engine]
+    base_params = {k: v for k, v in (base_params or {}).items()
+                   if k not in {s.name for s in space}}
+    run = _engine_runner(engine)
+    reference = load_reference(input_path)
+    workers = workers or os.cpu_count() or 2
+    started = time.perf_counter()
+    deadline = started + time_budget_s
+    seen: Dict[Tuple, Candidate] = {}
+
+    def report(msg: str):
+        if progress:
+            progress(msg)
+
+    def evaluate(params: Dict[str, Any], stage: str) -> Candidate:
+        cand = Candidate(params=params, stage=stage)
+        try:
+            t0 = time.perf_counter()
+            svg = run(input_path, {**base_params, **params})
+            cand.runtime_s = time.perf_counter() - t0
+            cand.svg_bytes = len(svg.encode("utf-8"))
+            if max_bytes is not None and cand.svg_bytes > max_bytes:
+                cand.error = f"超出体积上限 ({cand.svg_bytes} > {max_bytes})"
+                return cand
+            cand.metrics = score_svg(svg, reference).to_dict()
+            cand.fidelity = float(fidelity_fn(cand.metrics))
+        except Exception as e:
+            cand.error = str(e)
+        return cand
+
+    def run_batch(batch: List[Dict[str, Any]], stage: str, pool: ThreadPoolExecutor):
+        pending = set()
+        queue = [p for p in batch if _key(p) not in seen]
+        for p in queue:
+            seen[_key(p)] = None  # 占位，避免重复提交
+        while queue or pending:
+            cancelled = cancel_event is not None and cancel_event.is_set()
+            while queue and len(pending) < workers and time.perf_counter() < deadline and not cancelled:
+                params = queue.pop(0)
+                pending.add(pool.submit(evaluate, params, stage))
+            if not pending:
+                break
+            done, pending = wait(pending, timeout=max(0.05, deadline - time.perf_counter()),
+                                 return_when=FIRST_COMPLETED)
+            for fut in done:
+                cand = fut.result()
+                seen[_key(cand.params)] = cand
+                status = f"保真度 {cand.fidelity:.3f}" if cand.ok else f"失败: {cand.error[:40]}"
+                report(f"[{stage}] {len([c for c in seen.values() if c])} 个候选，{status}")
+        for p in queue:
+            seen.pop(_key(p), None)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        report(f"粗网格搜索 ({engine})...")
+        run_batch(_grid(space, max_grid, seed), "grid", pool)
+
+        for level in range(1, refine_rounds + 1):
+            if time.perf_counter() >= deadline or (cancel_event is not None and cancel_event.is_set()):
+                break
+            done = [c for c in seen.values() if c and c.ok]
+            if not done:
+                break
+            passing = [c for c in done if c.fidelity >= min_fidelity]
+            # 有达标者时朝更小体积方向细化，否则朝更高保真度方向
+            if passing:
+                anchors = sorted(passing, key=lambda c: (c.svg_bytes, c.runtime_s))[:refine_top]
+            else:
+                anchors = sorted(done, key=lambda c: -c.fidelity)[:refine_top]
+            batch = [n for a in anchors for n in _neighbours(a.params, space, level)]
+            report(f"第 {level} 轮细化，{len(batch)} 个邻域候选...")
+            run_batch(batch, f"refine{level}", pool)
+
+    candidates = [c for c in seen.values() if c]
+    front = pareto_front(candidates)
+    best, met = select_best(front, min_fidelity)
+    result = AutoTuneResult(engine, best, front, candidates, time.perf_counter() - started, met)
+    report(result.summary())
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="potrace / vtracer 自动调参")
+    parser.add_argument("input", type=Path)
+    parser.add_argument("--engine", default="mkbitmap+potrace", choices=sorted(SEARCH_SPACES))
+    parser.add_argument("--time-budget", type=float, default=60.0)
+    parser.add_argument("--max-bytes", type=int, default=None)
+    parser.add_argument("--min-fidelity", type=float, default=0.9)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    res = autotune(args.engine, args.input, time_budget_s=args.time_budget, max_bytes=args.max_bytes,
+                   min_fidelity=args.min_fidelity, workers=args.workers, progress=print)
+    print(json.dumps({
+        "best": res.best.params if res.best else None,
+        "met_quality": res.met_quality,
+        "pareto": [{"params": c.params, "fidelity": c.fidelity, "svg_bytes": c.svg_bytes,
+                    "runtime_s": round(c.runtime_s, 3)} for c in res.pareto],
+    }, ensure_ascii=False, indent=2))
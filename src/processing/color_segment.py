@@ -3,7 +3,7 @@ from pathlib import Path
 from typing import Tuple
 
 import numpy as np
-from PIL import Image
+from PIL import Image, ImageFilter
 from skimage import color, segmentation, filters
 
 
@@ -11,6 +11,9 @@ from skimage import color, segmentation, filters
 class SegmentParams:
     n_segments: int = 400
     compactness: float = 10.0
+    # 快速模式：在缩小的图像上分割，再把标签放大回原尺寸并修正边界
+    fast: bool = False
+    max_side: int = 512  # 快速模式下分割用图像的最长边
 
 
 def segment_and_sample_colors(img_path: Path, params: SegmentParams) -> Tuple[np.ndarray, np.ndarray]:
@@ -18,6 +21,8 @@ def segment_and_sample_colors(img_path: Path, params: SegmentParams) -> Tuple[np
     返回 (labels, mean_colors[labels])，作为后续填充/描边的参考。
     """
     im = Image.open(img_path).convert("RGB")
+    if params.fast:
+        return _segment_fast(im, params)
     arr = np.asarray(im)
     lab = color.rgb2lab(arr)
     labels = segmentation.slic(lab, n_segments=params.n_segments, compactness=params.compactness, start_label=0)
@@ -28,3 +33,68 @@ def segment_and_sample_colors(img_path: Path, params: SegmentParams) -> Tuple[np
         sums = np.bincount(labels.ravel(), weights=arr[..., c].ravel())
         mean_colors[:, c] = sums / np.maximum(counts, 1)
     return labels, mean_colors
+
+
+def _segment_fast(im: Image.Image, params: SegmentParams) -> Tuple[np.ndarray, np.ndarray]:
+    """快速模式：缩小 → float32 Lab → SLIC → 放大标签 → 边界修正 → 均值颜色"""
+    arr = np.asarray(im)
+    h, w = arr.shape[:2]
+    scale = min(1.0, params.max_side / float(max(h, w)))
+    if scale < 1.0:
+        small = np.asarray(im.resize((max(1, round(w * scale)), max(1, round(h * scale))), Image.BOX))
+    else:
+        small = arr
+    lab = color.rgb2lab(small.astype(np.float32) / 255.0).astype(np.float32)
+    small_labels = segmentation.slic(lab, n_segments=params.n_segments, compactness=params.compactness,
+                                     start_label=0, convert2lab=False, channel_axis=-1)
+    if small is arr:
+        return small_labels, _mean_colors(small_labels, arr)
+
+    # 最近邻放大标签
+    sh, sw = small_labels.shape
+    rows = np.minimum((np.arange(h) * sh) // h, sh - 1)
+    cols = np.minimum((np.arange(w) * sw) // w, sw - 1)
+    labels = small_labels[rows[:, None], cols[None, :]]
+
+    # 只有小图上处于区域边界的像素在放大后才可能归属有误
+    edge = np.zeros((sh, sw), dtype=bool)
+    edge[:-1, :] |= small_labels[:-1, :] != small_labels[1:, :]
+    edge[1:, :] |= small_labels[:-1, :] != small_labels[1:, :]
+    edge[:, :-1] |= small_labels[:, :-1] != small_labels[:, 1:]
+    edge[:, 1:] |= small_labels[:, :-1] != small_labels[:, 1:]
+    band = edge[rows[:, None], cols[None, :]]
+    # 候选区域的参考颜色取小图上的均值即可；像素颜色先做盒式模糊，
+    # 否则噪声会让边界带里出现大量零碎的孤立像素
+    radius = int(np.ceil(1.0 / scale))
+    smooth = np.asarray(im.filter(ImageFilter.BoxBlur(radius)))
+    _refine_boundaries(labels, smooth, band, _mean_colors(small_labels, small), radius=radius)
+    return labels, _mean_colors(labels, arr)
+
+
+def _refine_boundaries(labels: np.ndarray, arr: np.ndarray, band: np.ndarray,
+                       means: np.ndarray, radius: int):
+    """把边界带内的像素重新分配给周围候选区域中颜色最接近的那个（原地修改）"""
+    ys, xs = np.nonzero(band)
+    if len(ys) == 0:
+        return
+    h, w = labels.shape
+    cand = np.stack([
+        labels[ys, xs],
+        labels[np.maximum(ys - radius, 0), xs],
+        labels[np.minimum(ys + radius, h - 1), xs],
+        labels[ys, np.maximum(xs - radius, 0)],
+        labels[ys, np.minimum(xs + radius, w - 1)],
+    ], axis=1)
+    pix = arr[ys, xs].astype(np.float32)
+    dist = ((means[cand] - pix[:, None, :]) ** 2).sum(axis=2)
+    labels[ys, xs] = cand[np.arange(len(ys)), np.argmin(dist, axis=1)]
+
+
+def _mean_colors(labels: np.ndarray, arr: np.ndarray) -> np.ndarray:
+    """一次 bincount 计算所有标签三个通道的均值"""
+    n = int(labels.max()) + 1
+    flat = labels.ravel().astype(np.intp)
+    counts = np.bincount(flat, minlength=n)
+    idx = (flat[:, None] * 3 + np.arange(3)).ravel()
+    sums = np.bincount(idx, weights=arr.reshape(-1), minlength=3 * n).reshape(n, 3)
+    return (sums / np.maximum(counts, 1)[:, None]).astype(np.float32)
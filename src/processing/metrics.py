@@ -0,0 +1,218 @@
+"""
+矢量化质量评估
+==============
+
+把任意引擎输出的 SVG 按输入分辨率栅格化，与原图比较，给出客观的保真度指标：
+
+- PSNR：峰值信噪比（dB）
+- SSIM：结构相似度（灰度，均匀窗口，积分图实现）
+- edge-F1：边缘的精确率/召回率调和平均（允许若干像素的位置容差）
+
+同时统计 SVG 的复杂度（路径数、节点数、字节数），
+作为"满足质量要求的最便宜参数"选择依据。
+
+用法::
+
+    from src.processing.metrics import score_svg
+    report = score_svg(svg_text, "input.png")
+    print(report.psnr, report.ssim, report.edge_f1, report.svg_bytes)
+"""
+
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Union
+
+import numpy as np
+from PIL import Image
+
+from src.processing.svg_raster import iter_shapes, parse_svg_root, rasterize_svg
+
+
+ImageLike = Union[str, Path, np.ndarray, Image.Image]
+
+# 按行块处理时每块 float32 临时数组的大小上限
+CHUNK_BYTES = 32 * 1024 * 1024
+
+
+@dataclass
+class FidelityReport:
+    """一次矢量化结果的质量与复杂度指标"""
+    psnr: float
+    ssim: float
+    edge_f1: float
+    path_count: int
+    node_count: int
+    svg_bytes: int
+    width: int
+    height: int
+
+    def to_dict(self) -> Dict[str, float]:
+        return asdict(self)
+
+
+def load_reference(image: ImageLike) -> np.ndarray:
+    """读取参考图为 (H, W, 3) uint8 数组，透明区域合成到白色背景上"""
+    if isinstance(image, np.ndarray):
+        arr = image
+        if arr.ndim == 2:
+            arr = np.repeat(arr[..., None], 3, axis=2)
+        elif arr.shape[2] == 4:
+            return _composite_on_white(arr)
+        return np.ascontiguousarray(arr[..., :3]).astype(np.uint8)
+
+    img = image if isinstance(image, Image.Image) else Image.open(image)
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        background = Image.new("RGBA", img.size, (255, 255, 255, 255))
+        img = Image.alpha_composite(background, img)
+    return np.asarray(img.convert("RGB"))
+
+
+def _composite_on_white(rgba: np.ndarray, chunk_bytes: int = CHUNK_BYTES) -> np.ndarray:
+    """(H, W, 4) 数组合成到白色背景，按行块写入 uint8 输出，临时内存不超过 chunk_bytes"""
+    h, w = rgba.shape[:2]
+    out = np.empty((h, w, 3), dtype=np.uint8)
+    # 每像素 alpha 4 字节 + RGB 12 字节
+    rows = max(1, chunk_bytes // (16 * max(w, 1)))
+    for y in range(0, h, rows):
+        block = rgba[y:y + rows]
+        alpha = block[..., 3:4].astype(np.float32) / 255.0
+        out[y:y + rows] = block[..., :3] * alpha + 255.0 * (1.0 - alpha)
+    return out
+
+
+def _luminance(rgb: np.ndarray) -> np.ndarray:
+    """ITU-R BT.601 亮度，float32"""
+    rgb = rgb.astype(np.float32, copy=False)
+    return rgb[..., 0] * 0.299 + rgb[..., 1] * 0.587 + rgb[..., 2] * 0.114
+
+
+def psnr(reference: np.ndarray, candidate: np.ndarray, data_range: float = 255.0) -> float:
+    """峰值信噪比；完全一致时返回 inf"""
+    diff = reference.astype(np.float32) - candidate.astype(np.float32)
+    mse = float(np.mean(diff * diff))
+    if mse == 0.0:
+        return float("inf")
+    return float(10.0 * np.log10(data_range * data_range / mse))
+
+
+def _box_mean(x: np.ndarray, win: int) -> np.ndarray:
+    """利用积分图计算所有完整 win×win 窗口的均值（valid 区域）"""
+    s = np.cumsum(np.cumsum(x, axis=0, dtype=np.float64), axis=1)
+    s = np.pad(s, ((1, 0), (1, 0)))
+    total = s[win:, win:] - s[:-win, win:] - s[win:, :-win] + s[:-win, :-win]
+    return total / float(win * win)
+
+
+def ssim(reference: np.ndarray, candidate: np.ndarray, win: int = 7,
+         data_range: float = 255.0) -> float:
+    """灰度 SSIM，窗口为 win×win 的均匀窗口（与 scikit-image 默认一致）"""
+    a = _luminance(reference) if reference.ndim == 3 else reference.astype(np.float32)
+    b = _luminance(candidate) if candidate.ndim == 3 else candidate.astype(np.float32)
+    win = max(1, min(win, a.shape[0], a.shape[1]))
+    c1 = (0.01 * data_range) ** 2
+    c2 = (0.03 * data_range) ** 2
+    # 样本协方差的无偏修正系数
+    cov_norm = win * win / max(win * win - 1.0, 1.0)
+
+    mu_a, mu_b = _box_mean(a, win), _box_mean(b, win)
+    var_a = (_box_mean(a * a, win) - mu_a * mu_a) * cov_norm
+    var_b = (_box_mean(b * b, win) - mu_b * mu_b) * cov_norm
+    cov = (_box_mean(a * b, win) - mu_a * mu_b) * cov_norm
+
+    num = (2 * mu_a * mu_b + c1) * (2 * cov + c2)
+    den = (mu_a * mu_a + mu_b * mu_b + c1) * (var_a + var_b + c2)
+    return float(np.mean(num / den))
+
+
+def edge_map(image: np.ndarray, threshold: float = 48.0) -> np.ndarray:
+    """Sobel 梯度幅值超过阈值的像素视为边缘"""
+    g = _luminance(image) if image.ndim == 3 else image.astype(np.float32)
+    p = np.pad(g, 1, mode="edge")
+    gx = (p[:-2, 2:] + 2 * p[1:-1, 2:] + p[2:, 2:]) - (p[:-2, :-2] + 2 * p[1:-1, :-2] + p[2:, :-2])
+    gy = (p[2:, :-2] + 2 * p[2:, 1:-1] + p[2:, 2:]) - (p[:-2, :-2] + 2 * p[:-2, 1:-1] + p[:-2, 2:])
+    return np.hypot(gx, gy) / 4.0 > threshold
+
+
+def _dilate(mask: np.ndarray, radius: int) -> np.ndarray:
+    """方形结构元素膨胀（可分离的行、列最大值）"""
+    if radius <= 0:
+        return mask
+    out = mask.copy()
+    for _ in range(radius):
+        out[1:, :] |= mask[:-1, :]
+        out[:-1, :] |= mask[1:, :]
+        mask = out.copy()
+    for _ in range(radius):
+        out[:, 1:] |= mask[:, :-1]
+        out[:, :-1] |= mask[:, 1:]
+        mask = out.copy()
+    return out
+
+
+def edge_f1(reference: np.ndarray, candidate: np.ndarray, tolerance: int = 1,
+            threshold: float = 48.0) -> float:
+    """边缘 F1：候选边缘落在参考边缘 tolerance 像素内算命中，反之亦然"""
+    ref_e = edge_map(reference, threshold)
+    cand_e = edge_map(candidate, threshold)
+    n_ref, n_cand = int(ref_e.sum()), int(cand_e.sum())
+    if n_ref == 0 and n_cand == 0:
+        return 1.0
+    if n_ref == 0 or n_cand == 0:
+        return 0.0
+    precision = np.count_nonzero(cand_e & _dilate(ref_e, tolerance)) / n_cand
+    recall = np.count_nonzero(ref_e & _dilate(cand_e, tolerance)) / n_ref
+    if precision + recall == 0:
+        return 0.0
+    return float(2 * precision * recall / (precision + recall))
+
+
+def svg_complexity(svg_text: str) -> Dict[str, int]:
+    """统计 SVG 的图形数、节点数和字节数"""
+    root = parse_svg_root(svg_text)
+    paths = nodes = 0
+    for shape in iter_shapes(root):
+        paths += 1
+        nodes += shape.node_count
+    return {
+        "path_count": paths,
+        "node_count": nodes,
+        "svg_bytes": len(svg_text.encode("utf-8")),
+    }
+
+
+def score_svg(svg_text: str, reference: ImageLike, supersample: int = 2,
+              edge_tolerance: int = 1) -> FidelityReport:
+    """把 SVG 栅格化到参考图分辨率，计算全部指标
+
+    Args:
+        svg_text: 引擎输出的 SVG 文本
+        reference: 参考图（路径、PIL 图像或数组）
+        supersample: 栅格化时的超采样倍数
+        edge_tolerance: 边缘匹配允许的像素偏移
+    """
+    ref = load_reference(reference)
+    h, w = ref.shape[:2]
+    rendered = rasterize_svg(svg_text, w, h, supersample=supersample)
+    stats = svg_complexity(svg_text)
+    return FidelityReport(
+        psnr=psnr(ref, rendered),
+        ssim=ssim(ref, rendered),
+        edge_f1=edge_f1(ref, rendered, tolerance=edge_tolerance),
+        path_count=stats["path_count"],
+        node_count=stats["node_count"],
+        svg_bytes=stats["svg_bytes"],
+        width=w,
+        height=h,
+    )
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    if len(sys.argv) != 3:
+        print("用法: python -m src.processing.metrics <input_image> <output.svg>")
+        sys.exit(1)
+    svg = Path(sys.argv[2]).read_text(encoding="utf-8", errors="ignore")
+    print(json.dumps(score_svg(svg, sys.argv[1]).to_dict(), ensure_ascii=False, indent=2))
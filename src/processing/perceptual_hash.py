@@ -0,0 +1,170 @@
+"""
+感知哈希
+========
+
+把图像压缩成 64 位指纹，内容相近的图像（重新扫描、重新导出、轻微缩放或压缩）
+指纹之间的汉明距离很小：
+
+- dHash：9x8 灰度缩略图中相邻像素的明暗关系，计算最快；
+- pHash：32x32 灰度缩略图做二维 DCT，取左上角 8x8 低频系数与其中位数比较，
+  对压缩、缩放和轻微亮度变化更稳健。
+
+哈希在整批缩略图上一次性计算（numpy 批量矩阵运算），解码缩略图是主要开销。
+HashIndex 按“鸽巢原理”分段建桶：距离不超过 d 的两个哈希分成 d+1 段后
+至少有一段完全相同，查询只需比较同桶的候选，不必与所有哈希逐一比较。
+
+用法::
+
+    from src.processing.perceptual_hash import HashIndex, hash_images
+
+    hashes = hash_images(paths, method="phash")
+    index = HashIndex(max_distance=6)
+    for path, value in zip(paths, hashes):
+        print(path, index.query(value))
+        index.add(value)
+"""
+
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+
+HASH_BITS = 64
+METHODS = ("phash", "dhash")
+
+# 每个字节中 1 的个数（numpy 2.0 之前没有 bitwise_count）
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# 按 16 位数据保存的整数模式
+_WIDE_INT_MODES = ("I", "I;16", "I;16L", "I;16B", "I;16N")
+
+
+def _thumbnail(path: Union[str, Path], width: int, height: int) -> Optional[np.ndarray]:
+    """读取灰度缩略图（透明区域合成到白色背景上）；无法解码时返回 None"""
+    try:
+        with Image.open(path) as img:
+            # JPEG 可以在解码时直接缩小，大幅减少大尺寸扫描件的解码时间
+            img.draft("L", (width * 4, height * 4))
+            if img.mode in _WIDE_INT_MODES:
+                # 16 位灰度扫描件直接 convert("L") 会截断到 255 而不是缩放，先缩到 8 位
+                img = img.point(lambda v: v / 256)
+            if img.mode in ("RGBA", "LA", "P"):
+                img = img.convert("RGBA")
+                background = Image.new("RGBA", img.size, (255, 255, 255, 255))
+                img = Image.alpha_composite(background, img)
+            small = img.convert("L").resize((width, height), Image.BOX)
+            return np.asarray(small, dtype=np.float32)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+def _pack(bits: np.ndarray) -> np.ndarray:
+    """(N, 64) 布尔数组 -> (N,) uint64"""
+    return np.packbits(bits, axis=1).view(">u8").ravel().astype(np.uint64)
+
+
+def dhash_batch(thumbs: np.ndarray) -> np.ndarray:
+    """(N, 8, 9) 灰度缩略图 -> (N,) uint64 dHash"""
+    bits = thumbs[:, :, 1:] > thumbs[:, :, :-1]
+    return _pack(bits.reshape(len(thumbs), -1))
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    m = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    m[0] /= np.sqrt(2.0)
+    return m.astype(np.float32)
+
+
+_DCT32 = _dct_matrix(32)
+
+
+def phash_batch(thumbs: np.ndarray) -> np.ndarray:
+    """(N, 32, 32) 灰度缩略图 -> (N,) uint64 pHash"""
+    coeffs = _DCT32 @ thumbs @ _DCT32.T
+    low = coeffs[:, :8, :8].reshape(len(thumbs), -1)
+    # 直流分量只反映整体亮度，不参与中位数
+    median = np.median(low[:, 1:], axis=1)
+    return _pack(low > median[:, None])
+
+
+_THUMB_SIZE = {"dhash": (9, 8), "phash": (32, 32)}
+_BATCH = {"dhash": dhash_batch, "phash": phash_batch}
+
+
+def hash_images(paths: Sequence[Union[str, Path]], method: str = "phash",
+                executor=None) -> List[Optional[int]]:
+    """计算一组图像的感知哈希；无法解码的图像对应 None
+
+    Args:
+        method: "phash" 或 "dhash"
+        executor: 用于并行解码缩略图的线程池（PIL 解码时释放 GIL）
+    """
+    if method not in _BATCH:
+        raise ValueError(f"未知的感知哈希方法: {method}（可用: {', '.join(METHODS)}）")
+    width, height = _THUMB_SIZE[method]
+    load = lambda p: _thumbnail(p, width, height)
+    thumbs = list(executor.map(load, paths)) if executor is not None else [load(p) for p in paths]
+
+    valid = [i for i, t in enumerate(thumbs) if t is not None]
+    result: List[Optional[int]] = [None] * len(thumbs)
+    if valid:
+        values = _BATCH[method](np.stack([thumbs[i] for i in valid]))
+        for i, value in zip(valid, values.tolist()):
+            result[i] = int(value)
+    return result
+
+
+def hamming(value: int, values: np.ndarray) -> np.ndarray:
+    """一个哈希与一组哈希 (N,) uint64 的汉明距离"""
+    diff = np.bitwise_xor(values, np.uint64(value))
+    return _POPCOUNT[diff.view(np.uint8).reshape(-1, 8)].sum(axis=1, dtype=np.int32)
+
+
+class HashIndex:
+    """64 位感知哈希的近邻索引
+
+    Args:
+        max_distance: 查询返回汉明距离不超过该值的哈希
+    """
+
+    def __init__(self, max_distance: int = 6):
+        self.max_distance = max_distance
+        n_bands = min(max_distance + 1, HASH_BITS)
+        edges = np.linspace(0, HASH_BITS, n_bands + 1).astype(int).tolist()
+        self._bands = [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(edges[:-1], edges[1:])]
+        self._buckets: List[Dict[int, List[int]]] = [defaultdict(list) for _ in self._bands]
+        self._values = np.empty(1024, dtype=np.uint64)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, value: int) -> int:
+        """加入一个哈希，返回其编号（从 0 开始按加入顺序）"""
+        ident = self._count
+        if ident == len(self._values):
+            self._values = np.concatenate([self._values, np.empty_like(self._values)])
+        self._values[ident] = value
+        self._count += 1
+        for (shift, mask), buckets in zip(self._bands, self._buckets):
+            buckets[(value >> shift) & mask].append(ident)
+        return ident
+
+    def query(self, value: int) -> List[Tuple[int, int]]:
+        """返回 [(编号, 距离)]，按距离从小到大"""
+        candidates = set()
+        for (shift, mask), buckets in zip(self._bands, self._buckets):
+            candidates.update(buckets.get((value >> shift) & mask, ()))
+        if not candidates:
+            return []
+        ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        distances = hamming(value, self._values[ids])
+        keep = distances <= self.max_distance
+        ids, distances = ids[keep], distances[keep]
+        order = np.lexsort((ids, distances))
+        return list(zip(ids[order].tolist(), distances[order].tolist()))
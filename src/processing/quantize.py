@@ -0,0 +1,240 @@
+"""
+颜色量化
+========
+
+在追踪之前把图像的颜色数降下来：颜色越少，路径越少，
+追踪、导入编辑器和渲染都越快。
+
+提供三种调色板来源：
+
+- kmeans：在抽样像素上做 mini-batch k-means（k-means++ 初始化）
+- median_cut：经典中位切分
+- 固定调色板：直接把像素映射到给定颜色
+
+调色板只在抽样像素上计算；把整幅图映射到调色板时按块处理，
+每块的临时内存有上限，因此 100MP 以上的图像也只需要
+"原图 + 标签图"的内存。
+
+用法::
+
+    from src.processing.quantize import quantize
+    result = quantize("input.png", n_colors=8)
+    result.labels    # (H, W) 调色板索引
+    result.palette   # (K, 3) uint8
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, Optional, Sequence, Union
+
+import numpy as np
+
+from src.processing.metrics import ImageLike, load_reference
+
+
+DEFAULT_SAMPLE = 200_000
+# 映射阶段每块距离矩阵的内存上限（字节）
+CHUNK_BYTES = 32 * 1024 * 1024
+
+METHODS = ("kmeans", "median_cut")
+
+
+@dataclass
+class QuantizeResult:
+    labels: np.ndarray   # (H, W)，uint8 或 uint16
+    palette: np.ndarray  # (K, 3) uint8
+
+    def counts(self) -> np.ndarray:
+        """每种颜色的像素数"""
+        return np.bincount(self.labels.ravel(), minlength=len(self.palette))
+
+    def image(self) -> np.ndarray:
+        """量化后的 RGB 图像"""
+        return self.palette[self.labels]
+
+
+def sample_pixels(rgb: np.ndarray, n: int = DEFAULT_SAMPLE, seed: int = 0) -> np.ndarray:
+    """随机抽取至多 n 个像素，返回 (n, 3) float32；不会复制整幅图"""
+    flat = rgb.reshape(-1, 3)
+    if len(flat) <= n:
+        return flat.astype(np.float32)
+    rng = np.random.default_rng(seed)
+    idx = np.sort(rng.integers(0, len(flat), n))
+    return flat[idx].astype(np.float32)
+
+
+def parse_palette(colors: Union[np.ndarray, Iterable]) -> np.ndarray:
+    """把 "#rrggbb" 字符串或 (r, g, b) 序列转换为 (K, 3) uint8 调色板"""
+    if isinstance(colors, np.ndarray):
+        return np.clip(colors[:, :3], 0, 255).astype(np.uint8)
+    out = []
+    for c in colors:
+        if isinstance(c, str):
+            h = c.lstrip("#")
+            if len(h) == 3:
+                h = "".join(ch * 2 for ch in h)
+            out.append([int(h[i:i + 2], 16) for i in (0, 2, 4)])
+        else:
+            out.append(list(c)[:3])
+    if not out:
+        raise ValueError("调色板不能为空")
+    return np.clip(np.asarray(out), 0, 255).astype(np.uint8)
+
+
+# ----------------------------------------------------------------------
+# 调色板
+# ----------------------------------------------------------------------
+
+def _nearest(data: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    # |x - c|^2 = |x|^2 - 2 x·c + |c|^2，|x|^2 对 argmin 无影响
+    d = (centers * centers).sum(axis=1)[None, :] - 2.0 * (data @ centers.T)
+    return np.argmin(d, axis=1)
+
+
+def _few_colors(data: np.ndarray, n_colors: int) -> Optional[np.ndarray]:
+    """抽样中的不同颜色数不超过 n_colors 时直接返回这些颜色（线稿、图标的常见情况）"""
+    uniq = np.unique(data.astype(np.uint8), axis=0)
+    if len(uniq) <= n_colors:
+        return uniq.astype(np.float32)
+    return None
+
+
+def _kmeans_pp(data: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    centers = np.empty((k, 3), dtype=np.float32)
+    centers[0] = data[rng.integers(len(data))]
+    dist = ((data - centers[0]) ** 2).sum(axis=1)
+    for i in range(1, k):
+        total = float(dist.sum())
+        if total <= 0:
+            centers[i:] = centers[0]
+            break
+        centers[i] = data[rng.choice(len(data), p=dist / total)]
+        dist = np.minimum(dist, ((data - centers[i]) ** 2).sum(axis=1))
+    return centers
+
+
+def kmeans_palette(rgb: np.ndarray, n_colors: int, sample: int = DEFAULT_SAMPLE,
+                   batch_size: int = 4096, iterations: int = 100, seed: int = 0) -> np.ndarray:
+    """mini-batch k-means 调色板
+
+    每轮只取一小批样本更新中心（按累计计数衰减学习率），
+    最后在全部样本上做两轮 Lloyd 迭代收尾。
+    """
+    data = sample_pixels(rgb, sample, seed)
+    few = _few_colors(data, n_colors)
+    if few is not None:
+        return few.astype(np.uint8)
+
+    rng = np.random.default_rng(seed)
+    init = data if len(data) <= 20_000 else data[rng.integers(0, len(data), 20_000)]
+    centers = _kmeans_pp(init, n_colors, rng)
+    seen = np.zeros(n_colors, dtype=np.float64)
+    for _ in range(iterations):
+        batch = data[rng.integers(0, len(data), min(batch_size, len(data)))]
+        assign = _nearest(batch, centers)
+        counts = np.bincount(assign, minlength=n_colors).astype(np.float64)
+        sums = np.stack([np.bincount(assign, weights=batch[:, c], minlength=n_colors)
+                         for c in range(3)], axis=1)
+        seen += counts
+        hit = counts > 0
+        # c += (sum - n*c) / v，等价于逐个样本的 Sculley 更新
+        centers[hit] += ((sums[hit] - counts[hit, None] * centers[hit]) / seen[hit, None]).astype(np.float32)
+
+    for _ in range(2):
+        assign = _nearest(data, centers)
+        counts = np.bincount(assign, minlength=n_colors)
+        sums = np.stack([np.bincount(assign, weights=data[:, c], minlength=n_colors)
+                         for c in range(3)], axis=1)
+        hit = counts > 0
+        centers[hit] = (sums[hit] / counts[hit, None]).astype(np.float32)
+    return np.clip(centers + 0.5, 0, 255).astype(np.uint8)
+
+
+def median_cut_palette(rgb: np.ndarray, n_colors: int, sample: int = DEFAULT_SAMPLE,
+                       seed: int = 0) -> np.ndarray:
+    """中位切分调色板：反复把"跨度 × 像素数"最大的颜色盒沿最长通道在中位数处切开"""
+    data = sample_pixels(rgb, sample, seed)
+    few = _few_colors(data, n_colors)
+    if few is not None:
+        return few.astype(np.uint8)
+
+    boxes = [data]
+    while len(boxes) < n_colors:
+        scores = [(np.ptp(b, axis=0).max() * len(b)) if len(b) > 1 else -1.0 for b in boxes]
+        i = int(np.argmax(scores))
+        if scores[i] <= 0:
+            break
+        box = boxes.pop(i)
+        channel = int(np.argmax(np.ptp(box, axis=0)))
+        mid = len(box) // 2
+        part = np.argpartition(box[:, channel], mid)
+        boxes.extend([box[part[:mid]], box[part[mid:]]])
+    palette = np.array([b.mean(axis=0) for b in boxes], dtype=np.float32)
+    return np.clip(palette + 0.5, 0, 255).astype(np.uint8)
+
+
+# ----------------------------------------------------------------------
+# 映射
+# ----------------------------------------------------------------------
+
+def map_to_palette(rgb: np.ndarray, palette: np.ndarray,
+                   chunk_bytes: int = CHUNK_BYTES) -> np.ndarray:
+    """把每个像素映射到最近的调色板颜色，返回 (H, W) 索引图
+
+    按块处理：每块的 float32 距离矩阵不超过 chunk_bytes。
+    """
+    palette = parse_palette(palette)
+    h, w = rgb.shape[:2]
+    flat = rgb.reshape(-1, 3)
+    centers = palette.astype(np.float32)
+    labels = np.empty(h * w, dtype=np.uint8 if len(palette) <= 256 else np.uint16)
+    if len(palette) == 1:
+        labels[:] = 0
+        return labels.reshape(h, w)
+    chunk = max(4096, chunk_bytes // (4 * max(len(palette), 3)))
+    for start in range(0, len(flat), chunk):
+        block = flat[start:start + chunk].astype(np.float32)
+        labels[start:start + chunk] = _nearest(block, centers)
+    return labels.reshape(h, w)
+
+
+def quantize(image: ImageLike, n_colors: int = 8, method: str = "kmeans",
+             palette: Optional[Union[np.ndarray, Sequence]] = None,
+             sample: int = DEFAULT_SAMPLE, seed: int = 0) -> QuantizeResult:
+    """量化图像
+
+    Args:
+        image: 文件路径、PIL 图像或 (H, W, 3/4) 数组；透明区域合成到白色背景
+        n_colors: 目标颜色数（给定 palette 时忽略）
+        method: "kmeans" 或 "median_cut"
+        palette: 固定调色板，"#rrggbb" 列表或 (K, 3) 数组
+    """
+    rgb = load_reference(image)
+    if palette is not None:
+        pal = parse_palette(palette)
+    elif method == "kmeans":
+        pal = kmeans_palette(rgb, max(1, n_colors), sample=sample, seed=seed)
+    elif method == "median_cut":
+        pal = median_cut_palette(rgb, max(1, n_colors), sample=sample, seed=seed)
+    else:
+        raise ValueError(f"未知的量化方法: {method}，可选 {', '.join(METHODS)}")
+    return QuantizeResult(map_to_palette(rgb, pal), pal)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from PIL import Image
+
+    parser = argparse.ArgumentParser(description="颜色量化")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("-n", "--colors", type=int, default=8)
+    parser.add_argument("-m", "--method", choices=METHODS, default="kmeans")
+    parser.add_argument("--palette", nargs="+", help="固定调色板，如 #000000 #ffffff")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    result = quantize(args.input, args.colors, args.method, palette=args.palette)
+    print(f"{len(result.palette)} 种颜色，耗时 {time.perf_counter() - t0:.2f}s")
+    Image.fromarray(result.image()).save(args.output)
@@ -0,0 +1,741 @@
+"""
+SVG 栅格化器
+============
+
+一个只依赖 NumPy 的轻量 SVG 栅格化实现，用于把各引擎输出的 SVG
+按输入图像的分辨率重新渲染成像素数组，供质量评估使用。
+
+支持的子集覆盖了本项目各引擎的实际输出：
+- 元素：path / rect / circle / ellipse / polygon / polyline / line / g / svg
+- 路径命令：M L H V C S Q T A Z（含相对形式）
+- transform：matrix / translate / scale / rotate / skewX / skewY
+- 样式：fill / stroke / stroke-width / fill-rule / opacity 及 style 属性
+
+文字、渐变、裁剪和滤镜不参与渲染（会被忽略）。
+填充使用向量化的扫描线算法，支持 nonzero 与 evenodd 两种规则。
+"""
+
+import math
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+# 不参与渲染的元素
+_SKIP_TAGS = {
+    "defs", "clipPath", "mask", "symbol", "title", "desc", "metadata",
+    "text", "style", "pattern", "linearGradient", "radialGradient",
+    "filter", "marker", "script",
+}
+
+# 可继承的样式属性及其默认值
+_STYLE_DEFAULTS = {
+    "fill": "black",
+    "stroke": "none",
+    "stroke-width": "1",
+    "fill-rule": "nonzero",
+    "fill-opacity": "1",
+    "stroke-opacity": "1",
+}
+
+_NAMED_COLORS = {
+    "black": (0, 0, 0), "white": (255, 255, 255), "red": (255, 0, 0),
+    "green": (0, 128, 0), "lime": (0, 255, 0), "blue": (0, 0, 255),
+    "yellow": (255, 255, 0), "cyan": (0, 255, 255), "aqua": (0, 255, 255),
+    "magenta": (255, 0, 255), "fuchsia": (255, 0, 255), "gray": (128, 128, 128),
+    "grey": (128, 128, 128), "silver": (192, 192, 192), "maroon": (128, 0, 0),
+    "olive": (128, 128, 0), "navy": (0, 0, 128), "purple": (128, 0, 128),
+    "teal": (0, 128, 128), "orange": (255, 165, 0),
+}
+
+# 长度单位到 px 的换算
+_UNIT_PX = {"": 1.0, "px": 1.0, "pt": 4.0 / 3.0, "pc": 16.0,
+            "mm": 96.0 / 25.4, "cm": 96.0 / 2.54, "in": 96.0}
+
+_NUM_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_LENGTH_RE = re.compile(r"^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([a-z%]*)\s*$")
+_TRANSFORM_RE = re.compile(r"(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)")
+
+# 每个路径命令的参数个数
+_ARITY = {"M": 2, "L": 2, "H": 1, "V": 1, "C": 6, "S": 4, "Q": 4, "T": 2, "A": 7, "Z": 0}
+
+# 圆弧转贝塞尔时使用的常数
+_KAPPA = 0.5522847498307936
+
+
+@dataclass
+class SvgShape:
+    """一个可渲染的图形：用户坐标系下的子路径 + 累积变换 + 样式"""
+    tag: str
+    subpaths: List[List[np.ndarray]]  # 每个子路径是若干段，线段(2,2)或三次贝塞尔(4,2)
+    closed: List[bool]
+    matrix: np.ndarray
+    style: Dict[str, str] = field(default_factory=dict)
+    opacity: float = 1.0
+
+    @property
+    def node_count(self) -> int:
+        """节点数：每个子路径的起点加上每段的终点"""
+        return sum(len(sp) + 1 for sp in self.subpaths if sp)
+
+
+# ----------------------------------------------------------------------
+# 解析辅助
+# ----------------------------------------------------------------------
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def _parse_length(value: Optional[str], reference: float = 0.0, default: float = 0.0) -> float:
+    """解析带单位的长度，返回 px 值"""
+    if value is None:
+        return default
+    m = _LENGTH_RE.match(value)
+    if not m:
+        return default
+    number, unit = float(m.group(1)), m.group(2)
+    if unit == "%":
+        return number * reference / 100.0
+    return number * _UNIT_PX.get(unit, 1.0)
+
+
+def parse_color(value: Optional[str]) -> Optional[Tuple[int, int, int]]:
+    """解析颜色字符串，返回 (r, g, b)；none / 渐变等不可渲染的值返回 None"""
+    if value is None:
+        return None
+    v = value.strip().lower()
+    if not v or v in ("none", "transparent") or v.startswith("url("):
+        return None
+    if v == "currentcolor":
+        return (0, 0, 0)
+    if v.startswith("#"):
+        h = v[1:]
+        if len(h) in (3, 4):
+            return tuple(int(c * 2, 16) for c in h[:3])
+        if len(h) in (6, 8):
+            return tuple(int(h[i:i + 2], 16) for i in (0, 2, 4))
+        return None
+    if v.startswith("rgb"):
+        parts = v[v.find("(") + 1:v.rfind(")")].replace("/", ",").split(",")
+        channels = []
+        for p in parts[:3]:
+            p = p.strip()
+            if p.endswith("%"):
+                channels.append(int(round(float(p[:-1]) * 2.55)))
+            else:
+                channels.append(int(round(float(p))))
+        return tuple(max(0, min(255, c)) for c in channels)
+    return _NAMED_COLORS.get(v)
+
+
+def _color_alpha(value: Optional[str]) -> float:
+    """提取 rgba() / #rrggbbaa 中携带的透明度"""
+    if not value:
+        return 1.0
+    v = value.strip().lower()
+    if v.startswith("rgba"):
+        parts = v[v.find("(") + 1:v.rfind(")")].split(",")
+        if len(parts) == 4:
+            try:
+                return max(0.0, min(1.0, float(parts[3])))
+            except ValueError:
+                return 1.0
+    if v.startswith("#") and len(v) in (5, 9):
+        return int(v[-2:] if len(v) == 9 else v[-1] * 2, 16) / 255.0
+    return 1.0
+
+
+def parse_transform(value: Optional[str]) -> np.ndarray:
+    """解析 transform 属性为 3x3 仿射矩阵"""
+    m = np.eye(3)
+    if not value:
+        return m
+    for name, args in _TRANSFORM_RE.findall(value):
+        a = [float(x) for x in _NUM_RE.findall(args)]
+        t = np.eye(3)
+        if name == "matrix" and len(a) == 6:
+            t[0, 0], t[1, 0], t[0, 1], t[1, 1], t[0, 2], t[1, 2] = a
+        elif name == "translate" and a:
+            t[0, 2] = a[0]
+            t[1, 2] = a[1] if len(a) > 1 else 0.0
+        elif name == "scale" and a:
+            t[0, 0] = a[0]
+            t[1, 1] = a[1] if len(a) > 1 else a[0]
+        elif name == "rotate" and a:
+            r = math.radians(a[0])
+            c, s = math.cos(r), math.sin(r)
+            t[:2, :2] = [[c, -s], [s, c]]
+            if len(a) == 3:
+                cx, cy = a[1], a[2]
+                t = _translate(cx, cy) @ t @ _translate(-cx, -cy)
+        elif name == "skewX" and a:
+            t[0, 1] = math.tan(math.radians(a[0]))
+        elif name == "skewY" and a:
+            t[1, 0] = math.tan(math.radians(a[0]))
+        m = m @ t
+    return m
+
+
+def _translate(x: float, y: float) -> np.ndarray:
+    t = np.eye(3)
+    t[0, 2], t[1, 2] = x, y
+    return t
+
+
+def _parse_style(elem: ET.Element, inherited: Dict[str, str]) -> Dict[str, str]:
+    style = dict(inherited)
+    for key in _STYLE_DEFAULTS:
+        if key in elem.attrib:
+            style[key] = elem.attrib[key]
+    css = elem.attrib.get("style")
+    if css:
+        for decl in css.split(";"):
+            if ":" in decl:
+                k, v = decl.split(":", 1)
+                k = k.strip()
+                if k in _STYLE_DEFAULTS or k == "opacity":
+                    style[k] = v.strip()
+    return style
+
+
+# ----------------------------------------------------------------------
+# 路径解析
+# ----------------------------------------------------------------------
+
+def _tokenize_path(d: str) -> List[Tuple[str, List[float]]]:
+    """把 path 的 d 属性拆成 (命令, 参数列表)，正确处理紧凑写法的圆弧标志位"""
+    out: List[Tuple[str, List[float]]] = []
+    i, n = 0, len(d)
+    cmd = None
+    while i < n:
+        c = d[i]
+        if c in " \t\r\n,":
+            i += 1
+            continue
+        if c.isalpha():
+            if c.upper() not in _ARITY:
+                break
+            cmd = c
+            out.append((c, []))
+            i += 1
+            continue
+        if cmd is None:
+            break
+        args = out[-1][1]
+        if cmd in "Aa" and len(args) % 7 in (3, 4) and c in "01":
+            args.append(float(c))
+            i += 1
+            continue
+        m = _NUM_RE.match(d, i)
+        if not m:
+            break
+        args.append(float(m.group()))
+        i = m.end()
+    return out
+
+
+def _line(p0, p1) -> np.ndarray:
+    return np.array([p0, p1], dtype=np.float64)
+
+
+def _cubic(p0, c1, c2, p1) -> np.ndarray:
+    return np.array([p0, c1, c2, p1], dtype=np.float64)
+
+
+def _arc_to_cubics(p0, rx, ry, phi_deg, large, sweep, p1) -> List[np.ndarray]:
+    """SVG 端点参数化圆弧 -> 三次贝塞尔段（SVG 规范 F.6）"""
+    x0, y0 = p0
+    x1, y1 = p1
+    if rx == 0 or ry == 0 or (x0 == x1 and y0 == y1):
+        return [_line(p0, p1)]
+    rx, ry = abs(rx), abs(ry)
+    phi = math.radians(phi_deg)
+    cp, sp = math.cos(phi), math.sin(phi)
+    dx, dy = (x0 - x1) / 2.0, (y0 - y1) / 2.0
+    x1p = cp * dx + sp * dy
+    y1p = -sp * dx + cp * dy
+    lam = (x1p / rx) ** 2 + (y1p / ry) ** 2
+    if lam > 1:
+        s = math.sqrt(lam)
+        rx, ry = rx * s, ry * s
+    num = rx * rx * ry * ry - rx * rx * y1p * y1p - ry * ry * x1p * x1p
+    den = rx * rx * y1p * y1p + ry * ry * x1p * x1p
+    coef = math.sqrt(max(0.0, num / den)) if den else 0.0
+    if large == sweep:
+        coef = -coef
+    cxp = coef * rx * y1p / ry
+    cyp = -coef * ry * x1p / rx
+    cx = cp * cxp - sp * cyp + (x0 + x1) / 2.0
+    cy = sp * cxp + cp * cyp + (y0 + y1) / 2.0
+
+    def angle(ux, uy, vx, vy):
+        a = math.atan2(ux * vy - uy * vx, ux * vx + uy * vy)
+        return a
+
+    theta1 = angle(1, 0, (x1p - cxp) / rx, (y1p - cyp) / ry)
+    dtheta = angle((x1p - cxp) / rx, (y1p - cyp) / ry, (-x1p - cxp) / rx, (-y1p - cyp) / ry)
+    if not sweep and dtheta > 0:
+        dtheta -= 2 * math.pi
+    elif sweep and dtheta < 0:
+        dtheta += 2 * math.pi
+
+    segs = []
+    count = max(1, int(math.ceil(abs(dtheta) / (math.pi / 2))))
+    delta = dtheta / count
+    t = 4.0 / 3.0 * math.tan(delta / 4.0)
+    start = p0
+    for k in range(count):
+        a1 = theta1 + k * delta
+        a2 = a1 + delta
+        c1, s1, c2, s2 = math.cos(a1), math.sin(a1), math.cos(a2), math.sin(a2)
+        e1 = (-rx * s1, ry * c1)
+        e2 = (-rx * s2, ry * c2)
+        q1 = (rx * c1 + t * e1[0], ry * s1 + t * e1[1])
+        q2 = (rx * c2 - t * e2[0], ry * s2 - t * e2[1])
+        q3 = (rx * c2, ry * s2)
+        pts = [(cp * x - sp * y + cx, sp * x + cp * y + cy) for x, y in (q1, q2, q3)]
+        end = p1 if k == count - 1 else pts[2]
+        segs.append(_cubic(start, pts[0], pts[1], end))
+        start = end
+    return segs
+
+
+def parse_path_data(d: str) -> Tuple[List[List[np.ndarray]], List[bool]]:
+    """解析 path 的 d 属性，返回 (子路径列表, 是否闭合)"""
+    subpaths: List[List[np.ndarray]] = []
+    closed: List[bool] = []
+    cur = (0.0, 0.0)
+    start = (0.0, 0.0)
+    last_ctrl = None     # 上一段三次贝塞尔的第二控制点（用于 S）
+    last_qctrl = None    # 上一段二次贝塞尔的控制点（用于 T）
+    segs: Optional[List[np.ndarray]] = None
+
+    def begin(p):
+        nonlocal segs
+        segs = []
+        subpaths.append(segs)
+        closed.append(False)
+
+    for cmd, args in _tokenize_path(d):
+        up = cmd.upper()
+        rel = cmd != up
+        arity = _ARITY[up]
+        if up == "Z":
+            if segs is not None:
+                if cur != start:
+                    segs.append(_line(cur, start))
+                closed[-1] = True
+            cur = start
+            segs = None
+            last_ctrl = last_qctrl = None
+            continue
+        if arity == 0 or len(args) < arity:
+            continue
+        for k in range(0, len(args) - arity + 1, arity):
+            a = args[k:k + arity]
+            ox, oy = cur if rel else (0.0, 0.0)
+            if up == "M" and k == 0:
+                cur = (a[0] + ox, a[1] + oy)
+                start = cur
+                begin(cur)
+                last_ctrl = last_qctrl = None
+                continue
+            if segs is None:
+                begin(cur)
+                start = cur
+            if up in ("M", "L"):
+                p = (a[0] + ox, a[1] + oy)
+                segs.append(_line(cur, p))
+                cur = p
+                last_ctrl = last_qctrl = None
+            elif up == "H":
+                p = (a[0] + ox, cur[1])
+                segs.append(_line(cur, p))
+                cur = p
+                last_ctrl = last_qctrl = None
+            elif up == "V":
+                p = (cur[0], a[0] + oy)
+                segs.append(_line(cur, p))
+                cur = p
+                last_ctrl = last_qctrl = None
+            elif up == "C":
+                c1 = (a[0] + ox, a[1] + oy)
+                c2 = (a[2] + ox, a[3] + oy)
+                p = (a[4] + ox, a[5] + oy)
+                segs.append(_cubic(cur, c1, c2, p))
+                cur, last_ctrl, last_qctrl = p, c2, None
+            elif up == "S":
+                c1 = (2 * cur[0] - last_ctrl[0], 2 * cur[1] - last_ctrl[1]) if last_ctrl else cur
+                c2 = (a[0] + ox, a[1] + oy)
+                p = (a[2] + ox, a[3] + oy)
+                segs.append(_cubic(cur, c1, c2, p))
+                cur, last_ctrl, last_qctrl = p, c2, None
+            elif up in ("Q", "T"):
+                if up == "Q":
+                    q = (a[0] + ox, a[1] + oy)
+                    p = (a[2] + ox, a[3] + oy)
+                else:
+                    q = (2 * cur[0] - last_qctrl[0], 2 * cur[1] - last_qctrl[1]) if last_qctrl else cur
+                    p = (a[0] + ox, a[1] + oy)
+                c1 = (cur[0] + 2.0 / 3.0 * (q[0] - cur[0]), cur[1] + 2.0 / 3.0 * (q[1] - cur[1]))
+                c2 = (p[0] + 2.0 / 3.0 * (q[0] - p[0]), p[1] + 2.0 / 3.0 * (q[1] - p[1]))
+                segs.append(_cubic(cur, c1, c2, p))
+                cur, last_ctrl, last_qctrl = p, None, q
+            elif up == "A":
+                p = (a[5] + ox, a[6] + oy)
+                segs.extend(_arc_to_cubics(cur, a[0], a[1], a[2], bool(a[3]), bool(a[4]), p))
+                cur = p
+                last_ctrl = last_qctrl = None
+    return subpaths, closed
+
+
+def _ellipse_subpath(cx: float, cy: float, rx: float, ry: float) -> List[np.ndarray]:
+    kx, ky = rx * _KAPPA, ry * _KAPPA
+    return [
+        _cubic((cx + rx, cy), (cx + rx, cy + ky), (cx + kx, cy + ry), (cx, cy + ry)),
+        _cubic((cx, cy + ry), (cx - kx, cy + ry), (cx - rx, cy + ky), (cx - rx, cy)),
+        _cubic((cx - rx, cy), (cx - rx, cy - ky), (cx - kx, cy - ry), (cx, cy - ry)),
+        _cubic((cx, cy - ry), (cx + kx, cy - ry), (cx + rx, cy - ky), (cx + rx, cy)),
+    ]
+
+
+def _polyline_subpath(points: str, close: bool) -> List[np.ndarray]:
+    nums = [float(x) for x in _NUM_RE.findall(points or "")]
+    pts = list(zip(nums[0::2], nums[1::2]))
+    segs = [_line(pts[i], pts[i + 1]) for i in range(len(pts) - 1)]
+    if close and len(pts) > 2 and pts[0] != pts[-1]:
+        segs.append(_line(pts[-1], pts[0]))
+    return segs
+
+
+def _element_geometry(tag: str, elem: ET.Element) -> Tuple[List[List[np.ndarray]], List[bool]]:
+    at = elem.attrib
+    if tag == "path":
+        return parse_path_data(at.get("d", ""))
+    if tag == "rect":
+        x, y = _parse_length(at.get("x")), _parse_length(at.get("y"))
+        w, h = _parse_length(at.get("width")), _parse_length(at.get("height"))
+        if w <= 0 or h <= 0:
+            return [], []
+        corners = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+        return [[_line(corners[i], corners[(i + 1) % 4]) for i in range(4)]], [True]
+    if tag == "circle":
+        r = _parse_length(at.get("r"))
+        if r <= 0:
+            return [], []
+        return [_ellipse_subpath(_parse_length(at.get("cx")), _parse_length(at.get("cy")), r, r)], [True]
+    if tag == "ellipse":
+        rx, ry = _parse_length(at.get("rx")), _parse_length(at.get("ry"))
+        if rx <= 0 or ry <= 0:
+            return [], []
+        return [_ellipse_subpath(_parse_length(at.get("cx")), _parse_length(at.get("cy")), rx, ry)], [True]
+    if tag in ("polygon", "polyline"):
+        segs = _polyline_subpath(at.get("points", ""), tag == "polygon")
+        return ([segs], [tag == "polygon"]) if segs else ([], [])
+    if tag == "line":
+        p0 = (_parse_length(at.get("x1")), _parse_length(at.get("y1")))
+        p1 = (_parse_length(at.get("x2")), _parse_length(at.get("y2")))
+        return [[_line(p0, p1)]], [False]
+    return [], []
+
+
+# ----------------------------------------------------------------------
+# 文档遍历
+# ----------------------------------------------------------------------
+
+def parse_svg_root(svg_text: str) -> ET.Element:
+    """解析 SVG 文本，容忍 BOM 和 XML 声明"""
+    text = svg_text.lstrip("﻿")
+    return ET.fromstring(text.encode("utf-8"))
+
+
+def svg_intrinsic_size(root: ET.Element) -> Tuple[float, float]:
+    """返回 SVG 的固有尺寸 (宽, 高)，单位 px"""
+    vb = _parse_viewbox(root)
+    w = _parse_length(root.attrib.get("width"), default=vb[2] if vb else 0.0)
+    h = _parse_length(root.attrib.get("height"), default=vb[3] if vb else 0.0)
+    return w, h
+
+
+def _parse_viewbox(root: ET.Element) -> Optional[Tuple[float, float, float, float]]:
+    vb = root.attrib.get("viewBox")
+    if not vb:
+        return None
+    nums = [float(x) for x in _NUM_RE.findall(vb)]
+    if len(nums) != 4 or nums[2] <= 0 or nums[3] <= 0:
+        return None
+    return tuple(nums)
+
+
+def _viewport_matrix(root: ET.Element, out_w: float, out_h: float) -> np.ndarray:
+    """根据 viewBox / preserveAspectRatio 计算从用户坐标到输出像素的变换"""
+    vb = _parse_viewbox(root)
+    if vb is None:
+        iw, ih = svg_intrinsic_size(root)
+        sx = out_w / iw if iw > 0 else 1.0
+        sy = out_h / ih if ih > 0 else 1.0
+        m = np.eye(3)
+        m[0, 0], m[1, 1] = sx, sy
+        return m
+    vx, vy, vw, vh = vb
+    sx, sy = out_w / vw, out_h / vh
+    tx = ty = 0.0
+    par = root.attrib.get("preserveAspectRatio", "xMidYMid meet").split()
+    if par and par[0] != "none":
+        s = max(sx, sy) if (len(par) > 1 and par[1] == "slice") else min(sx, sy)
+        align = par[0]
+        if "xMid" in align:
+            tx = (out_w - vw * s) / 2.0
+        elif "xMax" in align:
+            tx = out_w - vw * s
+        if "YMid" in align:
+            ty = (out_h - vh * s) / 2.0
+        elif "YMax" in align:
+            ty = out_h - vh * s
+        sx = sy = s
+    m = np.eye(3)
+    m[0, 0], m[1, 1] = sx, sy
+    m[0, 2], m[1, 2] = tx - vx * sx, ty - vy * sy
+    return m
+
+
+def iter_shapes(root: ET.Element, base_matrix: Optional[np.ndarray] = None) -> Iterator[SvgShape]:
+    """按文档顺序遍历所有可渲染图形"""
+    base = np.eye(3) if base_matrix is None else base_matrix
+    style = _parse_style(root, dict(_STYLE_DEFAULTS))
+    opacity = float(_element_opacity(root))
+    for child in root:
+        yield from _walk(child, base, style, opacity)
+
+
+def _element_opacity(elem: ET.Element) -> float:
+    value = elem.attrib.get("opacity")
+    css = elem.attrib.get("style", "")
+    m = re.search(r"(?:^|;)\s*opacity\s*:\s*([^;]+)", css)
+    if m:
+        value = m.group(1)
+    try:
+        return max(0.0, min(1.0, float(value))) if value is not None else 1.0
+    except ValueError:
+        return 1.0
+
+
+def _walk(elem: ET.Element, matrix: np.ndarray, inherited: Dict[str, str],
+          opacity: float) -> Iterator[SvgShape]:
+    tag = _local_name(elem.tag)
+    if not tag or tag in _SKIP_TAGS:
+        return
+    if elem.attrib.get("display") == "none" or elem.attrib.get("visibility") == "hidden":
+        return
+    m = matrix @ parse_transform(elem.attrib.get("transform"))
+    style = _parse_style(elem, inherited)
+    op = opacity * _element_opacity(elem)
+    if tag in ("g", "a", "svg", "switch"):
+        if tag == "svg":
+            m = m @ _translate(_parse_length(elem.attrib.get("x")), _parse_length(elem.attrib.get("y")))
+        for child in elem:
+            yield from _walk(child, m, style, op)
+        return
+    subpaths, closed = _element_geometry(tag, elem)
+    if subpaths:
+        yield SvgShape(tag, subpaths, closed, m, style, op)
+
+
+# ----------------------------------------------------------------------
+# 几何展开与扫描线填充
+# ----------------------------------------------------------------------
+
+def _flatten(shape: SvgShape, matrix: np.ndarray, tolerance: float = 1.0):
+    """把图形的所有子路径展开为设备坐标下的边 (x0, y0, x1, y1)。
+
+    返回 (fill_edges, stroke_edges)：填充时每个子路径隐式闭合，
+    描边只包含实际绘制的线段。
+    """
+    segs, sub_ids, is_line = [], [], []
+    for si, sp in enumerate(shape.subpaths):
+        for seg in sp:
+            if seg.shape[0] == 2:
+                segs.append(np.array([seg[0], seg[0], seg[1], seg[1]]))
+                is_line.append(True)
+            else:
+                segs.append(seg)
+                is_line.append(False)
+            sub_ids.append(si)
+    if not segs:
+        empty = np.zeros((0, 4))
+        return empty, empty
+    ctrl = np.stack(segs)  # (K, 4, 2)
+    sub_ids = np.asarray(sub_ids)
+    is_line = np.asarray(is_line)
+    # 仿射变换对贝塞尔控制点成立，先变换再展开
+    ctrl = ctrl @ matrix[:2, :2].T + matrix[:2, 2]
+
+    poly_len = np.linalg.norm(np.diff(ctrl, axis=1), axis=2).sum(axis=1)
+    n = np.where(is_line, 1, np.clip(np.ceil(np.sqrt(poly_len / tolerance) * 2), 1, 64)).astype(np.int64)
+    seg_idx = np.repeat(np.arange(len(n)), n)
+    local = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n) + 1
+    t = (local / n[seg_idx])[:, None]
+    c = ctrl[seg_idx]
+    mt = 1.0 - t
+    pts = (mt ** 3) * c[:, 0] + 3 * mt * mt * t * c[:, 1] + 3 * mt * t * t * c[:, 2] + (t ** 3) * c[:, 3]
+
+    prev = np.empty_like(pts)
+    prev[1:] = pts[:-1]
+    first = local == 1
+    prev[first] = c[first, 0]
+    stroke_edges = np.hstack([prev, pts])
+
+    # 每个子路径的闭合边：最后一点 -> 第一段起点
+    pt_sub = sub_ids[seg_idx]
+    last_of_sub = np.r_[pt_sub[1:] != pt_sub[:-1], True]
+    first_seg = np.r_[True, sub_ids[1:] != sub_ids[:-1]]
+    closing = np.hstack([pts[last_of_sub], ctrl[first_seg, 0]])
+    fill_edges = np.vstack([stroke_edges, closing])
+    # Z 命令和 rect/polygon 等元素在解析时已经补上了闭合线段，描边无需再加
+    return fill_edges, stroke_edges
+
+
+def _stroke_polygons(edges: np.ndarray, half_width: float) -> np.ndarray:
+    """把描边线段扩展为同向的四边形，并在顶点处补方块以填补连接缝隙"""
+    x0, y0, x1, y1 = edges.T
+    dx, dy = x1 - x0, y1 - y0
+    length = np.hypot(dx, dy)
+    ok = length > 1e-9
+    nx = np.where(ok, -dy / np.where(ok, length, 1), 0.0) * half_width
+    ny = np.where(ok, dx / np.where(ok, length, 1), 1.0) * half_width
+    # 顶点方块等价于一条水平短线段的四边形，方向与普通线段一致
+    sx0, sx1 = x0 - half_width, x0 + half_width
+    quads = []
+    for ax, ay, bx, by, qx, qy in (
+        (x0, y0, x1, y1, nx, ny),
+        (sx0, y0, sx1, y0, np.zeros_like(x0), np.full_like(x0, half_width)),
+    ):
+        a = np.stack([ax + qx, ay + qy], 1)
+        b = np.stack([bx + qx, by + qy], 1)
+        c = np.stack([bx - qx, by - qy], 1)
+        d = np.stack([ax - qx, ay - qy], 1)
+        quads.append(np.concatenate([
+            np.hstack([a, b]), np.hstack([b, c]), np.hstack([c, d]), np.hstack([d, a])
+        ]))
+    return np.vstack(quads)
+
+
+def fill_edges_mask(edges: np.ndarray, height: int, width: int,
+                    evenodd: bool = False) -> Tuple[Optional[np.ndarray], int, int]:
+    """向量化扫描线填充。
+
+    采样点为像素中心，只在图形包围盒内分配缓冲区。
+    返回 (mask, row0, col0)，mask 覆盖 [row0:row0+h, col0:col0+w]；
+    图形完全位于画布外时 mask 为 None。
+    """
+    if edges.size == 0:
+        return None, 0, 0
+    x0, y0, x1, y1 = edges.T
+    keep = y0 != y1
+    x0, y0, x1, y1 = x0[keep], y0[keep], x1[keep], y1[keep]
+    if x0.size == 0:
+        return None, 0, 0
+    direction = np.where(y1 > y0, 1, -1).astype(np.int32)
+    ya, yb = np.minimum(y0, y1), np.maximum(y0, y1)
+    r_start = np.clip(np.ceil(ya - 0.5), 0, height).astype(np.int64)
+    r_end = np.clip(np.ceil(yb - 0.5), 0, height).astype(np.int64)
+    cnt = np.maximum(r_end - r_start, 0)
+    total = int(cnt.sum())
+    if total == 0:
+        return None, 0, 0
+    eidx = np.repeat(np.arange(cnt.size), cnt)
+    rows = r_start[eidx] + (np.arange(total) - np.repeat(np.cumsum(cnt) - cnt, cnt))
+    yc = rows + 0.5
+    xc = x0[eidx] + (yc - y0[eidx]) * (x1[eidx] - x0[eidx]) / (y1[eidx] - y0[eidx])
+    d = direction[eidx]
+
+    order = np.lexsort((xc, rows))
+    rows, xc, d = rows[order], xc[order], d[order]
+    # 闭合路径在每条扫描线上的方向和为 0，全局累加即得到每行的环绕数
+    winding = np.cumsum(d)
+    inside = (winding % 2 == 1) if evenodd else (winding != 0)
+    inside[-1] = False
+    span = np.nonzero(inside & (rows == np.r_[rows[1:], -1]))[0]
+    if span.size == 0:
+        return None, 0, 0
+    span_rows = rows[span]
+    col_a = np.clip(np.ceil(xc[span] - 0.5), 0, width).astype(np.int64)
+    col_b = np.clip(np.ceil(xc[span + 1] - 0.5), 0, width).astype(np.int64)
+    valid = col_b > col_a
+    if not valid.any():
+        return None, 0, 0
+    span_rows, col_a, col_b = span_rows[valid], col_a[valid], col_b[valid]
+
+    row0, row1 = int(span_rows.min()), int(span_rows.max()) + 1
+    col0, col1 = int(col_a.min()), int(col_b.max())
+    bh, bw = row1 - row0, col1 - col0
+    stride = bw + 1
+    size = bh * stride
+    flat_a = (span_rows - row0) * stride + (col_a - col0)
+    flat_b = (span_rows - row0) * stride + (col_b - col0)
+    diff = np.bincount(flat_a, minlength=size) - np.bincount(flat_b, minlength=size)
+    mask = np.cumsum(diff.reshape(bh, stride)[:, :bw], axis=1) > 0
+    return mask, row0, col0
+
+
+# ----------------------------------------------------------------------
+# 对外接口
+# ----------------------------------------------------------------------
+
+def _composite(canvas: np.ndarray, mask, row0: int, col0: int, rgb, alpha: float):
+    if mask is None or alpha <= 0:
+        return
+    h, w = mask.shape
+    region = canvas[row0:row0 + h, col0:col0 + w]
+    color = np.asarray(rgb, dtype=np.float32)
+    if alpha >= 1.0:
+        region[mask] = color
+    else:
+        region[mask] = region[mask] * (1.0 - alpha) + color * alpha
+
+
+def rasterize_svg(svg_text: str, width: Optional[int] = None, height: Optional[int] = None,
+                  background=(255, 255, 255), supersample: int = 1) -> np.ndarray:
+    """把 SVG 渲染为 (H, W, 3) 的 uint8 RGB 数组。
+
+    Args:
+        svg_text: SVG 文本
+        width, height: 输出分辨率；缺省时使用 SVG 的固有尺寸
+        background: 背景颜色
+        supersample: 超采样倍数，>1 时用于抗锯齿
+    """
+    root = parse_svg_root(svg_text)
+    if width is None or height is None:
+        iw, ih = svg_intrinsic_size(root)
+        width = width or max(1, int(round(iw)))
+        height = height or max(1, int(round(ih)))
+    ss = max(1, int(supersample))
+    cw, ch = width * ss, height * ss
+    canvas = np.empty((ch, cw, 3), dtype=np.float32)
+    canvas[:] = np.asarray(background, dtype=np.float32)
+
+    view = _viewport_matrix(root, cw, ch)
+    for shape in iter_shapes(root, view):
+        fill_edges, stroke_edges = _flatten(shape, shape.matrix)
+        fill = parse_color(shape.style.get("fill"))
+        if fill is not None:
+            alpha = shape.opacity * float(shape.style.get("fill-opacity", 1)) * _color_alpha(shape.style.get("fill"))
+            evenodd = shape.style.get("fill-rule", "nonzero").strip() == "evenodd"
+            mask, r0, c0 = fill_edges_mask(fill_edges, ch, cw, evenodd)
+            _composite(canvas, mask, r0, c0, fill, alpha)
+        stroke = parse_color(shape.style.get("stroke"))
+        if stroke is not None and stroke_edges.size:
+            scale = math.sqrt(abs(np.linalg.det(shape.matrix[:2, :2])))
+            sw = _parse_length(shape.style.get("stroke-width"), default=1.0) * scale
+            alpha = shape.opacity * float(shape.style.get("stroke-opacity", 1)) * _color_alpha(shape.style.get("stroke"))
+            quads = _stroke_polygons(stroke_edges, max(sw, 1.0) / 2.0)
+            mask, r0, c0 = fill_edges_mask(quads, ch, cw, evenodd=False)
+            _composite(canvas, mask, r0, c0, stroke, alpha)
+
+    if ss > 1:
+        canvas = canvas.reshape(height, ss, width, ss, 3).mean(axis=(1, 3))
+    return np.clip(canvas + 0.5, 0, 255).astype(np.uint8)
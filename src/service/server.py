@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+本地矢量化服务
+==============
+
+不依赖 Qt 的 HTTP 服务，供其他程序调用引擎注册表中的所有引擎。
+只用标准库（asyncio 流）实现 HTTP/1.1，支持长连接（keep-alive）和分块上传。
+
+启动::
+
+    python -m src.service.server --port 8765 --workers 4
+
+接口:
+
+- ``GET  /health``    服务状态
+- ``GET  /engines``   引擎列表、参数表和可用性
+- ``GET  /stats``     运行中/排队中的作业数和累计计数
+- ``POST /vectorize`` 矢量化一张图像，返回 SVG
+
+``/vectorize`` 接受三种请求体:
+
+1. 图像原始字节（Content-Type 为 image/* 或 application/octet-stream），
+   引擎和参数放在查询字符串中::
+
+       curl --data-binary @in.png "http://127.0.0.1:8765/vectorize?engine=vtracer&filter_speckle=8"
+
+2. JSON，引用本机上的文件（可用 --allow-dir 限制可访问的目录）::
+
+       {"path": "D:/scans/a.png", "engine": "mkbitmap+potrace", "params": {"threshold": 140}}
+
+3. JSON，图像以 base64 放在 "image" 字段中（可选 "filename" 提供扩展名）。
+
+默认返回 image/svg+xml；查询参数 ``format=json`` 或请求头
+``Accept: application/json`` 时返回 {"engine", "svg", "elapsed_ms"}。
+
+并发：同时运行的作业数由信号量限制（--workers），其余请求排队等待；
+排队数超过 --max-queue 时立即返回 503 和 Retry-After，而不是无限堆积。
+调用外部程序的引擎（potrace、vtracer、Trace）通过 registry.arun() 在事件循环中
+等待子进程，不占用线程；进程内计算的引擎在与信号量同样大小的线程池中执行。
+适配器实例由注册表长期复用。
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, quote, urlsplit
+
+# 允许直接以脚本方式运行
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_ENGINE = "mkbitmap+potrace"
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 64 * 1024 * 1024
+KEEPALIVE_S = 15.0
+
+_REASONS = {
+    200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+    405: "Method Not Allowed", 408: "Request Timeout", 413: "Payload Too Large",
+    415: "Unsupported Media Type", 422: "Unprocessable Entity",
+    431: "Request Header Fields Too Large", 500: "Internal Server Error",
+    503: "Service Unavailable", 504: "Gateway Timeout",
+}
+
+_IMAGE_SUFFIXES = {
+    "image/png": ".png", "image/jpeg": ".jpg", "image/bmp": ".bmp", "image/gif": ".gif",
+    "image/tiff": ".tif", "image/webp": ".webp", "image/x-portable-bitmap": ".pbm",
+}
+
+
+class HttpError(Exception):
+    """以指定状态码返回给客户端的错误"""
+
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: Dict[str, str]
+    version: str
+    headers: Dict[str, str]
+    body: bytes = b""
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    def wants_json(self) -> bool:
+        return (self.query.get("format") == "json"
+                or "application/json" in self.headers.get("accept", ""))
+
+
+@dataclass
+class Response:
+    status: int = 200
+    body: bytes = b""
+    content_type: str = "application/json; charset=utf-8"
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def json(cls, data: Any, status: int = 200, **headers) -> "Response":
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        return cls(status, body, headers=dict(headers))
+
+    def encode(self, keep_alive: bool) -> bytes:
+        head = [f"HTTP/1.1 {self.status} {_REASONS.get(self.status, '')}",
+                f"Content-Type: {self.content_type}",
+                f"Content-Length: {len(self.body)}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if keep_alive:
+            head.append(f"Keep-Alive: timeout={int(KEEPALIVE_S)}")
+        head += [f"{k}: {v}" for k, v in self.headers.items()]
+        return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + self.body
+
+
+# ----------------------------------------------------------------------
+# HTTP 读取
+# ----------------------------------------------------------------------
+
+async def read_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                       max_body: int) -> Optional[Request]:
+    """读取一个请求；连接在两个请求之间正常关闭时返回 None"""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if not e.partial.strip():
+            return None
+        raise HttpError(400, "请求不完整")
+    except asyncio.LimitOverrunError:
+        raise HttpError(431, "请求头过长")
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ", 2)
+    except ValueError:
+        raise HttpError(400, f"无效的请求行: {lines[0]!r}")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            key, value = line.split(":", 1)
+            headers[key.strip().lower()] = value.strip()
+
+    if headers.get("expect", "").lower() == "100-continue":
+        # curl 上传较大文件时会先等待 100 Continue
+        writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        body = await _read_chunked(reader, max_body)
+    else:
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HttpError(400, "无效的 Content-Length")
+        if length > max_body:
+            raise HttpError(413, f"请求体超过 {max_body} 字节")
+        body = await reader.readexactly(length) if length else b""
+
+    url = urlsplit(target)
+    return Request(method.upper(), url.path, dict(parse_qsl(url.query)), version, headers, body)
+
+
+async def _read_chunked(reader: asyncio.StreamReader, max_body: int) -> bytes:
+    chunks: List[bytes] = []
+    total = 0
+    while True:
+        size_line = await reader.readuntil(b"\r\n")
+        try:
+            size = int(size_line.split(b";", 1)[0].strip(), 16)
+        except ValueError:
+            raise HttpError(400, "无效的分块长度")
+        if size == 0:
+            # 跳过可选的尾部字段
+            while (await reader.readuntil(b"\r\n")) != b"\r\n":
+                pass
+            return b"".join(chunks)
+        total += size
+        if total > max_body:
+            raise HttpError(413, f"请求体超过 {max_body} 字节")
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+
+
+# ----------------------------------------------------------------------
+# 服务
+# ----------------------------------------------------------------------
+
+class VectorizeService:
+    """矢量化 HTTP 服务
+
+    Args:
+        max_concurrency: 同时运行的作业数
+        max_queue: 最多排队等待的作业数，超出时返回 503
+        job_timeout: 单个作业的超时（秒），超时返回 504（引擎线程会运行到结束）
+        allowed_dirs: 按路径引用文件时允许访问的目录；为空时不限制
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, max_queue: int = 64,
+                 job_timeout: Optional[float] = None, max_body: int = MAX_BODY_BYTES,
+                 allowed_dirs: Optional[List[Path]] = None):
+        from src.tools.registry import registry
+
+        self.registry = registry
+        self.max_concurrency = max_concurrency or max(1, (os.cpu_count() or 2) - 1)
+        self.max_queue = max_queue
+        self.job_timeout = job_timeout
+        self.max_body = max_body
+        self.allowed_dirs = [Path(d).resolve() for d in (allowed_dirs or [])]
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                            thread_name_prefix="vectorize")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.Task] = set()
+        # 正在运行的作业；超时的作业在真正结束前仍占用名额
+        self._jobs: Set[asyncio.Task] = set()
+        self.running = 0
+        self.queued = 0
+        self.stats = {"requests": 0, "completed": 0, "failed": 0, "rejected": 0}
+        self.started = time.time()
+
+    # ------------------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------------------
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._server = await asyncio.start_server(self._handle_connection, host, port,
+                                                  limit=MAX_HEADER_BYTES)
+        return self._server
+
+    @property
+    def port(self) -> Optional[int]:
+        if self._server is None or not self._server.sockets:
+            return None
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+        # 结束空闲的长连接，再等待服务器关闭
+        for task in list(self._connections):
+            task.cancel()
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions=True)
+        for job in list(self._jobs):
+            job.cancel()
+        if self._jobs:
+            await asyncio.gather(*self._jobs, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False)
+
+    # ------------------------------------------------------------------
+    # 连接
+    # ------------------------------------------------------------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await asyncio.wait_for(read_request(reader, writer, self.max_body), KEEPALIVE_S)
+                    if request is None:
+                        break
+                    keep_alive = request.keep_alive
+                    response = await self.dispatch(request)
+                except asyncio.TimeoutError:
+                    # 空闲的长连接超时，直接关闭
+                    break
+                except HttpError as e:
+                    response = Response.json({"error": str(e)}, e.status, **e.headers)
+                writer.write(response.encode(keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # 客户端断开，或服务关闭时取消了连接
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def dispatch(self, request: Request) -> Response:
+        self.stats["requests"] += 1
+        routes = {
+            ("GET", "/health"): self.handle_health,
+            ("GET", "/engines"): self.handle_engines,
+            ("GET", "/stats"): self.handle_stats,
+            ("POST", "/vectorize"): self.handle_vectorize,
+        }
+        handler = routes.get((request.method, request.path.rstrip("/") or "/"))
+        if handler is None:
+            if any(path == request.path for _, path in routes):
+                raise HttpError(405, f"不支持的方法: {request.method}")
+            raise HttpError(404, f"未知路径: {request.path}")
+        try:
+            return await handler(request)
+        except HttpError:
+            raise
+        except Exception as e:
+            print(f"处理请求失败: {e}")
+            raise HttpError(500, str(e))
+
+    # ------------------------------------------------------------------
+    # 接口
+    # ------------------------------------------------------------------
+
+    async def handle_health(self, request: Request) -> Response:
+        return Response.json({"status": "ok", "uptime_s": round(time.time() - self.started, 1)})
+
+    async def handle_stats(self, request: Request) -> Response:
+        return Response.json({
+            "running": self.running,
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            **self.stats,
+        })
+
+    async def handle_engines(self, request: Request) -> Response:
+        loop = asyncio.get_running_loop()
+        # available() 可能需要构造适配器（启动外部程序探测），放到线程池中
+        available = await loop.run_in_executor(
+            self._executor, lambda: {n: self.registry.available(n) for n in self.registry.names()})
+        engines = []
+        for name in self.registry.names():
+            spec = self.registry.spec(name)
+            engines.append({
+                "name": name,
+                "description": spec.description,
+                "available": available[name],
+                "error": self.registry.error(name),
+                "fallback": spec.fallback,
+                "capabilities": sorted(spec.capabilities),
+                "params": [{
+                    "name": p.name, "type": p.type.__name__, "default": p.default,
+                    "low": p.low, "high": p.high, "choices": list(p.choices), "label": p.label,
+                } for p in spec.params],
+            })
+        return Response.json({"engines": engines})
+
+    async def handle_vectorize(self, request: Request) -> Response:
+        engine, params, source, upload = self._parse_vectorize(request)
+        if engine not in self.registry:
+            raise HttpError(400, f"不支持的引擎: {engine}")
+        spec = self.registry.spec(engine)
+        unknown = spec.unknown(params)
+        if unknown:
+            # 拼错的参数名（如 treshold）不能静默按默认值处理
+            known = ", ".join(p.name for p in spec.params) or "无"
+            raise HttpError(400, f"未知参数: {', '.join(unknown)}（{engine} 支持: {known}）")
+        try:
+            spec.resolve(params)
+        except (TypeError, ValueError) as e:
+            raise HttpError(400, f"参数无效: {e}")
+
+        started = time.perf_counter()
+        used, result = await self.vectorize(engine, params, source, upload)
+        elapsed_ms = round((time.perf_counter() - started) * 1000.0, 1)
+
+        if not result.lstrip().startswith("<"):
+            # 只生成中间文件的引擎（如 mkbitmap）没有 SVG 可返回
+            raise HttpError(422, f"引擎 {used} 没有返回 SVG: {result}")
+        if request.wants_json():
+            return Response.json({"engine": used, "svg": result, "elapsed_ms": elapsed_ms})
+        return Response(200, result.encode("utf-8"), "image/svg+xml; charset=utf-8",
+                        {"X-Engine": quote(used), "X-Elapsed-Ms": str(elapsed_ms)})
+
+    def _parse_vectorize(self, request: Request) -> Tuple[str, Dict[str, Any], Optional[Path],
+                                                          Optional[Tuple[bytes, str]]]:
+        """返回 (引擎, 参数, 引用的文件路径, (上传字节, 扩展名))"""
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type == "application/json":
+            try:
+                doc = json.loads(request.body.decode("utf-8"))
+            except ValueError as e:
+                raise HttpError(400, f"无效的 JSON: {e}")
+            if not isinstance(doc, dict):
+                raise HttpError(400, "JSON 请求体必须是对象")
+            engine = doc.get("engine") or request.query.get("engine", DEFAULT_ENGINE)
+            params = doc.get("params") or {}
+            if not isinstance(params, dict):
+                raise HttpError(400, "params 必须是对象")
+            if doc.get("path"):
+                return engine, params, self._check_path(Path(doc["path"])), None
+            if doc.get("image"):
+                try:
+                    data = base64.b64decode(doc["image"], validate=True)
+                except ValueError:
+                    raise HttpError(400, "image 不是有效的 base64")
+                suffix = Path(doc.get("filename") or "upload.png").suffix or ".png"
+                return engine, params, None, (data, suffix)
+            raise HttpError(400, "JSON 请求体需要 path 或 image 字段")
+
+        if not request.body:
+            raise HttpError(400, "缺少图像数据")
+        if content_type and not (content_type.startswith("image/")
+                                 or content_type == "application/octet-stream"):
+            raise HttpError(415, f"不支持的内容类型: {content_type}")
+        query = dict(request.query)
+        engine = query.pop("engine", DEFAULT_ENGINE)
+        query.pop("format", None)
+        filename = query.pop("filename", "")
+        suffix = Path(filename).suffix or _IMAGE_SUFFIXES.get(content_type, ".png")
+        # 其余查询参数都是引擎参数，由参数表负责类型转换
+        return engine, query, None, (request.body, suffix)
+
+    def _check_path(self, path: Path) -> Path:
+        resolved = path.resolve()
+        if self.allowed_dirs and not any(resolved.is_relative_to(d) for d in self.allowed_dirs):
+            raise HttpError(403, f"不允许访问: {path}")
+        if not resolved.is_file():
+            raise HttpError(404, f"文件不存在: {path}")
+        return resolved
+
+    # ------------------------------------------------------------------
+    # 执行
+    # ------------------------------------------------------------------
+
+    async def vectorize(self, engine: str, params: Dict[str, Any], source: Optional[Path],
+                        upload: Optional[Tuple[bytes, str]]) -> Tuple[str, str]:
+        """排队等待空闲名额后在线程池中运行引擎，返回 (实际使用的引擎, 结果)"""
+        if self.queued >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise HttpError(503, "排队的作业过多，请稍后重试", {"Retry-After": "1"})
+
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.running += 1
+        # 名额在作业真正结束时才释放：线程池中的引擎无法中断，超时后仍在运行，
+        # 提前释放会让后续作业在线程池里排队，还没开始就耗掉自己的超时时间
+        job = asyncio.ensure_future(self._run_job(engine, params, source, upload))
+        self._jobs.add(job)
+        job.add_done_callback(self._job_finished)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(job), self.job_timeout)
+        except asyncio.TimeoutError:
+            # 异步引擎的子进程随取消被终止；进程内引擎要等计算结束（见 registry.arun）
+            job.cancel()
+            self.stats["failed"] += 1
+            raise HttpError(504, f"作业超过 {self.job_timeout:g}s 未完成")
+        except (RuntimeError, ValueError, OSError) as e:
+            self.stats["failed"] += 1
+            raise HttpError(422, str(e))
+        self.stats["completed"] += 1
+        return result
+
+    def _job_finished(self, job: asyncio.Task):
+        self._jobs.discard(job)
+        self.running -= 1
+        self._semaphore.release()
+        if not job.cancelled():
+            job.exception()  # 超时后才结束的作业，结果已无人读取
+
+    async def _run_job(self, engine: str, params: Dict[str, Any], source: Optional[Path],
+                       upload: Optional[Tuple[bytes, str]]) -> Tuple[str, str]:
+        """运行一个作业：上传的图像写到作业临时目录"""
+        from src.utils.cost_model import cost_model, image_pixels
+        from src.utils.scratch import scratch
+
+        with scratch.job("service") as job_dir:
+            if upload is not None:
+                data, suffix = upload
+                source = job_dir / f"upload{suffix}"
+                source.write_bytes(data)
+            started = time.perf_counter()
+            result = await self.registry.arun(engine, source, params, job_dir=job_dir,
+                                              executor=self._executor)
+            elapsed = time.perf_counter() - started
+            pixels = image_pixels(source)
+        # arun() 之后适配器都已创建，select() 不会阻塞
+        used = self.registry.select(engine).name
+        cost_model.record(used, pixels, params, elapsed)
+        return used, result
+
+
+# ----------------------------------------------------------------------
+# 命令行
+# ----------------------------------------------------------------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="RasterVectorStudio 本地矢量化服务")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="监听地址（默认只监听本机）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="监听端口，0 表示随机端口")
+    parser.add_argument("--workers", type=int, default=None, help="同时运行的作业数（默认 CPU 核数-1）")
+    parser.add_argument("--max-queue", type=int, default=64, help="最多排队的作业数")
+    parser.add_argument("--timeout", type=float, default=None, help="单个作业的超时（秒）")
+    parser.add_argument("--allow-dir", type=Path, action="append", default=[],
+                        help="允许按路径引用的目录，可多次指定；不指定时不限制")
+    parser.add_argument("--preload", action="store_true", help="启动时预加载所有引擎")
+    return parser.parse_args(argv)
+
+
+async def serve(args) -> None:
+    service = VectorizeService(args.workers, args.max_queue, args.timeout,
+                               allowed_dirs=args.allow_dir)
+    if args.preload:
+        status = await asyncio.get_running_loop().run_in_executor(None, service.registry.preload)
+        for name, error in status.items():
+            print(f"  {'✅' if error is None else '❌'} {name}" + (f": {error}" if error else ""))
+    await service.start(args.host, args.port)
+    print(f"🚀 矢量化服务已启动: http://{args.host}:{service.port} "
+          f"（并行 {service.max_concurrency}，排队上限 {service.max_queue}）")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.close()
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("\n服务已停止")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
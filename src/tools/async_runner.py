@@ -0,0 +1,247 @@
+"""
+异步子进程执行
+==============
+
+各适配器用 subprocess.run 调用外部程序，同一时间有多少个作业就需要多少个线程。
+这里用 asyncio.create_subprocess_exec 提供异步版本，一个事件循环即可驱动
+成百上千个并发的小作业：
+
+- 每个引擎有独立的并发上限（信号量），超出的调用在事件循环中排队，
+  不会同时拉起过多进程；
+- 超时后杀掉进程（管道中的所有进程）并抛出 ProcessTimeout；
+- 标准输出边读边交给 on_stdout 回调（流式），同时完整收集返回。
+
+用法::
+
+    from src.tools.async_runner import runner
+
+    result = await runner.run("vtracer", cmd, timeout=30)
+    result.check("vtracer 执行失败")
+
+    # mkbitmap | potrace 管道，输入写入第一个程序的标准输入
+    result = await runner.pipe("potrace", [mk_cmd, po_cmd], data)
+
+并发上限可通过 runner.set_limit() 或环境变量 RVS_ASYNC_LIMITS 配置，
+例如 ``RVS_ASYNC_LIMITS="potrace=16,trace=2"``。
+"""
+
+import asyncio
+import os
+import time
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from src.utils.timing import span
+
+
+READ_CHUNK = 64 * 1024
+
+
+class ProcessTimeout(RuntimeError):
+    """子进程超过时限，已被终止"""
+
+
+class ProcessSpawnError(RuntimeError):
+    """无法启动子进程（程序不存在、无执行权限等）"""
+
+
+@dataclass
+class ProcessResult:
+    cmd: List[str]
+    returncode: int
+    stdout: bytes
+    stderr: bytes
+    elapsed_s: float
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+    def check(self, err: str) -> "ProcessResult":
+        """返回码非 0 时抛出 RuntimeError（与各适配器同步版本的错误信息格式一致）"""
+        if self.returncode != 0:
+            msg = f"{err}: {self.returncode}"
+            if self.stdout and len(self.stdout) < 4096:
+                msg += f"\nstdout: {self.stdout.decode('utf-8', errors='replace')}"
+            if self.stderr:
+                msg += f"\nstderr: {self.stderr.decode('utf-8', errors='replace')}"
+            raise RuntimeError(msg)
+        return self
+
+
+def _env_limits() -> Dict[str, int]:
+    limits = {}
+    for item in os.environ.get("RVS_ASYNC_LIMITS", "").split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip().isdigit():
+            limits[name.strip()] = max(1, int(value))
+    return limits
+
+
+class AsyncRunner:
+    """按引擎限制并发的异步子进程执行器
+
+    Args:
+        limits: {引擎: 最大并发进程数}
+        default_limit: 未单独配置的引擎的上限，默认等于 CPU 核数
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None, default_limit: Optional[int] = None):
+        self.default_limit = default_limit or os.cpu_count() or 4
+        self.limits: Dict[str, int] = {**_env_limits(), **(limits or {})}
+        # 信号量绑定到创建它的事件循环：{循环: {引擎: 信号量}}，以循环对象（弱引用）为键，
+        # 回收后的循环的 id 被新循环复用时不会拿到旧循环的信号量
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.running: Dict[str, int] = {}
+
+    def set_limit(self, engine: str, limit: int):
+        """修改引擎的并发上限（对之后新建的信号量生效）"""
+        self.limits[engine] = max(1, int(limit))
+        for semaphores in list(self._semaphores.values()):
+            semaphores.pop(engine, None)
+
+    def limit(self, engine: str) -> int:
+        return self.limits.get(engine, self.default_limit)
+
+    @asynccontextmanager
+    async def _slot(self, engine: str):
+        loop = asyncio.get_running_loop()
+        semaphores = self._semaphores.get(loop)
+        if semaphores is None:
+            # 等待过的信号量会引用所属的循环，仅靠弱引用释放不了，出现新循环时清理已关闭的
+            for old in [l for l in list(self._semaphores) if l.is_closed()]:
+                del self._semaphores[old]
+            semaphores = self._semaphores[loop] = {}
+        semaphore = semaphores.get(engine)
+        if semaphore is None:
+            semaphore = semaphores[engine] = asyncio.Semaphore(self.limit(engine))
+        async with semaphore:
+            self.running[engine] = self.running.get(engine, 0) + 1
+            try:
+                yield
+            finally:
+                self.running[engine] -= 1
+
+    # ------------------------------------------------------------------
+    # 执行
+    # ------------------------------------------------------------------
+
+    async def run(self, engine: str, cmd: Sequence[str], input: Optional[bytes] = None,
+                  timeout: Optional[float] = None, cwd: Optional[Path] = None,
+                  on_stdout: Optional[Callable[[bytes], None]] = None) -> ProcessResult:
+        """运行一个命令，返回 ProcessResult（不检查返回码）"""
+        return await self.pipe(engine, [cmd], input, timeout, cwd, on_stdout)
+
+    async def pipe(self, engine: str, cmds: Sequence[Sequence[str]], input: Optional[bytes] = None,
+                   timeout: Optional[float] = None, cwd: Optional[Path] = None,
+                   on_stdout: Optional[Callable[[bytes], None]] = None) -> ProcessResult:
+        """把多个命令用管道串联（前一个的 stdout 接后一个的 stdin），占用引擎的一个并发名额
+
+        返回的 cmd/returncode 是第一个失败的命令及其返回码，stderr 是所有命令的 stderr 拼接。
+        """
+        cmds = [[str(c) for c in cmd] for cmd in cmds]
+        async with self._slot(engine):
+            with span(f"async:{engine}", processes=len(cmds)):
+                started = time.perf_counter()
+                procs = await _spawn(cmds, input is not None, cwd)
+                try:
+                    stdout, stderrs = await asyncio.wait_for(
+                        _communicate(procs, input, on_stdout), timeout)
+                except asyncio.TimeoutError:
+                    await _kill(procs)
+                    raise ProcessTimeout(f"{Path(cmds[0][0]).name} 超过 {timeout:g}s 未完成，已终止")
+                except BaseException:
+                    # 调用方取消（如 HTTP 客户端断开）时也不留下子进程
+                    await _kill(procs)
+                    raise
+                elapsed = time.perf_counter() - started
+
+        # 报告第一个失败的命令；都成功时报告最后一个
+        failed = next((i for i, p in enumerate(procs) if p.returncode != 0), len(procs) - 1)
+        return ProcessResult(cmds[failed], procs[failed].returncode, stdout, b"".join(stderrs), elapsed)
+
+
+async def _spawn(cmds: List[List[str]], has_input: bool, cwd: Optional[Path]):
+    procs = []
+    upstream: Optional[int] = None
+    try:
+        for i, cmd in enumerate(cmds):
+            last = i == len(cmds) - 1
+            if last:
+                read_fd, write_fd = None, asyncio.subprocess.PIPE
+            else:
+                read_fd, write_fd = os.pipe()
+            if i == 0:
+                stdin = asyncio.subprocess.PIPE if has_input else asyncio.subprocess.DEVNULL
+            else:
+                stdin = upstream
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *cmd, stdin=stdin, stdout=write_fd, stderr=asyncio.subprocess.PIPE,
+                    cwd=str(cwd) if cwd else None)
+            finally:
+                # 子进程已继承管道两端，父进程关闭自己的副本，下游退出时上游才能收到 EOF/SIGPIPE
+                if upstream is not None:
+                    os.close(upstream)
+                if not last:
+                    os.close(write_fd)
+                upstream = read_fd
+            procs.append(proc)
+    except OSError as e:
+        if upstream is not None:
+            os.close(upstream)
+        await _kill(procs)
+        raise ProcessSpawnError(f"无法启动 {Path(cmd[0]).name}: {e}")
+    return procs
+
+
+async def _communicate(procs, input: Optional[bytes],
+                       on_stdout: Optional[Callable[[bytes], None]]):
+    async def feed():
+        if input is None:
+            return
+        stdin = procs[0].stdin
+        try:
+            stdin.write(input)
+            await stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 上游提前退出，错误信息由返回码和 stderr 给出
+        finally:
+            stdin.close()
+
+    async def read_stdout():
+        chunks = []
+        stream = procs[-1].stdout
+        while True:
+            chunk = await stream.read(READ_CHUNK)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+            if on_stdout is not None:
+                on_stdout(chunk)
+
+    results = await asyncio.gather(feed(), read_stdout(), *(p.stderr.read() for p in procs))
+    for proc in procs:
+        await proc.wait()
+    return results[1], results[2:]
+
+
+async def _kill(procs):
+    for proc in procs:
+        if proc.returncode is None:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+    for proc in procs:
+        try:
+            await proc.wait()
+        except ProcessLookupError:
+            pass
+
+
+# 全局执行器：各适配器的异步方法共用，保证同一引擎的并发上限是全局的
+runner = AsyncRunner()
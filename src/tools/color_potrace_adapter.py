@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from src.processing.bitmap import PackedBitmap
+from src.processing.quantize import quantize
+from src.utils.progress import report
+from src.utils.timing import span
+
+
+_G_RE = re.compile(r"<g\b([^>]*)>(.*?)</g>", re.S)
+_TRANSFORM_RE = re.compile(r'transform="([^"]*)"')
+
+# 所有作业共用的分层追踪线程池：作业队列和批处理会同时运行多个彩色作业，
+# 每个作业各开一个按核数大小的线程池会拉起“作业数 x 核数”个 potrace 进程
+_layer_pool: Optional[ThreadPoolExecutor] = None
+_layer_pool_lock = threading.Lock()
+
+
+def _shared_pool() -> ThreadPoolExecutor:
+    global _layer_pool
+    with _layer_pool_lock:
+        if _layer_pool is None:
+            _layer_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1,
+                                             thread_name_prefix="potrace-layer")
+        return _layer_pool
+
+
+class ColorPotraceAdapter:
+    """彩色分层 potrace：先把图像量化为 N 种颜色，每种颜色生成一张位图，
+    并行调用 potrace 追踪各层，再按面积从大到小叠放成一个分组 SVG。
+    """
+
+    def __init__(self):
+        from src.tools.potrace_adapter import PotracePipeline
+        self.pipeline = PotracePipeline()
+
+    def run(self, input_path: Path, n_colors: int = 8, turdsize: int = 2,
+            alphamax: float = 1.0, opttolerance: float = 0.2, turnpolicy: str = "minority",
+            stacked: bool = True, method: str = "kmeans", palette=None,
+            max_workers: Optional[int] = None, debug: bool = False) -> str:
+        """运行彩色分层追踪
+
+        Args:
+            n_colors: 量化后的颜色数
+            method: 量化方法，"kmeans" 或 "median_cut"
+            palette: 固定调色板（"#rrggbb" 列表），给定时忽略 n_colors/method
+            stacked: 叠放模式。每层同时覆盖其上方所有层的区域，
+                     避免相邻色块之间出现缝隙；关闭时各层互不重叠
+            max_workers: 本作业同时追踪的层数上限，默认等于 CPU 核数；
+                         所有作业共用一个按核数大小的线程池，总并发不超过核数
+        """
+        input_path = Path(input_path)
+        if not input_path.exists():
+            raise FileNotFoundError(f"输入文件不存在: {input_path}")
+
+        with span("quantize"):
+            quantized = quantize(input_path, n_colors, method, palette=palette)
+        labels, palette = quantized.labels, quantized.palette
+        height, width = labels.shape
+
+        # 按像素数从大到小排序，最大的颜色放在最底层
+        counts = quantized.counts()
+        order = [int(k) for k in np.argsort(-counts, kind="stable") if counts[k] > 0]
+        if debug:
+            print(f"量化为 {len(order)} 种颜色: {[_hex(palette[k]) for k in order]}")
+
+        # rank[label] = 该颜色在叠放顺序中的位置
+        rank = np.empty(len(palette), dtype=np.int32)
+        rank[order] = np.arange(len(order))
+        ranked = rank[labels]
+        # 叠放模式下底层覆盖整幅图，直接用矩形表示
+        layers = [(i, k) for i, k in enumerate(order) if not (stacked and i == 0)]
+
+        def trace(item):
+            # 每个线程自己打包位图并通过标准输入交给 potrace，不写临时文件
+            i, k = item
+            mask = ranked >= i if stacked else ranked == i
+            return k, self.pipeline.trace_bitmap(
+                PackedBitmap.from_array(mask), turdsize=turdsize, alphamax=alphamax, debug=debug,
+                turnpolicy=turnpolicy, opttolerance=opttolerance,
+            )
+
+        workers = max_workers or os.cpu_count() or 1
+        pool = _shared_pool()
+        with span("potrace_layers", layers=len(layers), workers=workers):
+            # 最多 workers 层同时在途；在调用线程中按顺序收集结果并报告进度
+            # （report 只对当前线程的作业生效）
+            traced = []
+            pending = deque()
+            remaining = iter(layers)
+            try:
+                for item in remaining:
+                    pending.append(pool.submit(trace, item))
+                    if len(pending) >= workers:
+                        break
+                while pending:
+                    traced.append(pending.popleft().result())
+                    report(len(traced), len(layers), f"追踪颜色层 {len(traced)}/{len(layers)}")
+                    item = next(remaining, None)
+                    if item is not None:
+                        pending.append(pool.submit(trace, item))
+            finally:
+                for future in pending:
+                    future.cancel()
+
+        with span("svg_assemble"):
+            parts = [
+                '<?xml version="1.0" encoding="UTF-8"?>',
+                f'<svg xmlns="http://www.w3.org/2000/svg" version="1.1" '
+                f'width="{width}" height="{height}" viewBox="0 0 {width} {height}">',
+            ]
+            if stacked and order:
+                parts.append(f'<rect id="layer-0" width="{width}" height="{height}" '
+                             f'fill="{_hex(palette[order[0]])}"/>')
+            for idx, (k, svg) in enumerate(traced, start=1 if stacked else 0):
+                parts.append(_layer_group(svg, f"layer-{idx}", _hex(palette[k])))
+            parts.append("</svg>")
+        return "\n".join(parts)
+
+
+def _layer_group(svg: str, layer_id: str, color: str) -> str:
+    """取出 potrace 输出中的 <g>，替换填充色"""
+    m = _G_RE.search(svg)
+    if not m:
+        return f'<g id="{layer_id}" fill="{color}"/>'
+    attrs, body = m.group(1), m.group(2)
+    t = _TRANSFORM_RE.search(attrs)
+    transform = f' transform="{t.group(1)}"' if t else ""
+    return f'<g id="{layer_id}" fill="{color}" stroke="none"{transform}>{body.strip()}</g>'
+
+
+def _hex(color) -> str:
+    r, g, b = (int(c) for c in color[:3])
+    return f"#{r:02x}{g:02x}{b:02x}"
@@ -0,0 +1,38 @@
+from pathlib import Path
+
+from src.utils.timing import span
+
+
+class ContourTraceAdapter:
+    """内置黑白追踪引擎：基于 scikit-image 轮廓提取 + 多边形简化 + 贝塞尔拟合。
+
+    在进程内运行，不需要 potrace/mkbitmap 等外部可执行文件，
+    适用于没有 Windows 工具的 Linux 服务器，也可作为零进程开销的基线。
+    """
+
+    def run(self, input_path: Path, threshold: int = 128, turdsize: int = 2,
+            alphamax: float = 1.0, tolerance: float = 0.5, invert: bool = False,
+            blur_radius: float = 0.0, debug: bool = False) -> str:
+        """运行内置追踪
+
+        Args:
+            threshold: 二值化阈值（0-255），不高于阈值的像素为前景
+            turdsize: 丢弃面积不超过此值的斑点
+            alphamax: 拐角阈值，越大曲线越平滑，0 为纯多边形
+            tolerance: 多边形简化容差（像素）
+        """
+        from src.processing.contour_trace import binarize, polygons_to_svg, trace_mask
+
+        input_path = Path(input_path)
+        if not input_path.exists():
+            raise FileNotFoundError(f"输入文件不存在: {input_path}")
+
+        with span("binarize"):
+            mask = binarize(input_path, threshold, invert, blur_radius)
+        with span("find_contours"):
+            polygons = trace_mask(mask, turdsize, tolerance)
+        if debug:
+            print(f"提取到 {len(polygons)} 条轮廓")
+        with span("bezier_fit"):
+            h, w = mask.shape
+            return polygons_to_svg(polygons, w, h, alphamax)
@@ -6,11 +6,14 @@ DiffVG 矢量化适配器 - Python 3.12 优化版本
 
 import sys
 import os
+import importlib.util
 from pathlib import Path
 import warnings
 import tempfile
 import shutil
 
+from src.utils.progress import report
+
 # 添加 DiffVG 路径 - 使用Python 3.12编译的版本
 current_dir = Path(__file__).parent.parent.parent
 diffvg_path = current_dir / "third_party" / "diffvg"
@@ -22,20 +25,17 @@ try:
     import diffvg
     from PIL import Image
     import numpy as np
-    try:
-        import skimage.io
-        SKIMAGE_AVAILABLE = True
-    except ImportError:
-        SKIMAGE_AVAILABLE = False
+    # scikit-image 和 PyTorch 导入很慢（torch 需要数秒），这里只检查是否安装，
+    # 真正用到时才导入
+    SKIMAGE_AVAILABLE = importlib.util.find_spec("skimage") is not None
+    if not SKIMAGE_AVAILABLE:
         print("⚠️ scikit-image未安装，将使用PIL作为后备")
     
     # 检查是否有PyTorch，但不强制要求
-    try:
-        import torch
-        PYTORCH_AVAILABLE = True
+    PYTORCH_AVAILABLE = importlib.util.find_spec("torch") is not None
+    if PYTORCH_AVAILABLE:
         print("✅ PyTorch可用，支持高级AI功能")
-    except ImportError:
-        PYTORCH_AVAILABLE = False
+    else:
         print("ℹ️ PyTorch不可用，使用基础CPU模式")
     
     DIFFVG_AVAILABLE = True
@@ -103,18 +103,21 @@ class DiffVGAdapter:
         
         try:
             # 获取参数
-            num_paths = kwargs.get('num_paths', 128)
+            # vectorize() 的参数名是 num_shapes / max_iter，两种写法都接受
+            num_paths = kwargs.get('num_paths', kwargs.get('num_shapes', 128))
             max_width = kwargs.get('max_width', 2.0)
-            num_iter = kwargs.get('num_iter', 100)
+            num_iter = kwargs.get('num_iter', kwargs.get('max_iter', 100))
             use_gpu = kwargs.get('use_gpu', False)
             
             print(f"🎯 开始DiffVG矢量化: {input_path}")
             print(f"📊 参数: num_paths={num_paths}, max_width={max_width}, num_iter={num_iter}")
             
             # 设置设备
-            use_cuda = use_gpu and torch.cuda.is_available() if PYTORCH_AVAILABLE else False
             if PYTORCH_AVAILABLE:
+                import torch
+                import skimage.io
                 import pydiffvg
+                use_cuda = use_gpu and torch.cuda.is_available()
                 pydiffvg.set_use_gpu(use_cuda)
                 device = pydiffvg.get_device()
                 print(f"🖥️  使用设备: {'GPU' if use_cuda else 'CPU'}")
@@ -238,6 +241,8 @@ class DiffVGAdapter:
                     path.stroke_width.data.clamp_(0.1, max_width)
                 for group in shape_groups:
                     group.stroke_color.data.clamp_(0.0, 1.0)
+
+                report(t + 1, num_iter, f"DiffVG 优化 {t + 1}/{num_iter}")
             
             print(f"✅ 优化完成，最终损失: {loss.item():.4f}")
             
@@ -258,6 +263,7 @@ class DiffVGAdapter:
         """基础矢量化模式（无PyTorch）"""
         try:
             if SKIMAGE_AVAILABLE:
+                import skimage.io
                 img = skimage.io.imread(input_path)
             else:
                 img = np.array(Image.open(input_path))
@@ -492,14 +498,14 @@ class DiffVGAdapter:
         # 目前回退到简单模式
         return self.vectorize_simple(input_path, output_path, **kwargs)
 
-# 导出适配器实例
-if DIFFVG_AVAILABLE:
-    diffvg_adapter = DiffVGAdapter()
-else:
-    diffvg_adapter = None
+# 适配器实例在第一次调用 get_adapter() 时创建
+diffvg_adapter = None
 
 def get_adapter():
     """获取DiffVG适配器实例"""
+    global diffvg_adapter
+    if diffvg_adapter is None and DIFFVG_AVAILABLE:
+        diffvg_adapter = DiffVGAdapter()
     return diffvg_adapter
 
 # 测试函数
@@ -536,6 +542,6 @@ if __name__ == "__main__":
     print("🚀 DiffVG适配器 - Python 3.12版本")
     test_diffvg()
     
-    if diffvg_adapter:
+    if get_adapter():
         info = diffvg_adapter.get_info()
         print(f"📦 引擎信息: {info}")
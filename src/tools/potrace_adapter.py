@@ -1,8 +1,19 @@
+import asyncio
+import io
 import subprocess
 import shutil
+import threading
 from pathlib import Path
-from tempfile import TemporaryDirectory
-from typing import Optional
+from typing import List, Optional, Union
+
+from src.processing.bitmap import PackedBitmap
+from src.tools.async_runner import ProcessSpawnError
+from src.utils.scratch import scratch
+from src.utils.timing import span
+
+
+class StreamingUnsupported(RuntimeError):
+    """管道模式下程序正常退出却没有输出 SVG（工具版本不支持标准输入输出）"""
 
 
 class PotracePipeline:
@@ -22,19 +33,34 @@ class PotracePipeline:
         if not self.mkbitmap_exe or not self.mkbitmap_exe.exists():
             raise RuntimeError(f"mkbitmap.exe 未找到。请确保已安装 mkbitmap 工具。")
 
+        # 管道模式本身不可用（无法启动程序，或正常退出却没有输出 SVG）时不再尝试；
+        # 输入导致的失败（非 0 返回码、图像无法解码）直接抛出，不影响之后的作业
+        self.streaming_supported = True
+
     def run(self, input_path: Path, threshold: int = 128, turdsize: int = 2,
             alphamax: float = 1.0, edge_mode: bool = False, debug: bool = False,
             filter_radius: int = 4, scale_factor: int = 2, blur_radius: float = 0.0,
             turnpolicy: str = "minority", opttolerance: float = 0.2, unit: int = 10,
-            invert: bool = False, longcurve: bool = False) -> str:
-        """运行完整的mkbitmap+potrace管道"""
+            invert: bool = False, longcurve: bool = False, streaming: bool = True) -> str:
+        """运行完整的mkbitmap+potrace管道
+
+        streaming=True 时通过标准输入输出串联两个程序，不写中间文件；
+        管道模式不可用时自动回退到临时文件模式。
+        """
         input_path = Path(input_path)
         if not input_path.exists():
             raise FileNotFoundError(f"输入文件不存在: {input_path}")
 
-        with TemporaryDirectory() as td:
-            tmp = Path(td)
-
+        if streaming and self.streaming_supported:
+            try:
+                return self._run_streaming(input_path, threshold, turdsize, alphamax, edge_mode, debug,
+                                           filter_radius, scale_factor, blur_radius, turnpolicy,
+                                           opttolerance, unit, invert, longcurve)
+            except (ProcessSpawnError, StreamingUnsupported) as e:
+                print(f"管道模式不可用，回退到临时文件模式: {e}")
+                self.streaming_supported = False
+
+        with scratch.job("potrace", keep=debug) as tmp:
             # 步骤1: 预处理图像为位图
             pbm_path = self._run_mkbitmap(input_path, tmp, threshold, debug, 
                                         filter_radius, scale_factor, blur_radius, invert)
@@ -59,9 +85,10 @@ class PotracePipeline:
             print(f"输入格式{input_path.suffix}不受支持，转换为BMP...")
             try:
                 from PIL import Image
-                img = Image.open(input_path).convert("RGB")
-                bmp_path = tmp_dir / "_mk_src.bmp"
-                img.save(bmp_path, format="BMP")
+                with span("pil_convert"):
+                    img = Image.open(input_path).convert("RGB")
+                    bmp_path = tmp_dir / "_mk_src.bmp"
+                    img.save(bmp_path, format="BMP")
                 src_for_mk = bmp_path
                 print(f"已转换为: {bmp_path}")
             except Exception as conv_err:
@@ -70,37 +97,16 @@ class PotracePipeline:
         # 准备mkbitmap命令
         pbm_path = tmp_dir / "preprocessed.pbm"
         mkbitmap_exe = str(self.mkbitmap_exe)
-
-        # mkbitmap参数:
-        # -f: 高通滤波器半径
-        # -s: 缩放因子（推荐用于potrace）
-        # -t: 阈值 (0-1之间)
-        # -3: 使用三次插值
-        # -i: 反转输入
-        # -b: 模糊半径
-        threshold_normalized = threshold / 255.0  # 转换为0-1范围
-        mk_cmd = [
-            mkbitmap_exe,
-            "-f", str(filter_radius),    # 高通滤波半径
-            "-s", str(scale_factor),     # 缩放因子
-            "-t", f"{threshold_normalized:.3f}",  # 阈值
-            "-3",                        # 三次插值
-        ]
-        
-        # 添加可选参数
-        if invert:
-            mk_cmd.append("-i")
-        
-        if blur_radius > 0:
-            mk_cmd.extend(["-b", f"{blur_radius:.1f}"])
-        
+        mk_cmd = [mkbitmap_exe] + self._mkbitmap_args(threshold, filter_radius, scale_factor,
+                                                      blur_radius, invert)
         mk_cmd.extend(["-o", str(pbm_path), str(src_for_mk)])
 
         if debug:
             print(f"mkbitmap命令: {' '.join(mk_cmd)}")
 
         try:
-            result = subprocess.run(mk_cmd, check=True, capture_output=True, text=True)
+            with span("mkbitmap"):
+                result = subprocess.run(mk_cmd, check=True, capture_output=True, text=True)
             if debug:
                 print("mkbitmap stdout:", result.stdout)
                 if result.stderr:
@@ -129,36 +135,15 @@ class PotracePipeline:
         svg_path = tmp_dir / "output.svg"
         potrace_exe = str(self.potrace_exe)
 
-        # potrace参数:
-        # -s: SVG输出
-        # -o: 输出文件
-        # --turdsize: 抑制小斑点
-        # --alphamax: 拐角阈值
-        # --turnpolicy: 转向策略
-        # --opttolerance: 优化容差
-        # --unit: 单位量化
-        # --longcurve: 禁用曲线优化
-        po_cmd = [
-            potrace_exe,
-            str(pbm_path),
-            "-s",  # SVG输出
-            "-o", str(svg_path),
-            "--turdsize", str(turdsize),
-            "--alphamax", str(alphamax),
-            "--turnpolicy", turnpolicy,
-            "--opttolerance", str(opttolerance),
-            "--unit", str(unit)
-        ]
-        
-        # 添加可选参数
-        if longcurve:
-            po_cmd.append("--longcurve")
+        po_cmd = [potrace_exe, str(pbm_path), "-o", str(svg_path)]
+        po_cmd += self._potrace_args(turdsize, alphamax, turnpolicy, opttolerance, unit, longcurve)
 
         if debug:
             print(f"potrace命令: {' '.join(po_cmd)}")
 
         try:
-            result = subprocess.run(po_cmd, check=True, capture_output=True, text=True)
+            with span("potrace"):
+                result = subprocess.run(po_cmd, check=True, capture_output=True, text=True)
             if debug:
                 print("potrace stdout:", result.stdout)
                 if result.stderr:
@@ -176,18 +161,123 @@ class PotracePipeline:
 
         # 读取SVG内容
         try:
-            svg_content = svg_path.read_text(encoding="utf-8")
+            with span("svg_readback"):
+                svg_content = svg_path.read_text(encoding="utf-8")
         except Exception as e:
             raise RuntimeError(f"无法读取SVG文件: {e}")
 
         print(f"potrace完成，SVG大小: {len(svg_content)} 字符")
+        return self._finish_svg(svg_content, edge_mode, debug)
 
+    def _mkbitmap_args(self, threshold: int, filter_radius: int, scale_factor: int,
+                       blur_radius: float, invert: bool) -> List[str]:
+        """mkbitmap 参数（不含输入输出）"""
+        # mkbitmap参数:
+        # -f: 高通滤波器半径
+        # -s: 缩放因子（推荐用于potrace）
+        # -t: 阈值 (0-1之间)
+        # -3: 使用三次插值
+        # -i: 反转输入
+        # -b: 模糊半径
+        threshold_normalized = threshold / 255.0  # 转换为0-1范围
+        args = [
+            "-f", str(filter_radius),    # 高通滤波半径
+            "-s", str(scale_factor),     # 缩放因子
+            "-t", f"{threshold_normalized:.3f}",  # 阈值
+            "-3",                        # 三次插值
+        ]
+        
+        # 添加可选参数
+        if invert:
+            args.append("-i")
+        
+        if blur_radius > 0:
+            args.extend(["-b", f"{blur_radius:.1f}"])
+        return args
+
+    def _potrace_args(self, turdsize: int, alphamax: float, turnpolicy: str,
+                      opttolerance: float, unit: int, longcurve: bool) -> List[str]:
+        """potrace 参数（不含输入输出）"""
+        # potrace参数:
+        # -s: SVG输出
+        # --turdsize: 抑制小斑点
+        # --alphamax: 拐角阈值
+        # --turnpolicy: 转向策略
+        # --opttolerance: 优化容差
+        # --unit: 单位量化
+        # --longcurve: 禁用曲线优化
+        args = [
+            "-s",  # SVG输出
+            "--turdsize", str(turdsize),
+            "--alphamax", str(alphamax),
+            "--turnpolicy", turnpolicy,
+            "--opttolerance", str(opttolerance),
+            "--unit", str(unit)
+        ]
+        
+        # 添加可选参数
+        if longcurve:
+            args.append("--longcurve")
+        return args
+
+    def _finish_svg(self, svg_content: str, edge_mode: bool, debug: bool) -> str:
         # 处理边缘模式
         if edge_mode:
-            svg_content = self._apply_edge_mode(svg_content, debug)
-
+            with span("edge_mode"):
+                svg_content = self._apply_edge_mode(svg_content, debug)
         return svg_content
 
+    def _run_streaming(self, input_path: Path, threshold: int, turdsize: int, alphamax: float,
+                       edge_mode: bool, debug: bool, filter_radius: int, scale_factor: int,
+                       blur_radius: float, turnpolicy: str, opttolerance: float, unit: int,
+                       invert: bool, longcurve: bool) -> str:
+        """管道模式：编码后的图像 → mkbitmap stdin，mkbitmap stdout → potrace stdin，
+        potrace stdout → SVG 文本。全程不落盘。"""
+        print(f"运行 mkbitmap | potrace 管道处理 {input_path.name}")
+        data = self._encode_for_mkbitmap(input_path)
+
+        mk_cmd = self._mkbitmap_stream_cmd(threshold, filter_radius, scale_factor, blur_radius, invert)
+        po_cmd = self._potrace_stream_cmd(turdsize, alphamax, turnpolicy, opttolerance, unit, longcurve)
+        if debug:
+            print(f"管道命令: {' '.join(mk_cmd)} | {' '.join(po_cmd)}")
+
+        with span("mkbitmap|potrace", input_bytes=len(data)):
+            out = _run_pipe([mk_cmd, po_cmd], data)
+        with span("svg_decode"):
+            svg_content = out.decode("utf-8")
+        if "<svg" not in svg_content:
+            raise StreamingUnsupported("potrace未输出SVG")
+
+        print(f"potrace完成，SVG大小: {len(svg_content)} 字符")
+        return self._finish_svg(svg_content, edge_mode, debug)
+
+    # 不给输入文件时两个程序都从标准输入读取；potrace 用 -o - 输出到标准输出
+    def _mkbitmap_stream_cmd(self, threshold: int, filter_radius: int, scale_factor: int,
+                             blur_radius: float, invert: bool) -> List[str]:
+        return [str(self.mkbitmap_exe)] + self._mkbitmap_args(threshold, filter_radius, scale_factor,
+                                                               blur_radius, invert)
+
+    def _potrace_stream_cmd(self, turdsize: int, alphamax: float, turnpolicy: str,
+                            opttolerance: float, unit: int, longcurve: bool) -> List[str]:
+        return ([str(self.potrace_exe)]
+                + self._potrace_args(turdsize, alphamax, turnpolicy, opttolerance, unit, longcurve)
+                + ["-o", "-"])
+
+    def _encode_for_mkbitmap(self, input_path: Path) -> bytes:
+        """mkbitmap 能直接读取的格式原样读入，其余格式用 PIL 编码为 PPM 字节"""
+        if input_path.suffix.lower() in {".pnm", ".pbm", ".pgm", ".ppm", ".bmp"}:
+            with span("read_input"):
+                return input_path.read_bytes()
+        with span("pil_convert"):
+            from PIL import Image
+            try:
+                img = Image.open(input_path).convert("RGB")
+            except Exception as conv_err:
+                raise RuntimeError(f"无法读取输入图像: {conv_err}")
+            buf = io.BytesIO()
+            img.save(buf, format="PPM")
+            return buf.getvalue()
+
     def _apply_edge_mode(self, svg: str, debug: bool) -> str:
         """应用边缘模式：将填充路径改为描边"""
         original_svg = svg
@@ -220,8 +310,7 @@ class PotracePipeline:
         input_path = Path(input_path)
         output_path = Path(output_path)
 
-        with TemporaryDirectory() as td:
-            tmp = Path(td)
+        with scratch.job("mkbitmap", keep=debug) as tmp:
             pbm_path = self._run_mkbitmap(input_path, tmp, threshold, debug,
                                         filter_radius, scale_factor, blur_radius, invert)
 
@@ -234,62 +323,208 @@ class PotracePipeline:
                         alphamax: float = 1.0, edge_mode: bool = False,
                         debug: bool = False, turnpolicy: str = "minority", 
                         opttolerance: float = 0.2, unit: int = 10, 
-                        longcurve: bool = False) -> str:
-        """仅运行potrace步骤，自动处理格式转换"""
+                        longcurve: bool = False, threshold: int = 128,
+                        streaming: bool = True) -> str:
+        """仅运行potrace步骤，自动处理格式转换
+
+        非 potrace 格式的输入在内存中阈值化为 PackedBitmap（每像素 1 bit），
+        streaming=True 时直接写入 potrace 的标准输入。
+        """
         input_path = Path(input_path)
         if not input_path.exists():
             raise FileNotFoundError(f"输入文件不存在: {input_path}")
 
-        with TemporaryDirectory() as td:
-            tmp = Path(td)
-            
-            # 检查输入文件格式
-            potrace_supported = {".pbm", ".pgm", ".ppm", ".bmp"}
-            
-            if input_path.suffix.lower() in potrace_supported:
-                # 如果已经是potrace支持的格式，直接使用
-                pbm_path = input_path
+        # 检查输入文件格式
+        potrace_supported = {".pbm", ".pgm", ".ppm", ".bmp"}
+        if input_path.suffix.lower() in potrace_supported:
+            if debug:
+                print(f"输入文件{input_path.name}已是potrace支持的格式")
+            if not (streaming and self.streaming_supported):
+                with scratch.job("potrace", keep=debug) as tmp:
+                    return self._run_potrace(input_path, tmp, turdsize, alphamax, edge_mode, debug,
+                                             turnpolicy, opttolerance, unit, longcurve)
+            with span("read_input"):
+                pbm_bytes = input_path.read_bytes()
+        else:
+            # 如果不是支持的格式，先转换
+            print(f"输入格式{input_path.suffix}不受potrace直接支持，正在转换为PBM...")
+            try:
+                with span("pil_convert"):
+                    bitmap = PackedBitmap.from_image(input_path, threshold)
+                    pbm_bytes = bitmap.to_pbm()
                 if debug:
-                    print(f"输入文件{input_path.name}已是potrace支持的格式")
-            else:
-                # 如果不是支持的格式，先转换
-                print(f"输入格式{input_path.suffix}不受potrace直接支持，正在转换为PBM...")
-                try:
-                    from PIL import Image
-                    
-                    # 加载图像
-                    img = Image.open(input_path)
-                    
-                    # 转换为RGB模式（确保兼容性）
-                    if img.mode in ('RGBA', 'LA', 'P'):
-                        # 有透明度或调色板的图像，转换为RGB
-                        img = img.convert('RGB')
-                    elif img.mode != 'RGB' and img.mode != 'L':
-                        img = img.convert('RGB')
-                    
-                    # 转换为灰度
-                    if img.mode != 'L':
-                        img = img.convert('L')
-                    
-                    # 简单二值化处理 (使用阈值128)
-                    import numpy as np
-                    img_array = np.array(img)
-                    # 二值化：大于128的设为255(白色)，小于等于128的设为0(黑色)
-                    binary_array = np.where(img_array > 128, 255, 0).astype(np.uint8)
-                    binary_img = Image.fromarray(binary_array, mode='L')
-                    
-                    # 保存为PBM格式 (使用单色模式)
-                    pbm_path = tmp / "converted.pbm"
-                    # 转换为单色模式以获得真正的PBM
-                    binary_img = binary_img.convert('1')  # 转换为1位单色
-                    binary_img.save(pbm_path, format="PPM")  # 保存为PPM格式（PIL的PBM支持有限）
-                    
-                    if debug:
-                        print(f"已转换为PBM格式: {pbm_path}")
-                        print(f"转换后文件大小: {pbm_path.stat().st_size} 字节")
-                    
-                except Exception as conv_err:
-                    raise RuntimeError(f"无法转换输入文件为PBM格式: {conv_err}")
-            
+                    print(f"已转换为PBM格式: {bitmap}")
+            except Exception as conv_err:
+                raise RuntimeError(f"无法转换输入文件为PBM格式: {conv_err}")
+
+        return self.trace_bitmap(pbm_bytes, turdsize=turdsize, alphamax=alphamax, edge_mode=edge_mode,
+                                 debug=debug, turnpolicy=turnpolicy, opttolerance=opttolerance,
+                                 unit=unit, longcurve=longcurve, streaming=streaming)
+
+    def trace_bitmap(self, pbm_bytes: Union[bytes, PackedBitmap], turdsize: int = 2, alphamax: float = 1.0,
+                     edge_mode: bool = False, debug: bool = False, turnpolicy: str = "minority",
+                     opttolerance: float = 0.2, unit: int = 10, longcurve: bool = False,
+                     streaming: bool = True) -> str:
+        """追踪内存中的 PackedBitmap 或 PBM/PGM/PPM/BMP 数据"""
+        if isinstance(pbm_bytes, PackedBitmap):
+            pbm_bytes = pbm_bytes.to_pbm()
+        if streaming and self.streaming_supported:
+            po_cmd = self._potrace_stream_cmd(turdsize, alphamax, turnpolicy, opttolerance, unit, longcurve)
+            try:
+                with span("potrace", input_bytes=len(pbm_bytes)):
+                    out = _run_pipe([po_cmd], pbm_bytes)
+                svg_content = out.decode("utf-8")
+                if "<svg" not in svg_content:
+                    raise StreamingUnsupported("potrace未输出SVG")
+                return self._finish_svg(svg_content, edge_mode, debug)
+            except (ProcessSpawnError, StreamingUnsupported) as e:
+                print(f"管道模式不可用，回退到临时文件模式: {e}")
+                self.streaming_supported = False
+
+        with scratch.job("potrace", keep=debug) as tmp:
+            pbm_path = tmp / "converted.pbm"
+            pbm_path.write_bytes(pbm_bytes)
             return self._run_potrace(pbm_path, tmp, turdsize, alphamax, edge_mode, debug,
-                                   turnpolicy, opttolerance, unit, longcurve)
+                                     turnpolicy, opttolerance, unit, longcurve)
+
+    # ------------------------------------------------------------------
+    # 异步版本：进程在事件循环中等待（src.tools.async_runner），不占用线程；
+    # 图像解码/编码等 CPU 工作仍放到线程中，避免阻塞事件循环
+    # ------------------------------------------------------------------
+
+    async def run_async(self, input_path: Path, threshold: int = 128, turdsize: int = 2,
+                        alphamax: float = 1.0, edge_mode: bool = False, debug: bool = False,
+                        filter_radius: int = 4, scale_factor: int = 2, blur_radius: float = 0.0,
+                        turnpolicy: str = "minority", opttolerance: float = 0.2, unit: int = 10,
+                        invert: bool = False, longcurve: bool = False, streaming: bool = True,
+                        timeout: Optional[float] = None) -> str:
+        """run() 的异步版本（管道模式）；管道模式不可用时在线程中运行临时文件模式"""
+        from src.tools.async_runner import runner
+
+        input_path = Path(input_path)
+        if not input_path.exists():
+            raise FileNotFoundError(f"输入文件不存在: {input_path}")
+
+        if streaming and self.streaming_supported:
+            data = await asyncio.to_thread(self._encode_for_mkbitmap, input_path)
+            mk_cmd = self._mkbitmap_stream_cmd(threshold, filter_radius, scale_factor, blur_radius, invert)
+            po_cmd = self._potrace_stream_cmd(turdsize, alphamax, turnpolicy, opttolerance, unit, longcurve)
+            try:
+                result = await runner.pipe("potrace", [mk_cmd, po_cmd], data, timeout=timeout)
+                return self._stream_result(result, edge_mode, debug)
+            except (ProcessSpawnError, StreamingUnsupported) as e:
+                print(f"管道模式不可用，回退到临时文件模式: {e}")
+                self.streaming_supported = False
+
+        return await asyncio.to_thread(
+            self.run, input_path, threshold, turdsize, alphamax, edge_mode, debug, filter_radius,
+            scale_factor, blur_radius, turnpolicy, opttolerance, unit, invert, longcurve, False)
+
+    async def run_potrace_only_async(self, input_path: Path, turdsize: int = 2,
+                                     alphamax: float = 1.0, edge_mode: bool = False,
+                                     debug: bool = False, turnpolicy: str = "minority",
+                                     opttolerance: float = 0.2, unit: int = 10,
+                                     longcurve: bool = False, threshold: int = 128,
+                                     streaming: bool = True, timeout: Optional[float] = None) -> str:
+        """run_potrace_only() 的异步版本"""
+        input_path = Path(input_path)
+        if not input_path.exists():
+            raise FileNotFoundError(f"输入文件不存在: {input_path}")
+
+        def load() -> bytes:
+            if input_path.suffix.lower() in {".pbm", ".pgm", ".ppm", ".bmp"}:
+                return input_path.read_bytes()
+            try:
+                return PackedBitmap.from_image(input_path, threshold).to_pbm()
+            except Exception as conv_err:
+                raise RuntimeError(f"无法转换输入文件为PBM格式: {conv_err}")
+
+        pbm_bytes = await asyncio.to_thread(load)
+        return await self.trace_bitmap_async(pbm_bytes, turdsize=turdsize, alphamax=alphamax,
+                                             edge_mode=edge_mode, debug=debug, turnpolicy=turnpolicy,
+                                             opttolerance=opttolerance, unit=unit, longcurve=longcurve,
+                                             streaming=streaming, timeout=timeout)
+
+    async def trace_bitmap_async(self, pbm_bytes: Union[bytes, PackedBitmap], turdsize: int = 2,
+                                 alphamax: float = 1.0, edge_mode: bool = False, debug: bool = False,
+                                 turnpolicy: str = "minority", opttolerance: float = 0.2, unit: int = 10,
+                                 longcurve: bool = False, streaming: bool = True,
+                                 timeout: Optional[float] = None) -> str:
+        """trace_bitmap() 的异步版本"""
+        from src.tools.async_runner import runner
+
+        if isinstance(pbm_bytes, PackedBitmap):
+            pbm_bytes = pbm_bytes.to_pbm()
+        if streaming and self.streaming_supported:
+            po_cmd = self._potrace_stream_cmd(turdsize, alphamax, turnpolicy, opttolerance, unit, longcurve)
+            try:
+                result = await runner.run("potrace", po_cmd, pbm_bytes, timeout=timeout)
+                return self._stream_result(result, edge_mode, debug)
+            except (ProcessSpawnError, StreamingUnsupported) as e:
+                print(f"管道模式不可用，回退到临时文件模式: {e}")
+                self.streaming_supported = False
+
+        return await asyncio.to_thread(
+            self.trace_bitmap, pbm_bytes, turdsize, alphamax, edge_mode, debug, turnpolicy,
+            opttolerance, unit, longcurve, False)
+
+    def _stream_result(self, result, edge_mode: bool, debug: bool) -> str:
+        result.check(f"{Path(result.cmd[0]).name}执行失败")
+        svg_content = result.stdout.decode("utf-8")
+        if "<svg" not in svg_content:
+            raise StreamingUnsupported("potrace未输出SVG")
+        return self._finish_svg(svg_content, edge_mode, debug)
+
+
+def _run_pipe(cmds: List[List[str]], data: bytes) -> bytes:
+    """把 data 写入第一个命令的 stdin，依次把每个命令的 stdout 接到下一个命令的 stdin，
+    返回最后一个命令的 stdout。写入和 stderr 读取在后台线程中进行，避免管道缓冲区写满死锁。"""
+    procs = []
+    stdin = subprocess.PIPE
+    try:
+        for cmd in cmds:
+            proc = subprocess.Popen(cmd, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if procs:
+                # 父进程不再持有上游的输出端，下游退出时上游才能收到 EOF/SIGPIPE
+                procs[-1].stdout.close()
+            procs.append(proc)
+            stdin = proc.stdout
+    except OSError as e:
+        for proc in procs:
+            proc.kill()
+        raise ProcessSpawnError(f"无法启动 {Path(cmd[0]).name}: {e}")
+
+    stderr = [b""] * len(procs)
+
+    def feed():
+        try:
+            procs[0].stdin.write(data)
+        except (BrokenPipeError, OSError):
+            pass  # 上游提前退出，错误信息由返回码和 stderr 给出
+        finally:
+            try:
+                procs[0].stdin.close()
+            except OSError:
+                pass
+
+    def drain(i):
+        stderr[i] = procs[i].stderr.read()
+
+    threads = [threading.Thread(target=feed, daemon=True)]
+    threads += [threading.Thread(target=drain, args=(i,), daemon=True) for i in range(len(procs))]
+    for t in threads:
+        t.start()
+    out = procs[-1].stdout.read()
+    procs[-1].stdout.close()
+    for proc in procs:
+        proc.wait()
+    for t in threads:
+        t.join()
+
+    for cmd, proc, err in zip(cmds, procs, stderr):
+        if proc.returncode != 0:
+            msg = f"{Path(cmd[0]).name}执行失败: {proc.returncode}"
+            if err:
+                msg += f"\nstderr: {err.decode('utf-8', errors='replace')}"
+            raise RuntimeError(msg)
+    return out
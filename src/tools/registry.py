@@ -0,0 +1,517 @@
+"""
+引擎注册表
+==========
+
+所有矢量化引擎在这里登记：名称、参数表（类型 / 默认值 / 取值范围）、能力标记，
+以及如何用一组参数调用适配器。界面、自动调参、基准测试和批处理都通过注册表
+取得适配器并运行，而不是各自构造适配器、各写一份 if/elif 分发。
+
+适配器实例在第一次使用时创建并一直复用，可执行文件路径只解析一次，
+使用同一个工厂函数的引擎（mkbitmap+potrace / mkbitmap / potrace）共享一个实例；
+构造失败（缺少可执行文件或依赖）的结果同样会被记住，直到调用 invalidate()。
+
+导入本模块只登记元数据，不导入任何适配器模块；启动时不应创建适配器，
+而是在窗口显示后用 preload_async() 在后台预加载，或等第一次使用时再加载。
+
+用法::
+
+    from src.tools.registry import registry
+
+    svg = registry.run("mkbitmap+potrace", "input.png", {"threshold": 140})
+    svg = await registry.arun("vtracer", "input.png")   # 在事件循环中
+    spec = registry.spec("vtracer")
+    print([p.name for p in spec.params], spec.capabilities)
+"""
+
+import asyncio
+import functools
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from src.utils.scratch import scratch
+from src.utils.timing import span
+
+
+# 能力标记
+CAP_SVG = "svg"                # 输出 SVG（否则为中间文件）
+CAP_COLOR = "color"            # 支持彩色输出
+CAP_IN_PROCESS = "in_process"  # 进程内运行，不启动外部可执行文件
+CAP_STREAMING = "streaming"    # 通过管道传递数据，不落盘
+CAP_BATCH = "batch"            # 适配器自带 run_batch，一次进程调用处理多张图
+CAP_GPU = "gpu"                # 可以使用 GPU
+
+
+@dataclass(frozen=True)
+class ParamDef:
+    """引擎的一个参数"""
+    name: str
+    type: type
+    default: Any
+    low: Optional[float] = None
+    high: Optional[float] = None
+    choices: Tuple[str, ...] = ()
+    label: str = ""
+    cost: bool = False               # 是否显著影响耗时（用于耗时模型）
+
+    def coerce(self, value: Any) -> Any:
+        """转换为声明的类型，数值截断到取值范围"""
+        if self.type is bool:
+            value = value.lower() in ("1", "true", "yes", "on") if isinstance(value, str) else bool(value)
+        else:
+            value = self.type(value)
+        if self.choices and value not in self.choices:
+            raise ValueError(f"参数 {self.name} 的取值 {value!r} 不在 {self.choices} 中")
+        if self.low is not None and value < self.low:
+            value = self.type(self.low)
+        if self.high is not None and value > self.high:
+            value = self.type(self.high)
+        return value
+
+
+# 调用方式：(适配器, 输入路径, 已补全的参数, 作业临时目录) -> SVG 文本
+Invoke = Callable[[Any, Path, Dict[str, Any], Path], str]
+# 异步调用方式：参数同上，返回可等待的 SVG 文本
+AsyncInvoke = Callable[[Any, Path, Dict[str, Any], Path], Awaitable[str]]
+
+
+@dataclass
+class EngineSpec:
+    """一个引擎的声明"""
+    name: str
+    factory: Callable[[], Any]
+    invoke: Invoke
+    params: Tuple[ParamDef, ...] = ()
+    capabilities: FrozenSet[str] = frozenset({CAP_SVG})
+    fallback: Optional[str] = None   # 适配器不可用时改用的引擎
+    message: str = ""                # 运行时显示的进度信息
+    description: str = ""
+    listed: bool = True              # 是否出现在界面的引擎列表中
+    preload: bool = True             # 是否参与后台预加载（导入很慢的引擎只在使用时加载）
+    ainvoke: Optional[AsyncInvoke] = None  # 异步调用方式（外部程序在事件循环中等待）
+
+    def resolve(self, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """按参数表补全默认值并转换类型，丢弃本引擎不认识的参数"""
+        params = params or {}
+        return {p.name: p.coerce(params[p.name]) if p.name in params else p.default
+                for p in self.params}
+
+    def unknown(self, params: Optional[Dict[str, Any]]) -> List[str]:
+        """params 中本引擎不认识的参数名（resolve() 会静默丢弃它们）"""
+        known = {p.name for p in self.params}
+        return sorted(name for name in (params or {}) if name not in known)
+
+    def supports(self, capability: str) -> bool:
+        return capability in self.capabilities
+
+
+class EngineRegistry:
+    """引擎声明与长期存活的适配器实例"""
+
+    def __init__(self):
+        self._specs: Dict[str, EngineSpec] = {}
+        # 以工厂函数为键，共用工厂的引擎共享实例
+        self._adapters: Dict[Callable, Any] = {}
+        self._errors: Dict[Callable, str] = {}
+        self._lock = threading.Lock()
+        self._building: Dict[Callable, threading.Lock] = {}
+
+    # ------------------------------------------------------------------
+    # 声明
+    # ------------------------------------------------------------------
+
+    def register(self, spec: EngineSpec) -> EngineSpec:
+        self._specs[spec.name] = spec
+        return spec
+
+    def spec(self, name: str) -> EngineSpec:
+        try:
+            return self._specs[name]
+        except KeyError:
+            raise ValueError(f"不支持的引擎: {name}") from None
+
+    def names(self, listed_only: bool = True) -> List[str]:
+        """按登记顺序返回引擎名称"""
+        return [n for n, s in self._specs.items() if s.listed or not listed_only]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    # ------------------------------------------------------------------
+    # 适配器实例
+    # ------------------------------------------------------------------
+
+    def adapter(self, name: str) -> Any:
+        """返回引擎的适配器实例（首次调用时创建），不可用时抛出 RuntimeError"""
+        key = self.spec(name).factory
+        with self._lock:
+            building = self._building.setdefault(key, threading.Lock())
+        # 每个工厂单独加锁构造，慢的适配器（DiffVG 导入 torch）不阻塞其他引擎
+        with building:
+            if key in self._adapters:
+                return self._adapters[key]
+            if key in self._errors:
+                raise RuntimeError(f"{name} 不可用: {self._errors[key]}")
+            try:
+                with span("engine_init", engine=name):
+                    instance = key()
+            except Exception as e:
+                self._errors[key] = str(e)
+                raise RuntimeError(f"{name} 不可用: {e}") from e
+            self._adapters[key] = instance
+            return instance
+
+    def available(self, name: str) -> bool:
+        try:
+            self.adapter(name)
+            return True
+        except RuntimeError:
+            return False
+
+    def error(self, name: str) -> Optional[str]:
+        """最近一次构造失败的原因"""
+        return self._errors.get(self.spec(name).factory)
+
+    def preload(self, names: Optional[Iterable[str]] = None) -> Dict[str, Optional[str]]:
+        """创建适配器实例，返回 {引擎: 失败原因或 None}
+
+        不指定 names 时只加载 preload=True 的引擎。
+        """
+        if names is None:
+            names = [n for n, s in self._specs.items() if s.preload]
+        status = {}
+        for name in names:
+            try:
+                self.adapter(name)
+                status[name] = None
+            except RuntimeError:
+                status[name] = self.error(name)
+        return status
+
+    def preload_async(self, names: Optional[Iterable[str]] = None,
+                      callback: Optional[Callable[[Dict[str, Optional[str]]], None]] = None
+                      ) -> threading.Thread:
+        """在后台线程中预加载，完成后以 preload() 的结果调用 callback"""
+        def work():
+            status = self.preload(names)
+            if callback:
+                callback(status)
+
+        thread = threading.Thread(target=work, name="engine-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def invalidate(self, name: Optional[str] = None):
+        """丢弃缓存的实例和失败记录（例如安装了新的可执行文件之后）"""
+        with self._lock:
+            if name is None:
+                self._adapters.clear()
+                self._errors.clear()
+            else:
+                key = self.spec(name).factory
+                self._adapters.pop(key, None)
+                self._errors.pop(key, None)
+
+    # ------------------------------------------------------------------
+    # 运行
+    # ------------------------------------------------------------------
+
+    def select(self, name: str) -> EngineSpec:
+        """返回实际使用的引擎：适配器不可用时沿 fallback 链回退"""
+        spec = self.spec(name)
+        while spec.fallback and not self.available(spec.name):
+            spec = self.spec(spec.fallback)
+        return spec
+
+    def run(self, name: str, input_path, params: Optional[Dict[str, Any]] = None,
+            job_dir: Optional[Path] = None,
+            progress: Optional[Callable[[str], None]] = None) -> str:
+        """用指定引擎处理一张图像
+
+        Args:
+            params: 参数（按参数表补全默认值，多余的键被忽略）
+            job_dir: 作业临时目录；为 None 时临时创建一个
+            progress: 进度信息回调
+        """
+        spec = self.select(name)
+        if progress:
+            if spec.name != name:
+                progress(f"{name} 不可用，改用{spec.name}...")
+            elif spec.message:
+                progress(spec.message)
+        adapter = self.adapter(spec.name)
+        resolved = spec.resolve(params)
+        if job_dir is not None:
+            return spec.invoke(adapter, Path(input_path), resolved, Path(job_dir))
+        with scratch.job("engine") as tmp:
+            return spec.invoke(adapter, Path(input_path), resolved, tmp)
+
+    async def arun(self, name: str, input_path, params: Optional[Dict[str, Any]] = None,
+                   job_dir: Optional[Path] = None, executor=None) -> str:
+        """run() 的异步版本
+
+        声明了 ainvoke 的引擎通过 src.tools.async_runner 在事件循环中等待外部程序，
+        不占用线程；其余引擎（进程内计算）在 executor 线程池中运行 run()。
+        适配器尚未创建时，构造（可能要探测可执行文件）也放到线程池中。
+
+        取消时外部程序被终止；线程中的计算无法中断，取消要等它结束后才传出，
+        调用方随后删除 job_dir 或输入文件是安全的。
+        """
+        loop = asyncio.get_running_loop()
+        if self._resolved(name):
+            spec = self.select(name)
+        else:
+            spec = await loop.run_in_executor(executor, self.select, name)
+        if spec.ainvoke is None:
+            future = loop.run_in_executor(
+                executor, functools.partial(self.run, spec.name, input_path, params, job_dir))
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                await asyncio.wait([future])
+                raise
+        adapter = self.adapter(spec.name)
+        resolved = spec.resolve(params)
+        if job_dir is not None:
+            return await spec.ainvoke(adapter, Path(input_path), resolved, Path(job_dir))
+        with scratch.job("engine") as tmp:
+            return await spec.ainvoke(adapter, Path(input_path), resolved, tmp)
+
+    def _resolved(self, name: str) -> bool:
+        """fallback 链上的适配器是否都已创建或已知失败，即 select() 不会阻塞"""
+        spec = self.spec(name)
+        while spec.factory in self._errors and spec.fallback:
+            spec = self.spec(spec.fallback)
+        return spec.factory in self._adapters or spec.factory in self._errors
+
+    def run_batch(self, name: str, inputs: Iterable, params: Optional[Dict[str, Any]] = None
+                  ) -> List[Tuple[Path, Optional[str], Optional[str]]]:
+        """批量处理，返回 [(输入, SVG 或 None, 错误信息或 None)]
+
+        适配器自带 run_batch（一次进程调用处理多张图）时使用它，否则逐张运行，
+        但始终复用同一个适配器实例。
+        """
+        spec = self.select(name)
+        inputs = [Path(p) for p in inputs]
+        if spec.supports(CAP_BATCH):
+            results = self.adapter(spec.name).run_batch(inputs)
+            return [(r.input_path, r.svg, r.error) for r in results]
+        from src.utils.progress import step
+
+        out = []
+        for i, path in enumerate(inputs):
+            with step(i, len(inputs), f"{i + 1}/{len(inputs)} {path.name}"):
+                try:
+                    out.append((path, self.run(spec.name, path, params), None))
+                except Exception as e:
+                    out.append((path, None, str(e)))
+        return out
+
+
+# ----------------------------------------------------------------------
+# 内置引擎
+# ----------------------------------------------------------------------
+
+def _potrace():
+    from src.tools.potrace_adapter import PotracePipeline
+    return PotracePipeline()
+
+
+def _color_potrace():
+    from src.tools.color_potrace_adapter import ColorPotraceAdapter
+    return ColorPotraceAdapter()
+
+
+def _contour():
+    from src.tools.contour_adapter import ContourTraceAdapter
+    return ContourTraceAdapter()
+
+
+def _superpixel():
+    from src.tools.superpixel_adapter import SuperpixelAdapter
+    return SuperpixelAdapter()
+
+
+def _trace():
+    from src.tools.trace_adapter import TraceAdapter
+    return TraceAdapter()
+
+
+def _tracegui():
+    from src.tools.tracegui_adapter import TraceGuiAdapter
+    return TraceGuiAdapter()
+
+
+def _vtracer():
+    from src.tools.vtracer_adapter import VTracerAdapter
+    return VTracerAdapter()
+
+
+def _diffvg():
+    # 优先使用 Python 3.12 优化版本
+    try:
+        from src.tools.diffvg_adapter_py312 import DiffVGAdapter
+    except ImportError:
+        from src.tools.diffvg_adapter_real import DiffVGAdapter
+    adapter = DiffVGAdapter()
+    if not getattr(adapter, "available", False):
+        raise RuntimeError("DiffVG 模块未加载")
+    return adapter
+
+
+def _run_mkbitmap(adapter, input_path: Path, params: Dict[str, Any], job_dir: Path) -> str:
+    pbm_path = adapter.run_mkbitmap_only(input_path, job_dir / "preprocessed.pbm", **params)
+    return f"已生成PBM文件: {pbm_path}"
+
+
+def _run_diffvg(adapter, input_path: Path, params: Dict[str, Any], job_dir: Path) -> str:
+    # 两种适配器 API：py312 版写出文件并返回布尔值，旧版直接返回 SVG 文本
+    if hasattr(adapter, "vectorize_simple"):
+        out = job_dir / "diffvg.svg"
+        with span("diffvg"):
+            ok = adapter.vectorize(str(input_path), str(out), num_shapes=params["num_paths"],
+                                   max_iter=params["iterations"], use_pytorch=params["use_pytorch"])
+        if not ok:
+            raise RuntimeError("DiffVG矢量化失败")
+        with span("svg_readback"):
+            return out.read_text(encoding="utf-8")
+    with span("diffvg"):
+        return adapter.vectorize(str(input_path), num_paths=params["num_paths"],
+                                 iterations=params["iterations"],
+                                 learning_rate=params["learning_rate"],
+                                 mode=params["mode"], loss_type=params["loss_type"])
+
+
+def _call(method: str) -> Invoke:
+    """参数名与适配器方法的关键字参数一一对应时的调用方式"""
+    return lambda adapter, input_path, params, job_dir: getattr(adapter, method)(input_path, **params)
+
+
+def _acall(method: str) -> AsyncInvoke:
+    """_call() 的异步版本，method 是适配器的 async 方法"""
+    return lambda adapter, input_path, params, job_dir: getattr(adapter, method)(input_path, **params)
+
+
+_THRESHOLD = ParamDef("threshold", int, 128, 0, 255, label="阈值")
+_TURDSIZE = ParamDef("turdsize", int, 2, 0, 1000, label="斑点过滤")
+_ALPHAMAX = ParamDef("alphamax", float, 1.0, 0.0, 2.0, label="平滑度")
+_DEBUG = ParamDef("debug", bool, False, label="调试模式")
+_INVERT = ParamDef("invert", bool, False, label="反转图像")
+_BLUR = ParamDef("blur_radius", float, 0.0, 0.0, 10.0, label="模糊半径")
+_MKBITMAP = (
+    ParamDef("filter_radius", int, 4, 0, 20, label="滤波半径"),
+    ParamDef("scale_factor", int, 2, 1, 5, label="缩放因子", cost=True),
+    _BLUR,
+)
+_POTRACE = (
+    _TURDSIZE,
+    _ALPHAMAX,
+    ParamDef("edge_mode", bool, False, label="细线边缘模式"),
+    _DEBUG,
+    ParamDef("turnpolicy", str, "minority",
+             choices=("minority", "majority", "black", "white", "right", "left", "random"),
+             label="转向策略"),
+    ParamDef("opttolerance", float, 0.2, 0.0, 1.0, label="优化容差"),
+    ParamDef("unit", int, 10, 1, 100, label="量化单位"),
+    ParamDef("longcurve", bool, False, label="禁用曲线优化"),
+)
+
+registry = EngineRegistry()
+
+registry.register(EngineSpec(
+    "mkbitmap+potrace", _potrace, _call("run"),
+    params=(_THRESHOLD, *_POTRACE, *_MKBITMAP, _INVERT),
+    capabilities=frozenset({CAP_SVG, CAP_STREAMING}),
+    fallback="内置追踪", message="正在运行mkbitmap...",
+    description="mkbitmap 预处理后用 potrace 追踪",
+    ainvoke=_acall("run_async"),
+))
+registry.register(EngineSpec(
+    "mkbitmap", _potrace, _run_mkbitmap,
+    params=(_THRESHOLD, _DEBUG, *_MKBITMAP, _INVERT),
+    capabilities=frozenset(), message="正在运行mkbitmap...",
+    description="只运行 mkbitmap，输出预处理后的 PBM",
+))
+registry.register(EngineSpec(
+    "potrace", _potrace, _call("run_potrace_only"),
+    params=(_THRESHOLD, *_POTRACE),
+    capabilities=frozenset({CAP_SVG, CAP_STREAMING}),
+    fallback="内置追踪", message="正在运行potrace...",
+    description="直接用 potrace 追踪",
+    ainvoke=_acall("run_potrace_only_async"),
+))
+registry.register(EngineSpec(
+    "彩色potrace", _color_potrace, _call("run"),
+    params=(
+        ParamDef("n_colors", int, 8, 2, 64, label="颜色数", cost=True),
+        _TURDSIZE,
+        _ALPHAMAX,
+        ParamDef("stacked", bool, True, label="叠放模式"),
+        _DEBUG,
+    ),
+    capabilities=frozenset({CAP_SVG, CAP_COLOR, CAP_STREAMING}),
+    message="正在分色并并行追踪各颜色层...",
+    description="颜色量化后逐层用 potrace 追踪",
+))
+registry.register(EngineSpec(
+    "内置追踪", _contour, _call("run"),
+    params=(_THRESHOLD, _TURDSIZE, _ALPHAMAX, _INVERT, _BLUR, _DEBUG),
+    capabilities=frozenset({CAP_SVG, CAP_IN_PROCESS}),
+    message="正在运行内置追踪...",
+    description="scikit-image 轮廓提取，不需要外部可执行文件",
+))
+registry.register(EngineSpec(
+    "Trace(.NET)", _trace, lambda adapter, input_path, params, job_dir: adapter.run(input_path),
+    capabilities=frozenset({CAP_SVG, CAP_BATCH}),
+    message="正在运行Trace...",
+    description=".NET 版 Trace（BitmapToVector）",
+    ainvoke=lambda adapter, input_path, params, job_dir: adapter.run_async(input_path),
+))
+registry.register(EngineSpec(
+    "vtracer", _vtracer, _call("run"),
+    params=(
+        ParamDef("colormode", str, "color", choices=("color", "binary"), label="颜色模式"),
+        ParamDef("mode", str, "spline", choices=("spline", "polygon", "none"), label="曲线模式"),
+        ParamDef("filter_speckle", int, 4, 0, 100, label="斑点过滤"),
+        ParamDef("path_precision", int, 8, 1, 20, label="路径精度"),
+    ),
+    capabilities=frozenset({CAP_SVG, CAP_COLOR}),
+    message="正在运行vtracer...",
+    description="vtracer 彩色矢量化",
+    ainvoke=_acall("run_async"),
+))
+registry.register(EngineSpec(
+    "超像素", _superpixel, _call("run"),
+    params=(
+        ParamDef("n_segments", int, 400, 10, 20000, label="超像素数量", cost=True),
+        ParamDef("compactness", float, 10.0, 0.1, 100.0, label="紧凑度"),
+        ParamDef("tolerance", float, 1.0, 0.0, 10.0, label="简化容差"),
+        ParamDef("fast", bool, True, label="快速分割"),
+    ),
+    capabilities=frozenset({CAP_SVG, CAP_COLOR, CAP_IN_PROCESS}),
+    message="正在进行超像素分割并提取区域边界...",
+    description="SLIC 超像素分割后追踪区域边界",
+))
+registry.register(EngineSpec(
+    "DiffVG", _diffvg, _run_diffvg,
+    params=(
+        ParamDef("num_paths", int, 50, 5, 500, label="路径数量", cost=True),
+        ParamDef("iterations", int, 200, 50, 1000, label="迭代次数", cost=True),
+        ParamDef("learning_rate", float, 0.01, 0.001, 1.0, label="学习率"),
+        ParamDef("mode", str, "painterly",
+                 choices=("painterly", "svg_refinement", "path_optimization"), label="模式"),
+        ParamDef("loss_type", str, "lpips", choices=("l2", "lpips", "combined"), label="损失函数"),
+        ParamDef("use_pytorch", bool, False, label="使用 PyTorch"),
+    ),
+    capabilities=frozenset({CAP_SVG, CAP_COLOR, CAP_IN_PROCESS, CAP_GPU}),
+    message="正在运行 DiffVG...",
+    description="可微分渲染优化路径",
+    preload=False,  # 会导入 torch，只在第一次使用时加载
+))
+registry.register(EngineSpec(
+    "TraceGui", _tracegui, lambda adapter, input_path, params, job_dir: adapter.run(input_path),
+    message="正在运行TraceGui...",
+    description="TraceGui 命令行模式",
+    listed=False,
+))
@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from src.utils.timing import span
+
+
+class SuperpixelAdapter:
+    """超像素矢量化：SLIC 分割后把每个超像素的边界转换为填充路径。
+
+    纯 Python/NumPy 实现，在进程内运行，不依赖外部可执行文件。
+    """
+
+    def run(self, input_path: Path, n_segments: int = 400, compactness: float = 10.0,
+            tolerance: float = 1.0, fast: bool = True, debug: bool = False) -> str:
+        """运行超像素矢量化
+
+        Args:
+            n_segments: 超像素数量（近似）
+            compactness: SLIC 紧凑度，越大区域越规则
+            tolerance: 边界简化容差（像素）
+            fast: 使用缩小图像分割的快速模式
+        """
+        from src.processing.color_segment import SegmentParams, segment_and_sample_colors
+        from src.processing.region_trace import labels_to_svg
+
+        input_path = Path(input_path)
+        if not input_path.exists():
+            raise FileNotFoundError(f"输入文件不存在: {input_path}")
+
+        params = SegmentParams(n_segments=n_segments, compactness=compactness, fast=fast)
+        with span("segment", fast=fast):
+            labels, colors = segment_and_sample_colors(input_path, params)
+        if debug:
+            print(f"超像素数量: {int(labels.max()) + 1}")
+        with span("region_trace"):
+            return labels_to_svg(labels, colors, tolerance=tolerance)
@@ -1,9 +1,34 @@
 import subprocess
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from src.utils.progress import report
+from src.utils.scratch import scratch
+from src.utils.timing import span
+
+
+@dataclass
+class TraceBatchResult:
+    input_path: Path
+    svg: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.svg is not None
 
 
 class TraceAdapter:
     """调用 .NET 版 Trace 可执行文件（BitmapToVector）"""
+
+    # 每个可执行文件是否支持一次传入多组 <input> <output>，首次批处理时探测；
+    # 没有可靠结论（输入本身有问题或调用超时）时不记录，下次继续探测
+    _multi_pair_support: Dict[str, bool] = {}
+
+    # 单次调用的文件对数和命令行长度上限（Windows 命令行最长 32767 字符）
+    BATCH_SIZE = 64
+    MAX_CMDLINE = 30000
     
     def __init__(self):
         # 使用新的路径管理器
@@ -23,24 +48,141 @@ class TraceAdapter:
         exe = str(self.trace_exe)
 
         # Trace.exe 的用法: Trace.exe <input> [output]
-        # 如果不指定输出，它会自动生成 input.svg
-        output_path = input_path.parent / f"{input_path.stem}.svg"
+        # 输出写到作业临时目录，避免同名输入的并发作业互相覆盖，也不在源目录产生写入
+        with scratch.job("trace") as job_dir:
+            return self._run_single(exe, input_path, job_dir / f"{input_path.stem}.svg", None)
 
-        cmd = [exe, str(input_path), str(output_path)]
-        proc = subprocess.run(cmd, capture_output=True, text=True)
+    async def run_async(self, input_path: Path, timeout: Optional[float] = None) -> str:
+        """run() 的异步版本：在事件循环中等待 Trace 进程，不占用线程"""
+        from src.tools.async_runner import runner
 
-        if proc.returncode != 0:
-            error_msg = proc.stderr or proc.stdout
-            raise RuntimeError(f"Trace 执行失败: {error_msg}")
+        input_path = Path(input_path)
+        if not input_path.exists():
+            raise FileNotFoundError(input_path)
+        with scratch.job("trace") as job_dir:
+            output_path = job_dir / f"{input_path.stem}.svg"
+            cmd = [str(self.trace_exe), str(input_path), str(output_path)]
+            result = await runner.run("trace", cmd, timeout=timeout)
+            if not result.ok:
+                out = (result.stderr or result.stdout).decode("utf-8", errors="replace")
+                raise RuntimeError(f"Trace 执行失败: {out}")
+            if not output_path.exists():
+                raise RuntimeError(f"Trace 没有生成输出文件: {output_path}")
+            return output_path.read_text(encoding='utf-8')
 
-        # 检查输出文件是否生成
-        if output_path.exists():
-            svg_content = output_path.read_text(encoding='utf-8')
-            # 清理临时文件
+    def run_batch(self, input_paths: Iterable[Path], timeout: Optional[float] = None) -> List[TraceBatchResult]:
+        """批量转换：一次启动 Trace 处理多张图像，分摊 .NET 运行时启动和 JIT 的开销
+
+        以 "Trace.exe in1 out1 in2 out2 ..." 的形式调用。支持情况未知时先用两个文件探测：
+        两组都有输出即支持；否则把这两个文件逐个处理，都能成功才说明不支持多组参数
+        （单个文件失败或调用超时时不下结论，用后面的文件继续探测）。
+        timeout 是单个文件的时限，一次处理多个文件时按文件数放大。
+        输出写入临时目录，不会在输入文件旁边留下文件。
+        """
+        inputs = [Path(p) for p in input_paths]
+        results = [TraceBatchResult(p) for p in inputs]
+        pending = []
+        for i, p in enumerate(inputs):
+            if p.exists():
+                pending.append(i)
+            else:
+                results[i].error = f"输入文件不存在: {p}"
+        if not pending:
+            return results
+
+        exe = str(self.trace_exe)
+        done = 0
+
+        def collect(i: int) -> bool:
+            nonlocal done
+            if not outputs[i].exists():
+                return False
+            with span("svg_readback"):
+                results[i].svg = outputs[i].read_text(encoding='utf-8')
+            done += 1
+            report(done, len(pending), f"Trace 批量 {done}/{len(pending)}")
+            return True
+
+        def single(i: int) -> bool:
+            nonlocal done
             try:
-                output_path.unlink()
-            except:
-                pass
-            return svg_content
-        else:
+                results[i].svg = self._run_single(exe, inputs[i], outputs[i], timeout)
+                results[i].error = None
+            except Exception as e:
+                results[i].error = str(e)
+            done += 1
+            report(done, len(pending), f"Trace 批量 {done}/{len(pending)}")
+            return results[i].ok
+
+        with scratch.job("trace_batch") as out_dir:
+            outputs = {i: out_dir / f"{i:05d}_{inputs[i].stem}.svg" for i in pending}
+            queue = list(pending)
+
+            while self._multi_pair_support.get(exe) is None and len(queue) >= 2:
+                probe, queue = queue[:2], queue[2:]
+                timed_out = self._run_multi(exe, probe, inputs, outputs, timeout)
+                missing = [i for i in probe if not collect(i)]
+                if not missing:
+                    self._multi_pair_support[exe] = True
+                    continue
+                singles_ok = all([single(i) for i in missing])
+                if singles_ok and not timed_out:
+                    self._multi_pair_support[exe] = False
+                    print("Trace 不支持一次处理多个文件，回退为逐个调用")
+
+            leftover = []
+            if self._multi_pair_support.get(exe):
+                for chunk in self._chunks(exe, queue, inputs, outputs):
+                    if len(chunk) == 1:
+                        leftover.extend(chunk)
+                        continue
+                    self._run_multi(exe, chunk, inputs, outputs, timeout)
+                    leftover.extend(i for i in chunk if not collect(i))
+            else:
+                leftover = queue
+
+            # 逐个文件处理批量调用没有产出的输入
+            for i in leftover:
+                single(i)
+        return results
+
+    def _run_multi(self, exe: str, chunk: List[int], inputs: List[Path], outputs: Dict[int, Path],
+                   timeout: Optional[float]) -> bool:
+        """一次调用处理 chunk 中的所有文件，返回是否超时"""
+        cmd = [exe]
+        for i in chunk:
+            cmd += [str(inputs[i]), str(outputs[i])]
+        with span("trace_batch", files=len(chunk)):
+            try:
+                subprocess.run(cmd, capture_output=True, text=True,
+                               timeout=timeout * len(chunk) if timeout else None)
+            except subprocess.TimeoutExpired:
+                return True
+        return False
+
+    def _chunks(self, exe: str, pending: List[int], inputs: List[Path], outputs: Dict[int, Path]):
+        chunk: List[int] = []
+        length = len(exe)
+        for i in pending:
+            cost = len(str(inputs[i])) + len(str(outputs[i])) + 6
+            if chunk and (len(chunk) >= self.BATCH_SIZE or length + cost > self.MAX_CMDLINE):
+                yield chunk
+                chunk, length = [], len(exe)
+            chunk.append(i)
+            length += cost
+        if chunk:
+            yield chunk
+
+    def _run_single(self, exe: str, input_path: Path, output_path: Path, timeout: Optional[float]) -> str:
+        cmd = [exe, str(input_path), str(output_path)]
+        with span("trace"):
+            try:
+                proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                raise RuntimeError("Trace 执行超时")
+        if proc.returncode != 0:
+            raise RuntimeError(f"Trace 执行失败: {proc.stderr or proc.stdout}")
+        if not output_path.exists():
             raise RuntimeError(f"Trace 没有生成输出文件: {output_path}")
+        with span("svg_readback"):
+            return output_path.read_text(encoding='utf-8')
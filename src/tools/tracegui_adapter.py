@@ -1,6 +1,9 @@
 import subprocess
 from pathlib import Path
 
+from src.utils.scratch import scratch
+from src.utils.timing import span
+
 
 class TraceGuiAdapter:
     """调用 TraceGui 可执行文件进行位图转矢量
@@ -23,7 +26,7 @@ class TraceGuiAdapter:
 
         Args:
             input_path: 输入图像文件路径
-            output_path: 输出SVG文件路径，如果为None则使用默认名称
+            output_path: 输出SVG文件路径，如果为None则写入作业临时目录
 
         Returns:
             SVG内容字符串
@@ -32,12 +35,13 @@ class TraceGuiAdapter:
         if not input_path.exists():
             raise FileNotFoundError(f"输入文件不存在: {input_path}")
 
-        exe = str(self.tracegui_exe)
-
         if output_path is None:
-            output_path = input_path.parent / f"{input_path.stem}_trace.svg"
+            with scratch.job("tracegui") as job_dir:
+                return self._run(input_path, job_dir / f"{input_path.stem}_trace.svg")
+        return self._run(input_path, Path(output_path))
 
-        output_path = Path(output_path)
+    def _run(self, input_path: Path, output_path: Path) -> str:
+        exe = str(self.tracegui_exe)
 
         # TraceGui 的命令行参数
         # 通常格式: TraceGui.exe input.png output.svg [options]
@@ -45,7 +49,8 @@ class TraceGuiAdapter:
 
         try:
             # 运行TraceGui
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+            with span("tracegui"):
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
 
             if result.returncode != 0:
                 error_msg = result.stderr or result.stdout
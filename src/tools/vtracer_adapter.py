@@ -3,9 +3,11 @@ from __future__ import annotations
 import shutil
 import subprocess
 from pathlib import Path
-from tempfile import TemporaryDirectory
 from typing import Optional
 
+from src.utils.scratch import scratch
+from src.utils.timing import span
+
 
 class VTracerAdapter:
     """调用 vtracer 可执行文件，将位图转换为 SVG 文本。"""
@@ -38,26 +40,57 @@ class VTracerAdapter:
         if not input_path.exists():
             raise FileNotFoundError(input_path)
 
-        with TemporaryDirectory() as td:
-            out_svg = Path(td) / "out.svg"
-            cmd = [
-                self.vtracer,
-                "--input",
-                str(input_path),
-                "--output",
-                str(out_svg),
-                "--colormode",
-                colormode,
-                "--mode",
-                mode,
-                "--filter_speckle",
-                str(filter_speckle),
-                "--path_precision",
-                str(path_precision),
-            ]
-            self._run(cmd, "vtracer 执行失败")
+        with scratch.job("vtracer") as job_dir:
+            out_svg = job_dir / "out.svg"
+            cmd = self._command(input_path, out_svg, colormode, mode, filter_speckle, path_precision)
+            with span("vtracer"):
+                self._run(cmd, "vtracer 执行失败")
+            with span("svg_readback"):
+                return out_svg.read_text(encoding="utf-8", errors="ignore")
+
+    async def run_async(
+        self,
+        input_path: Path,
+        colormode: str = "color",
+        mode: str = "spline",
+        filter_speckle: int = 4,
+        path_precision: int = 8,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """run() 的异步版本：在事件循环中等待 vtracer 进程，不占用线程"""
+        from src.tools.async_runner import runner
+
+        input_path = Path(input_path)
+        if not input_path.exists():
+            raise FileNotFoundError(input_path)
+
+        with scratch.job("vtracer") as job_dir:
+            out_svg = job_dir / "out.svg"
+            cmd = self._command(input_path, out_svg, colormode, mode, filter_speckle, path_precision)
+            result = await runner.run("vtracer", cmd, timeout=timeout)
+            if not result.ok:
+                stderr = result.stderr.decode(errors='ignore')
+                raise RuntimeError(f"vtracer 执行失败: {stderr or result.stdout.decode(errors='ignore')}")
             return out_svg.read_text(encoding="utf-8", errors="ignore")
 
+    def _command(self, input_path: Path, out_svg: Path, colormode: str, mode: str,
+                 filter_speckle: int, path_precision: int) -> list[str]:
+        return [
+            self.vtracer,
+            "--input",
+            str(input_path),
+            "--output",
+            str(out_svg),
+            "--colormode",
+            colormode,
+            "--mode",
+            mode,
+            "--filter_speckle",
+            str(filter_speckle),
+            "--path_precision",
+            str(path_precision),
+        ]
+
     @staticmethod
     def _run(cmd: list[str], err: str):
         try:
@@ -0,0 +1,17 @@
+"""
+通用工具模块
+============
+
+与界面和具体引擎无关的基础设施。
+"""
+
+from .timing import Timeline, span, current_timeline
+from .scratch import ScratchManager, scratch
+
+__all__ = [
+    'Timeline',
+    'span',
+    'current_timeline',
+    'ScratchManager',
+    'scratch',
+]
@@ -0,0 +1,167 @@
+"""
+引擎耗时模型
+============
+
+根据本机过去的运行记录，为每个引擎拟合“图像像素数 × 参数 → 耗时”的模型，
+用于显示剩余时间（ETA）和发现异常慢的作业。
+
+模型在对数空间做带岭正则的最小二乘::
+
+    log(秒) = w0 + w1 * log(像素数) + Σ w_k * log(1 + 参数_k)
+
+参与拟合的参数由引擎注册表中 ParamDef.cost=True 的参数决定
+（如 DiffVG 的路径数与迭代次数）。样本不足时退化为“每百万像素耗时”的中位数。
+样本保存在用户数据目录的 cost_model.json 中，每个引擎保留最近 MAX_SAMPLES 条。
+"""
+
+import json
+import math
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+MAX_SAMPLES = 200
+# 回归至少需要的样本数（再少就用每百万像素耗时的中位数）
+MIN_FIT_SAMPLES = 6
+RIDGE = 1e-3
+
+
+def image_pixels(path) -> Optional[int]:
+    """只读取图像文件头得到像素数"""
+    try:
+        from PIL import Image
+        with Image.open(path) as img:
+            w, h = img.size
+        return w * h
+    except Exception:
+        return None
+
+
+class CostModel:
+    """各引擎的耗时模型（线程安全）"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self._path = Path(path) if path is not None else None
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[Dict[str, Any]]] = {}
+        self._weights: Dict[str, Optional[np.ndarray]] = {}
+        self._loaded = False
+
+    @property
+    def path(self) -> Path:
+        if self._path is None:
+            from src.config.paths import paths
+            self._path = paths.USER_DATA_DIR / "cost_model.json"
+        return self._path
+
+    # ------------------------------------------------------------------
+    # 样本
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            self._samples = json.loads(self.path.read_text(encoding="utf-8")).get("samples", {})
+        except (OSError, ValueError):
+            self._samples = {}
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"samples": self._samples}, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(self.path)
+        except OSError as e:
+            print(f"写入耗时模型失败: {e}")
+
+    def record(self, engine: str, pixels: Optional[int], params: Dict[str, Any], seconds: float):
+        """记录一次成功运行"""
+        if not pixels or seconds <= 0:
+            return
+        features = _cost_params(engine, params)
+        with self._lock:
+            self._load()
+            samples = self._samples.setdefault(engine, [])
+            samples.append({"pixels": int(pixels), "params": features, "seconds": float(seconds)})
+            del samples[:-MAX_SAMPLES]
+            self._weights.pop(engine, None)
+            self._save()
+
+    def samples(self, engine: str) -> int:
+        with self._lock:
+            self._load()
+            return len(self._samples.get(engine, []))
+
+    # ------------------------------------------------------------------
+    # 预测
+    # ------------------------------------------------------------------
+
+    def predict(self, engine: str, pixels: Optional[int], params: Dict[str, Any]) -> Optional[float]:
+        """预测耗时（秒）；没有任何样本或不知道像素数时返回 None"""
+        if not pixels:
+            return None
+        features = _cost_params(engine, params)
+        with self._lock:
+            self._load()
+            samples = self._samples.get(engine)
+            if not samples:
+                return None
+            names = sorted(features)
+            if engine not in self._weights:
+                self._weights[engine] = _fit(samples, names)
+            weights = self._weights[engine]
+        if weights is None or len(weights) != len(names) + 2:
+            # 样本太少：按每百万像素耗时的中位数估计
+            rates = [s["seconds"] / (s["pixels"] / 1e6) for s in samples]
+            return float(np.median(rates)) * pixels / 1e6
+        x = _row(pixels, features, names)
+        return float(math.exp(float(x @ weights)))
+
+
+def _cost_params(engine: str, params: Dict[str, Any]) -> Dict[str, float]:
+    """取出注册表中标记为影响耗时的数值参数"""
+    from src.tools.registry import registry
+    if engine not in registry:
+        return {}
+    spec = registry.spec(engine)
+    resolved = spec.resolve(params)
+    return {p.name: float(resolved[p.name]) for p in spec.params if p.cost}
+
+
+def _row(pixels: int, features: Dict[str, float], names: Sequence[str]) -> np.ndarray:
+    return np.array([1.0, math.log(max(pixels, 1))]
+                    + [math.log1p(max(features.get(n, 0.0), 0.0)) for n in names])
+
+
+def _fit(samples: List[Dict[str, Any]], names: Sequence[str]) -> Optional[np.ndarray]:
+    if len(samples) < MIN_FIT_SAMPLES:
+        return None
+    X = np.stack([_row(s["pixels"], s["params"], names) for s in samples])
+    y = np.log([max(s["seconds"], 1e-4) for s in samples])
+    # 不对截距做正则
+    reg = RIDGE * np.eye(X.shape[1])
+    reg[0, 0] = 0.0
+    try:
+        return np.linalg.solve(X.T @ X + reg, X.T @ y)
+    except np.linalg.LinAlgError:
+        return None
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return ""
+    seconds = max(0, int(round(seconds)))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+# 全局实例（首次使用时才读取样本文件）
+cost_model = CostModel()
@@ -0,0 +1,97 @@
+"""
+数值进度
+========
+
+与 timing.span() 相同的用法：作业在工作线程中激活一个 Progress，
+引擎内部只需::
+
+    from src.utils.progress import report
+
+    for t in range(num_iter):
+        ...
+        report(t + 1, num_iter, "优化")
+
+没有激活的 Progress 时 report() 什么也不做。回调按时间节流（默认 100ms 一次），
+完成（done == total）时总会触发，因此可以在每次迭代中调用。
+
+逐项处理的批量调用用 step(i, n) 把每一项内部报告的进度映射到整体的
+[i/n, (i+1)/n] 区间。
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+
+_local = threading.local()
+
+
+class Progress:
+    """一个作业的进度，fraction 在 [0, 1]"""
+
+    def __init__(self, callback: Optional[Callable[[float, str], None]] = None,
+                 min_interval_s: float = 0.1):
+        self.callback = callback
+        self.min_interval_s = min_interval_s
+        self.fraction = 0.0
+        self.message = ""
+        self._last_emit = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, done: float, total: float, message: str = ""):
+        if total <= 0:
+            return
+        fraction = min(max(done / total, 0.0), 1.0)
+        with self._lock:
+            # 进度只增不减（多个线程交错报告时保持单调）
+            self.fraction = max(self.fraction, fraction)
+            if message:
+                self.message = message
+            now = time.perf_counter()
+            if done < total and now - self._last_emit < self.min_interval_s:
+                return
+            self._last_emit = now
+            fraction, message = self.fraction, self.message
+        if self.callback:
+            self.callback(fraction, message)
+
+    @contextmanager
+    def activate(self):
+        """在当前线程激活，使模块级 report() 报告到本 Progress"""
+        previous = getattr(_local, "progress", None)
+        _local.progress = self
+        try:
+            yield self
+        finally:
+            _local.progress = previous
+
+
+def current() -> Optional[Progress]:
+    """当前线程激活的 Progress（没有则为 None）"""
+    return getattr(_local, "progress", None)
+
+
+def report(done: float, total: float, message: str = ""):
+    """报告当前作业的进度；未激活时不做任何事"""
+    progress = getattr(_local, "progress", None)
+    if progress is not None:
+        progress.update(done, total, message)
+
+
+@contextmanager
+def step(index: int, count: int, message: str = ""):
+    """处理第 index 项（共 count 项）期间，把内部报告映射到整体进度的对应区间"""
+    parent = getattr(_local, "progress", None)
+    if parent is None or count <= 0:
+        yield None
+        return
+    parent.update(index, count, message)
+
+    def forward(fraction: float, inner_message: str):
+        parent.update(index + fraction, count, inner_message or message)
+
+    child = Progress(forward, min_interval_s=0.0)
+    with child.activate():
+        yield child
+    parent.update(index + 1, count, message)
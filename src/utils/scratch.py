@@ -0,0 +1,142 @@
+"""
+临时工作区
+==========
+
+所有引擎的中间文件和输出都写到每个作业独立的临时目录里，
+而不是输入文件旁边：
+
+- 同名输入的并发作业互不干扰；
+- 源目录（可能是慢速网络共享）没有写入流量；
+- 作业结束后整个目录被删除，进程崩溃留下的目录在下次启动时清理。
+
+优先使用内存文件系统（Linux 的 /dev/shm），剩余空间不足时回退到系统临时目录。
+可以用环境变量 RVS_SCRATCH_DIR 指定位置，作业目录放在其下的 rvs-scratch 子目录中；
+清理残留时只删除本模块创建的作业目录（名称为已知前缀加 mkdtemp 的随机后缀）。
+
+用法::
+
+    from src.utils.scratch import scratch
+
+    with scratch.job("trace") as job_dir:
+        out = job_dir / "out.svg"
+        ...
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+# 内存文件系统至少要有这么多剩余空间才使用
+MIN_RAM_FREE = 512 * 1024 * 1024
+# 超过这个时间的残留作业目录视为崩溃遗留
+STALE_AGE_S = 24 * 3600
+# 根目录下存放作业目录的子目录
+SUBDIR = "rvs-scratch"
+# 各适配器使用的作业目录前缀；job() 使用的其他前缀在运行时追加
+JOB_PREFIXES = {"job", "engine", "trace", "trace_batch", "tracegui", "potrace", "mkbitmap",
+                "vtracer", "service", "vectorize"}
+# tempfile.mkdtemp 随机后缀的长度
+_RANDOM_SUFFIX_LEN = 8
+
+
+class ScratchManager:
+    """管理每个作业的临时目录"""
+
+    def __init__(self, root: Optional[Path] = None, min_ram_free: int = MIN_RAM_FREE):
+        self._explicit_root = Path(root) if root else None
+        self.min_ram_free = min_ram_free
+        self._lock = threading.Lock()
+        self._cleaned = False
+
+    def candidates(self):
+        """按优先级排列的候选根目录"""
+        env = os.environ.get("RVS_SCRATCH_DIR")
+        # 指定的目录可能是 /tmp 或用户的工作目录，作业目录一律放在专用子目录中
+        if self._explicit_root:
+            return [self._explicit_root / SUBDIR]
+        if env:
+            return [Path(env) / SUBDIR]
+        roots = []
+        shm = Path("/dev/shm")
+        if shm.is_dir() and os.access(shm, os.W_OK):
+            roots.append(shm / SUBDIR)
+        roots.append(Path(tempfile.gettempdir()) / SUBDIR)
+        return roots
+
+    def root(self, need_bytes: int = 0) -> Path:
+        """选择根目录：内存文件系统剩余空间不足时跳过"""
+        candidates = self.candidates()
+        for i, root in enumerate(candidates):
+            last = i == len(candidates) - 1
+            try:
+                root.mkdir(parents=True, exist_ok=True)
+                if not last and str(root).startswith("/dev/shm"):
+                    free = shutil.disk_usage(root).free
+                    if free < self.min_ram_free + need_bytes:
+                        continue
+                return root
+            except OSError:
+                if last:
+                    raise
+        return candidates[-1]
+
+    @contextmanager
+    def job(self, prefix: str = "job", keep: bool = False, need_bytes: int = 0) -> Iterator[Path]:
+        """创建一个作业目录，退出时删除（keep=True 时保留，便于调试）"""
+        JOB_PREFIXES.add(prefix)
+        root = self.root(need_bytes)
+        self._cleanup_once(root)
+        job_dir = Path(tempfile.mkdtemp(prefix=f"{prefix}_", dir=root))
+        try:
+            yield job_dir
+        finally:
+            if keep:
+                print(f"保留临时目录: {job_dir}")
+            else:
+                shutil.rmtree(job_dir, ignore_errors=True)
+
+    def cleanup_stale(self, root: Optional[Path] = None, max_age_s: float = STALE_AGE_S) -> int:
+        """删除残留的过期作业目录，返回删除数量
+
+        只删除名称符合作业目录格式（已知前缀 + "_" + 随机后缀）的目录。
+        """
+        removed = 0
+        now = time.time()
+        roots = [root] if root else self.candidates()
+        for r in roots:
+            if not r.is_dir():
+                continue
+            for entry in r.iterdir():
+                try:
+                    if (_is_job_dir_name(entry.name) and entry.is_dir()
+                            and now - entry.stat().st_mtime > max_age_s):
+                        shutil.rmtree(entry, ignore_errors=True)
+                        removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def _cleanup_once(self, root: Path):
+        with self._lock:
+            if self._cleaned:
+                return
+            self._cleaned = True
+        removed = self.cleanup_stale(root)
+        if removed:
+            print(f"已清理 {removed} 个残留临时目录")
+
+
+def _is_job_dir_name(name: str) -> bool:
+    # 随机后缀本身可能含 "_"，按前缀和总长度判断
+    return any(name.startswith(p + "_") and len(name) == len(p) + 1 + _RANDOM_SUFFIX_LEN
+               for p in JOB_PREFIXES)
+
+
+# 全局实例
+scratch = ScratchManager()
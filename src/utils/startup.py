@@ -0,0 +1,233 @@
+"""
+启动计时
+========
+
+记录从 ``python start.py`` 到窗口可用之间的时间花在了哪里：
+
+- 应用阶段：Qt 导入、QApplication 创建、主窗口构造、编辑器页面加载等，
+  由 start.py 和界面代码用 phase() / mark() 记录；
+- 模块导入：子进程以 ``-X importtime`` 运行，解析其输出得到每个模块的导入耗时。
+
+``python start.py --profile-startup`` 会以子进程重新启动应用，
+窗口可用后自动退出并打印报告；benchmarks/startup_budget.py 用同样的方式
+检查启动耗时是否超出预算。
+
+未启用时 phase() 返回空上下文管理器，mark() 直接返回，界面代码可以放心调用。
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.utils.timing import Timeline, null_span
+
+
+# 子进程把应用阶段写到这个环境变量指定的 JSON 文件
+PROFILE_ENV = "RVS_STARTUP_PROFILE"
+
+_timeline: Optional[Timeline] = None
+_marks: Dict[str, float] = {}
+
+_IMPORTTIME = re.compile(r"import time:\s*(\d+)\s*\|\s*(\d+)\s*\|( *)(\S+)")
+
+
+# ----------------------------------------------------------------------
+# 子进程（被测应用）一侧
+# ----------------------------------------------------------------------
+
+def enable() -> Timeline:
+    """开启启动计时（在 start.py 的 main() 开头调用）"""
+    global _timeline
+    if _timeline is None:
+        _timeline = Timeline("startup", enabled=True)
+        _timeline.meta["started_epoch"] = time.time()
+    return _timeline
+
+
+def enabled() -> bool:
+    return _timeline is not None
+
+
+def phase(name: str, **meta):
+    """计时一个启动阶段"""
+    if _timeline is None:
+        return null_span()
+    return _timeline.span(name, **meta)
+
+
+def add(name: str, start: float, **meta):
+    """记录一个从 start（time.perf_counter()）到现在的异步阶段，如页面加载"""
+    if _timeline is not None:
+        _timeline.add(name, start, **meta)
+
+
+def mark(name: str):
+    """记录一个时间点（相对启动计时开始的毫秒数）"""
+    if _timeline is not None and name not in _marks:
+        _marks[name] = round((time.perf_counter() - _timeline._t0) * 1000.0, 3)
+        _timeline.meta.setdefault("marks_epoch", {})[name] = time.time()
+
+
+def marked(name: str) -> bool:
+    return name in _marks
+
+
+def finish() -> Optional[Path]:
+    """写出阶段记录：优先写到 RVS_STARTUP_PROFILE，否则写到计时目录（需 RVS_TIMING=dump）"""
+    if _timeline is None:
+        return None
+    _timeline.meta["marks_ms"] = dict(_marks)
+    target = os.environ.get(PROFILE_ENV)
+    if not target:
+        return _timeline.dump_json()
+    path = Path(target)
+    path.write_text(json.dumps(_timeline.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+# ----------------------------------------------------------------------
+# 父进程（分析）一侧
+# ----------------------------------------------------------------------
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_ms: float
+    cumulative_ms: float
+    depth: int
+
+
+@dataclass
+class StartupReport:
+    """一次启动的计时结果"""
+    ready_s: Optional[float]          # 从启动进程到窗口可用
+    wall_s: float                     # 子进程总耗时（含退出）
+    returncode: int
+    phases: List[Dict[str, Any]] = field(default_factory=list)
+    marks_ms: Dict[str, float] = field(default_factory=dict)
+    imports: List[ImportRecord] = field(default_factory=list)
+    error: str = ""
+
+    def top_imports(self, n: int = 15, by: str = "cumulative") -> List[ImportRecord]:
+        """按累计耗时取顶层包，或按自身耗时取所有模块"""
+        if by == "cumulative":
+            records = [r for r in self.imports if r.depth == 0]
+            return sorted(records, key=lambda r: r.cumulative_ms, reverse=True)[:n]
+        return sorted(self.imports, key=lambda r: r.self_ms, reverse=True)[:n]
+
+    def format(self, top: int = 15) -> str:
+        lines = []
+        ready = f"{self.ready_s:.2f}s" if self.ready_s is not None else "未就绪"
+        lines.append(f"窗口可用: {ready}    进程总耗时: {self.wall_s:.2f}s")
+        if self.error:
+            lines.append(f"错误: {self.error}")
+        if self.phases:
+            lines.append("\n应用阶段:")
+            for s in sorted(self.phases, key=lambda s: s["start_ms"]):
+                indent = "  " * (s.get("depth", 0) + 1)
+                lines.append(f"{indent}{s['stage']:<28} {s['start_ms']:9.0f} ms 起  "
+                             f"{s['duration_ms']:9.1f} ms")
+        if self.marks_ms:
+            lines.append("\n时间点:")
+            for name, ms in sorted(self.marks_ms.items(), key=lambda kv: kv[1]):
+                lines.append(f"  {name:<30} {ms:9.0f} ms")
+        if self.imports:
+            total = sum(r.cumulative_ms for r in self.imports if r.depth == 0)
+            lines.append(f"\n模块导入（共 {total:.0f} ms），累计耗时最多的顶层导入:")
+            for r in self.top_imports(top):
+                lines.append(f"  {r.module:<40} {r.cumulative_ms:9.1f} ms")
+            lines.append("\n自身耗时最多的模块:")
+            for r in self.top_imports(top, by="self"):
+                lines.append(f"  {r.module:<40} {r.self_ms:9.1f} ms")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ready_s": self.ready_s,
+            "wall_s": self.wall_s,
+            "returncode": self.returncode,
+            "error": self.error,
+            "phases": self.phases,
+            "marks_ms": self.marks_ms,
+            "top_imports": [r.__dict__ for r in self.top_imports(30)],
+        }
+
+
+def parse_importtime(text: str) -> List[ImportRecord]:
+    """解析 ``-X importtime`` 写到标准错误的输出"""
+    records = []
+    for line in text.splitlines():
+        m = _IMPORTTIME.match(line)
+        if not m:
+            continue
+        records.append(ImportRecord(
+            module=m.group(4),
+            self_ms=int(m.group(1)) / 1000.0,
+            cumulative_ms=int(m.group(2)) / 1000.0,
+            depth=max(0, (len(m.group(3)) - 1) // 2),
+        ))
+    return records
+
+
+def profile_startup(script: Path, args: Sequence[str] = (), importtime: bool = True,
+                    timeout: float = 120.0, env: Optional[Dict[str, str]] = None) -> StartupReport:
+    """以子进程启动应用，窗口可用后退出，返回计时报告
+
+    Args:
+        script: start.py 路径
+        args: 传给应用的额外参数
+        importtime: 是否同时收集 ``-X importtime``（会略微拖慢启动）
+    """
+    # 分析一侧的依赖在这里导入，不计入被测应用的启动时间
+    import subprocess
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as td:
+        profile_path = Path(td) / "startup.json"
+        child_env = dict(os.environ if env is None else env)
+        child_env[PROFILE_ENV] = str(profile_path)
+        cmd = [sys.executable]
+        if importtime:
+            cmd += ["-X", "importtime"]
+        cmd += [str(script), "--exit-after-startup", *args]
+
+        spawned = time.time()
+        t0 = time.perf_counter()
+        try:
+            proc = subprocess.run(cmd, env=child_env, stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.PIPE, text=True, errors="replace",
+                                  timeout=timeout, cwd=str(Path(script).parent))
+            returncode, stderr = proc.returncode, proc.stderr
+        except subprocess.TimeoutExpired as e:
+            returncode = -1
+            stderr = e.stderr.decode("utf-8", "replace") if isinstance(e.stderr, bytes) else (e.stderr or "")
+        report = StartupReport(ready_s=None, wall_s=time.perf_counter() - t0, returncode=returncode)
+        report.imports = parse_importtime(stderr)
+
+        if profile_path.exists():
+            data = json.loads(profile_path.read_text(encoding="utf-8"))
+            meta = data.get("meta", {})
+            report.phases = data.get("spans", [])
+            report.marks_ms = meta.get("marks_ms", {})
+            ready_epoch = meta.get("marks_epoch", {}).get("ready")
+            if ready_epoch is not None:
+                report.ready_s = ready_epoch - spawned
+        if returncode == -1:
+            report.error = f"超过 {timeout:.0f}s 仍未退出"
+        elif returncode != 0:
+            tail = [l for l in stderr.splitlines() if not l.startswith("import time:")][-5:]
+            report.error = f"退出码 {returncode}: " + " | ".join(tail)
+        elif report.ready_s is None:
+            report.error = "应用没有报告窗口就绪"
+        return report
+
+
+def median_ready(reports: Sequence[StartupReport]) -> Optional[float]:
+    import statistics
+    values = [r.ready_s for r in reports if r.ready_s is not None]
+    return statistics.median(values) if values else None
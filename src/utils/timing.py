@@ -0,0 +1,229 @@
+"""
+阶段计时
+========
+
+为矢量化流水线提供结构化的阶段计时（span）。
+
+一次作业创建一个 Timeline，并在工作线程中激活；适配器内部只需::
+
+    from src.utils.timing import span
+
+    with span("mkbitmap"):
+        subprocess.run(...)
+
+没有激活的 Timeline 时 span() 返回一个共享的空上下文管理器，
+开销只有一次线程局部变量读取，因此可以放心地留在热路径中。
+设置环境变量 RVS_TIMING=0 可全局关闭计时。
+
+计时结果默认只保存在内存中（状态栏摘要使用）；RVS_TIMING=dump 时每个作业
+另外写一个 JSON 到计时目录，目录中只保留最近 MAX_DUMP_FILES 个文件。
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+ENABLED = os.environ.get("RVS_TIMING", "1") != "0"
+DUMP = os.environ.get("RVS_TIMING", "1").lower() == "dump"
+MAX_DUMP_FILES = 200
+
+_local = threading.local()
+
+
+class _NullSpan:
+    """计时关闭时使用的空上下文管理器"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("timeline", "stage", "meta", "start", "depth")
+
+    def __init__(self, timeline: "Timeline", stage: str, meta: Dict[str, Any]):
+        self.timeline = timeline
+        self.stage = stage
+        self.meta = meta
+
+    def __enter__(self):
+        self.depth = self.timeline._depth
+        self.timeline._depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        self.timeline._depth -= 1
+        if exc_type is not None:
+            self.meta["error"] = exc_type.__name__
+        self.timeline._record(self.stage, self.start, end - self.start, self.depth, self.meta)
+        return False
+
+
+class Timeline:
+    """一次作业的阶段计时记录
+
+    线程安全：编辑器回调等在主线程记录的阶段也可以追加到同一个 Timeline。
+    """
+
+    def __init__(self, name: str = "job", enabled: Optional[bool] = None):
+        self.name = name
+        self.job_id = uuid.uuid4().hex[:12]
+        self.enabled = ENABLED if enabled is None else enabled
+        self.created = time.time()
+        self._t0 = time.perf_counter()
+        self._depth = 0
+        self._lock = threading.Lock()
+        self.spans: List[Dict[str, Any]] = []
+        self.meta: Dict[str, Any] = {}
+
+    # ------------------------------------------------------------------
+    # 记录
+    # ------------------------------------------------------------------
+
+    def span(self, stage: str, **meta):
+        """计时一个阶段的上下文管理器"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage, meta)
+
+    def clock(self) -> float:
+        """返回当前时间戳，配合 add() 记录异步阶段（如 JavaScript 回调）"""
+        return time.perf_counter()
+
+    def add(self, stage: str, start: float, duration: Optional[float] = None, **meta):
+        """直接记录一个阶段；duration 缺省时按 start 到现在计算"""
+        if not self.enabled:
+            return
+        if duration is None:
+            duration = time.perf_counter() - start
+        self._record(stage, start, duration, 0, meta)
+
+    def _record(self, stage: str, start: float, duration: float, depth: int, meta: Dict[str, Any]):
+        entry = {
+            "stage": stage,
+            "start_ms": round((start - self._t0) * 1000.0, 3),
+            "duration_ms": round(duration * 1000.0, 3),
+            "depth": depth,
+        }
+        if meta:
+            entry["meta"] = meta
+        with self._lock:
+            self.spans.append(entry)
+
+    @contextmanager
+    def activate(self):
+        """在当前线程激活，使模块级 span() 记录到本 Timeline"""
+        previous = getattr(_local, "timeline", None)
+        _local.timeline = self if self.enabled else None
+        try:
+            yield self
+        finally:
+            _local.timeline = previous
+
+    # ------------------------------------------------------------------
+    # 输出
+    # ------------------------------------------------------------------
+
+    def totals(self) -> Dict[str, float]:
+        """按阶段名汇总的耗时（毫秒），保持首次出现的顺序"""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for s in self.spans:
+                totals[s["stage"]] = totals.get(s["stage"], 0.0) + s["duration_ms"]
+        return totals
+
+    def summary(self, top_level_only: bool = True) -> str:
+        """状态栏使用的一行摘要，如 "mkbitmap 80ms · potrace 120ms" """
+        with self._lock:
+            spans = [s for s in self.spans if not top_level_only or s["depth"] == 0]
+        if not spans:
+            return ""
+        totals: Dict[str, float] = {}
+        for s in spans:
+            totals[s["stage"]] = totals.get(s["stage"], 0.0) + s["duration_ms"]
+        return " · ".join(f"{k} {_fmt_ms(v)}" for k, v in totals.items())
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start_ms"])
+        return {
+            "job_id": self.job_id,
+            "name": self.name,
+            "created": self.created,
+            "meta": self.meta,
+            "totals_ms": self.totals(),
+            "spans": spans,
+        }
+
+    def dump_json(self, directory: Optional[Path] = None) -> Optional[Path]:
+        """把计时结果写成 JSON，返回文件路径；重复调用会覆盖同一作业的文件
+
+        未指定目录时写到计时目录，只在 RVS_TIMING=dump 时写出，并删除超出
+        MAX_DUMP_FILES 的旧文件。
+        """
+        if not self.enabled:
+            return None
+        prune = directory is None
+        if directory is None:
+            if not DUMP:
+                return None
+            from src.config.paths import paths
+            directory = paths.TIMINGS_DIR
+        directory = Path(directory)
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.created))
+            path = directory / f"{stamp}_{self.job_id}.json"
+            path.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+        except OSError as e:
+            print(f"写入计时文件失败: {e}")
+            return None
+        if prune:
+            _prune_dumps(directory)
+        return path
+
+
+def _prune_dumps(directory: Path, keep: int = MAX_DUMP_FILES):
+    """文件名以时间戳开头，按名称排序即按时间排序"""
+    try:
+        files = sorted(directory.glob("*.json"))
+        for old in files[:-keep]:
+            old.unlink()
+    except OSError:
+        pass
+
+
+def _fmt_ms(ms: float) -> str:
+    return f"{ms / 1000.0:.2f}s" if ms >= 1000 else f"{ms:.0f}ms"
+
+
+def current_timeline() -> Optional[Timeline]:
+    """当前线程激活的 Timeline（没有则为 None）"""
+    return getattr(_local, "timeline", None)
+
+
+def null_span():
+    """不计时的空上下文管理器（共享实例），供其他模块在计时关闭时返回"""
+    return _NULL_SPAN
+
+
+def span(stage: str, **meta):
+    """在当前线程激活的 Timeline 上计时一个阶段；未激活时几乎零开销"""
+    timeline = getattr(_local, "timeline", None)
+    if timeline is None:
+        return _NULL_SPAN
+    return _Span(timeline, stage, meta)
@@ -2,8 +2,13 @@ import sys
 import os
 from pathlib import Path
 
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import QCoreApplication, Qt
+from src.utils import startup
+
+# 窗口可用后自动退出（启动计时使用）
+EXIT_AFTER_STARTUP = "--exit-after-startup"
+PROFILE_STARTUP = "--profile-startup"
+# 等待窗口就绪的上限
+STARTUP_TIMEOUT_MS = 60000
 
 def check_python_version():
     """检查Python版本"""
@@ -25,37 +30,79 @@ def setup_environment():
     print("🔧 环境变量已设置: KMP_DUPLICATE_LIB_OK=TRUE")
 
 def check_diffvg_support():
-    """检查DiffVG支持"""
+    """检查DiffVG支持
+
+    只查找模块是否存在，不导入：导入 torch 需要数秒，而多数用户不使用 DiffVG。
+    DiffVG 引擎在第一次使用时才真正加载。
+    """
+    from importlib.util import find_spec
+
+    project_root = Path(__file__).parent.resolve()
+    diffvg_path = project_root / "third_party" / "diffvg"
+
+    if str(diffvg_path) not in sys.path:
+        sys.path.insert(0, str(diffvg_path))
+
     try:
-        project_root = Path(__file__).parent.resolve()
-        diffvg_path = project_root / "third_party" / "diffvg"
-        
-        if str(diffvg_path) not in sys.path:
-            sys.path.insert(0, str(diffvg_path))
-        
-        import diffvg
-        func_count = len([x for x in dir(diffvg) if not x.startswith('_')])
-        
-        if sys.version_info >= (3, 12):
-            print(f"✅ DiffVG Python 3.12版本可用 ({func_count}个功能)")
-        else:
-            print(f"✅ DiffVG可用 ({func_count}个功能)")
-        
-        # 检查PyTorch支持
-        try:
-            import torch
-            print("✅ PyTorch支持已启用")
-        except ImportError:
-            print("ℹ️ PyTorch未安装，使用CPU模式")
-        
-        return True
-        
-    except ImportError:
+        found = find_spec("diffvg") is not None
+    except (ImportError, ValueError):
+        found = False
+    if not found:
         print("⚠️ DiffVG不可用，将使用其他矢量化引擎")
         return False
 
+    if sys.version_info >= (3, 12):
+        print("✅ DiffVG Python 3.12版本已安装（首次使用时加载）")
+    else:
+        print("✅ DiffVG已安装（首次使用时加载）")
+
+    # 检查PyTorch支持
+    if find_spec("torch") is not None:
+        print("✅ PyTorch支持已启用")
+    else:
+        print("ℹ️ PyTorch未安装，使用CPU模式")
+
+    return True
+
+
+def profile_startup(args):
+    """以子进程启动应用并打印启动计时报告（--profile-startup）"""
+    print("⏱️ 启动计时：以 -X importtime 运行应用，窗口可用后自动退出...")
+    report = startup.profile_startup(Path(__file__).resolve(), args)
+    print(report.format())
+    return 0 if not report.error else 1
+
+
+def _exit_when_ready(app, win):
+    """窗口显示且编辑器页面加载完成后写出计时并退出"""
+    from PyQt5.QtCore import QTimer, QElapsedTimer
+
+    elapsed = QElapsedTimer()
+    elapsed.start()
+    timer = QTimer(app)
+
+    def check():
+        editor_done = win.editor is None or startup.marked("editor_loaded")
+        if startup.marked("event_loop") and editor_done:
+            startup.mark("ready")
+        elif elapsed.elapsed() < STARTUP_TIMEOUT_MS:
+            return
+        timer.stop()
+        startup.finish()
+        app.exit(0 if startup.marked("ready") else 2)
+
+    timer.timeout.connect(check)
+    timer.start(20)
+
 
 def main():
+    if PROFILE_STARTUP in sys.argv:
+        return profile_startup([a for a in sys.argv[1:] if a != PROFILE_STARTUP])
+    exit_after_startup = EXIT_AFTER_STARTUP in sys.argv
+    if exit_after_startup:
+        sys.argv.remove(EXIT_AFTER_STARTUP)
+        startup.enable()
+
     print("🚀 启动 RasterVectorStudio")
     print("=" * 40)
     
@@ -67,14 +114,19 @@ def main():
     setup_environment()
     
     # 检查DiffVG支持
-    check_diffvg_support()
+    with startup.phase("check_diffvg"):
+        check_diffvg_support()
     
     print("\n🎨 初始化应用...")
+    with startup.phase("import_qt"):
+        from PyQt5.QtWidgets import QApplication
+        from PyQt5.QtCore import QTimer
     
     # 采用"提前导入 QWebEngineWidgets"的方式（与你之前的成功方式一致）
     try:
         # 在创建 QApplication 之前导入，以初始化 WebEngine 所需环境
-        from PyQt5 import QtWebEngineWidgets  # noqa: F401
+        with startup.phase("import_webengine"):
+            from PyQt5 import QtWebEngineWidgets  # noqa: F401
         print("✅ WebEngine支持已加载")
     except Exception:
         # 某些环境未安装 WebEngine，允许继续（编辑器里会降级）
@@ -90,7 +142,8 @@ def main():
 
     print("🔧 创建QApplication...")
     # 必须在导入任何 Qt 组件之前创建 QApplication
-    app = QApplication(sys.argv)
+    with startup.phase("create_qapplication"):
+        app = QApplication(sys.argv)
     app.setApplicationName("RasterVectorStudio")
     app.setApplicationDisplayName("RasterVectorStudio - 位图转矢量与本地SVG编辑")
     
@@ -101,18 +154,33 @@ def main():
     
     print("✅ QApplication创建成功!")
 
+    # 立即在后台开始加载编辑器页面，与主窗口构造并行
+    try:
+        with startup.phase("editor_prewarm"):
+            from src.gui.editor_widget import prewarm
+            prewarm()
+    except Exception as e:
+        print(f"⚠️ 编辑器预热失败: {e}")
+
     print("📦 导入主窗口...")
-    from src.gui.main_window import MainWindow
+    with startup.phase("import_main_window"):
+        from src.gui.main_window import MainWindow
     print("✅ 主窗口导入成功!")
 
     print("🏠 创建主窗口...")
-    win = MainWindow()
+    with startup.phase("main_window_init"):
+        win = MainWindow()
     
     # --- 关键修改：连接应用退出清理信号 ---
     app.aboutToQuit.connect(win.cleanup)
     
     win.resize(1400, 900)
-    win.show()
+    with startup.phase("window_show"):
+        win.show()
+    startup.mark("window_shown")
+    QTimer.singleShot(0, lambda: startup.mark("event_loop"))
+    if exit_after_startup:
+        _exit_when_ready(app, win)
     print("✅ 主窗口创建并显示成功!")
     
     if sys.version_info >= (3, 12):
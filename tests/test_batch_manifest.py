@@ -0,0 +1,180 @@
+"""批处理清单的规划：哪些输入跳过、重试、放弃"""
+
+import os
+
+import pytest
+
+import src.batch.manifest as manifest_module
+from src.batch.manifest import DONE, FAILED, Manifest, params_key
+
+ENGINE = "test"
+PARAMS = {"threshold": 128}
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    with Manifest(tmp_path / "manifest.sqlite") as m:
+        yield m
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    src = tmp_path / "in"
+    src.mkdir()
+    paths = []
+    for name in ("a", "b", "c"):
+        path = src / f"{name}.png"
+        path.write_bytes(name.encode() * 100)
+        paths.append(path)
+    return paths
+
+
+def _complete_all(manifest, plan, out_dir):
+    out_dir.mkdir(exist_ok=True)
+    for item in plan.todo:
+        manifest.start(item)
+        out = out_dir / (item.input_path.stem + ".svg")
+        out.write_text("<svg/>")
+        manifest.complete(item, out, 0.1)
+    manifest.flush()
+
+
+def test_params_key_ignores_order():
+    assert params_key({"a": 1, "b": 2}) == params_key({"b": 2, "a": 1})
+    assert params_key({"a": 1}) != params_key({"a": 2})
+
+
+def test_first_plan_schedules_everything(manifest, inputs):
+    plan = manifest.plan(inputs, ENGINE, PARAMS)
+    assert [item.input_path for item in plan.todo] == inputs
+    assert (plan.done, plan.retry, plan.changed, plan.gave_up, plan.missing) == (0, 0, 0, 0, 0)
+    assert set(plan.hashes) == set(inputs)
+
+
+def test_done_and_unchanged_is_skipped(manifest, inputs, tmp_path):
+    _complete_all(manifest, manifest.plan(inputs, ENGINE, PARAMS), tmp_path / "out")
+
+    plan = manifest.plan(inputs, ENGINE, PARAMS)
+    assert plan.todo == []
+    assert plan.done == 3
+
+
+def test_other_params_are_planned_separately(manifest, inputs, tmp_path):
+    _complete_all(manifest, manifest.plan(inputs, ENGINE, PARAMS), tmp_path / "out")
+
+    assert len(manifest.plan(inputs, ENGINE, {"threshold": 90}).todo) == 3
+    assert len(manifest.plan(inputs, "other", PARAMS).todo) == 3
+
+
+def test_changed_input_is_redone_with_fresh_attempts(manifest, inputs, tmp_path):
+    plan = manifest.plan(inputs, ENGINE, PARAMS)
+    manifest.start(plan.todo[0])
+    manifest.fail(plan.todo[0], "boom")
+    _complete_all(manifest, type(plan)(todo=plan.todo[1:]), tmp_path / "out")
+
+    inputs[0].write_bytes(b"changed content")
+    inputs[1].write_bytes(b"also changed")
+    plan = manifest.plan(inputs, ENGINE, PARAMS)
+
+    assert sorted(item.input_path for item in plan.todo) == inputs[:2]
+    assert plan.changed == 2
+    assert all(item.attempts == 0 for item in plan.todo)
+
+
+def test_failed_items_retry_until_max_attempts(manifest, inputs):
+    target = inputs[0]
+    for attempt in range(1, 3):
+        plan = manifest.plan([target], ENGINE, PARAMS, max_attempts=3)
+        assert len(plan.todo) == 1
+        item = plan.todo[0]
+        assert item.attempts == attempt - 1
+        manifest.start(item)
+        manifest.fail(item, f"failure {attempt}")
+        manifest.flush()
+
+    plan = manifest.plan([target], ENGINE, PARAMS, max_attempts=3)
+    assert plan.retry == 1
+    manifest.start(plan.todo[0])
+    manifest.fail(plan.todo[0], "failure 3")
+
+    plan = manifest.plan([target], ENGINE, PARAMS, max_attempts=3)
+    assert plan.todo == []
+    assert plan.gave_up == 1
+    assert manifest.failures() == [(str(target), "failure 3", 3)]
+
+
+def test_interrupted_items_are_retried(manifest, inputs, tmp_path):
+    plan = manifest.plan(inputs, ENGINE, PARAMS)
+    # a 开始后进程崩溃（running），b 还没开始（pending），c 已完成
+    manifest.start(plan.todo[0])
+    _complete_all(manifest, type(plan)(todo=plan.todo[2:]), tmp_path / "out")
+
+    plan = manifest.plan(inputs, ENGINE, PARAMS)
+    assert sorted(item.input_path for item in plan.todo) == inputs[:2]
+    assert plan.retry == 2
+    assert plan.done == 1
+
+
+def test_unflushed_completions_are_redone_after_crash(tmp_path, inputs):
+    path = tmp_path / "manifest.sqlite"
+    crashed = Manifest(path, flush_every=1000, flush_interval_s=1e9)
+    plan = crashed.plan(inputs, ENGINE, PARAMS)
+    out = tmp_path / "out"
+    out.mkdir()
+    for item in plan.todo:
+        crashed.start(item)
+        crashed.complete(item, out / f"{item.input_path.stem}.svg", 0.1)
+    # 不调用 flush/close：模拟缓冲区提交前崩溃，另一个进程重新打开清单
+
+    with Manifest(path) as reopened:
+        assert len(reopened.plan(inputs, ENGINE, PARAMS).todo) == 3
+    crashed.close()
+
+
+def test_done_with_missing_output_is_redone(manifest, inputs, tmp_path):
+    _complete_all(manifest, manifest.plan(inputs, ENGINE, PARAMS), tmp_path / "out")
+    (tmp_path / "out" / "b.svg").unlink()
+
+    plan = manifest.plan(inputs, ENGINE, PARAMS)
+    assert [item.input_path for item in plan.todo] == [inputs[1]]
+    assert plan.retry == 1
+    assert plan.done == 2
+
+
+def test_output_for_overrides_recorded_output(manifest, inputs, tmp_path):
+    _complete_all(manifest, manifest.plan(inputs, ENGINE, PARAMS), tmp_path / "out")
+
+    moved = tmp_path / "elsewhere"
+    plan = manifest.plan(inputs, ENGINE, PARAMS, output_for=lambda p: moved / f"{p.stem}.svg")
+    assert len(plan.todo) == 3
+
+
+def test_missing_inputs_are_counted(manifest, inputs):
+    inputs[2].unlink()
+    plan = manifest.plan(inputs, ENGINE, PARAMS)
+    assert len(plan.todo) == 2
+    assert plan.missing == 1
+
+
+def test_unchanged_files_are_not_rehashed(manifest, inputs, tmp_path, monkeypatch):
+    _complete_all(manifest, manifest.plan(inputs, ENGINE, PARAMS), tmp_path / "out")
+
+    hashed = []
+    original = manifest_module.file_hash
+    monkeypatch.setattr(manifest_module, "file_hash", lambda p: hashed.append(p) or original(p))
+    # 只改修改时间（内容不变）的文件需要重新哈希，但不算“已改变”
+    st = inputs[0].stat()
+    os.utime(inputs[0], ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    plan = manifest.plan(inputs, ENGINE, PARAMS)
+    assert hashed == [inputs[0]]
+    assert plan.done == 3
+
+
+def test_counts_by_status(manifest, inputs, tmp_path):
+    plan = manifest.plan(inputs, ENGINE, PARAMS)
+    manifest.start(plan.todo[0])
+    manifest.fail(plan.todo[0], "boom")
+    _complete_all(manifest, type(plan)(todo=plan.todo[1:]), tmp_path / "out")
+
+    assert manifest.counts() == {DONE: 2, FAILED: 1}
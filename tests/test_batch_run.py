@@ -0,0 +1,205 @@
+"""BatchRunner：失败重试、放弃与中断后续跑"""
+
+import asyncio
+import itertools
+
+import pytest
+
+from src.batch.manifest import DONE, FAILED, Manifest
+from src.batch.run import BatchRunner, collect_inputs
+from src.tools.registry import EngineSpec, ParamDef, registry
+
+_names = itertools.count()
+
+
+class FakeEngine:
+    """按输入文件名决定成功或失败的引擎，记录每次调用"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+        self.name = f"fake-batch-{next(_names)}"
+        registry.register(EngineSpec(self.name, lambda: object(), self.invoke))
+
+    def invoke(self, adapter, input_path, params, job_dir):
+        self.calls.append(input_path.name)
+        if input_path.name in self.failing:
+            raise RuntimeError(f"无法处理 {input_path.name}")
+        return f'<svg xmlns="http://www.w3.org/2000/svg"><desc>{input_path.read_bytes().hex()}</desc></svg>'
+
+
+@pytest.fixture
+def in_dir(tmp_path):
+    path = tmp_path / "in"
+    (path / "sub").mkdir(parents=True)
+    for name, content in (("a.png", b"aaaa"), ("b.png", b"bbbb"), ("sub/c.png", b"cccc")):
+        (path / name).write_bytes(content)
+    return path
+
+
+def _run(engine, in_dir, out_dir, **kwargs):
+    runner = BatchRunner(engine.name, {}, out_dir, workers=2, **kwargs)
+    try:
+        plan = runner.plan(collect_inputs([in_dir]))
+        stats = asyncio.run(runner.run(plan.todo))
+        return plan, stats
+    finally:
+        runner.close()
+
+
+def test_outputs_mirror_input_tree(in_dir, tmp_path):
+    engine = FakeEngine()
+    plan, stats = _run(engine, in_dir, tmp_path / "out")
+
+    assert (stats.done, stats.failed) == (3, 0)
+    assert sorted(engine.calls) == ["a.png", "b.png", "c.png"]
+    for name in ("a.svg", "b.svg", "sub/c.svg"):
+        assert (tmp_path / "out" / name).read_text().startswith("<svg")
+
+
+def test_second_run_skips_finished_inputs(in_dir, tmp_path):
+    engine = FakeEngine()
+    _run(engine, in_dir, tmp_path / "out")
+    engine.calls.clear()
+
+    plan, stats = _run(engine, in_dir, tmp_path / "out")
+    assert plan.todo == [] and plan.done == 3
+    assert engine.calls == []
+
+
+def test_failures_are_retried_then_given_up(in_dir, tmp_path):
+    engine = FakeEngine(failing={"b.png"})
+    out = tmp_path / "out"
+    plan, stats = _run(engine, in_dir, out, max_attempts=2)
+    assert (stats.done, stats.failed) == (2, 1)
+    assert not (out / "b.svg").exists()
+
+    engine.calls.clear()
+    plan, stats = _run(engine, in_dir, out, max_attempts=2)
+    assert engine.calls == ["b.png"]
+    assert plan.retry == 1
+
+    engine.calls.clear()
+    plan, stats = _run(engine, in_dir, out, max_attempts=2)
+    assert engine.calls == []
+    assert plan.gave_up == 1
+
+    with Manifest(out / "manifest.sqlite") as manifest:
+        assert manifest.counts() == {DONE: 2, FAILED: 1}
+        [(path, error, attempts)] = manifest.failures()
+        assert path.endswith("b.png") and "b.png" in error and attempts == 2
+
+
+def test_fixed_input_is_retried_after_giving_up(in_dir, tmp_path):
+    engine = FakeEngine(failing={"b.png"})
+    out = tmp_path / "out"
+    for _ in range(2):
+        _run(engine, in_dir, out, max_attempts=2)
+
+    engine.failing.clear()
+    engine.calls.clear()
+    (in_dir / "b.png").write_bytes(b"fixed")
+    plan, stats = _run(engine, in_dir, out, max_attempts=2)
+    assert plan.changed == 1
+    assert engine.calls == ["b.png"]
+    assert (out / "b.svg").exists()
+
+
+def test_interrupted_run_resumes_where_it_stopped(in_dir, tmp_path):
+    engine = FakeEngine()
+    out = tmp_path / "out"
+    runner = BatchRunner(engine.name, {}, out, workers=1)
+    plan = runner.plan(collect_inputs([in_dir]))
+    # 只处理了第一项就被中断（pending 的项留在清单中）
+    asyncio.run(runner.run(plan.todo[:1]))
+    runner.close()
+
+    engine.calls.clear()
+    plan, stats = _run(engine, in_dir, out)
+    assert plan.retry == 2 and plan.done == 1
+    assert sorted(engine.calls) == ["b.png", "c.png"]
+
+
+def test_deleted_output_is_regenerated(in_dir, tmp_path):
+    engine = FakeEngine()
+    out = tmp_path / "out"
+    _run(engine, in_dir, out)
+    (out / "sub" / "c.svg").unlink()
+
+    engine.calls.clear()
+    plan, stats = _run(engine, in_dir, out)
+    assert engine.calls == ["c.png"]
+    assert (out / "sub" / "c.svg").exists()
+
+
+def test_unknown_params_are_rejected(tmp_path):
+    name = f"fake-batch-{next(_names)}"
+    registry.register(EngineSpec(name, lambda: object(), lambda *args: "<svg/>", params=(
+        ParamDef("threshold", int, 128, 0, 255),)))
+
+    with pytest.raises(ValueError, match="treshold.*threshold"):
+        BatchRunner(name, {"treshold": 140}, tmp_path / "out")
+    assert not (tmp_path / "out").exists()
+
+
+# ----------------------------------------------------------------------
+# 重复输入
+# ----------------------------------------------------------------------
+
+def test_identical_inputs_are_vectorized_once(in_dir, tmp_path):
+    (in_dir / "a_copy.png").write_bytes(b"aaaa")
+    (in_dir / "sub" / "a.png").write_bytes(b"aaaa")
+    engine = FakeEngine()
+    out = tmp_path / "out"
+    plan, stats = _run(engine, in_dir, out)
+
+    assert plan.duplicates == 2
+    assert sorted(engine.calls) == ["a.png", "b.png", "c.png"]
+    assert (stats.done, stats.reused) == (5, 2)
+    expected = (out / "a.svg").read_text()
+    assert (out / "a_copy.svg").read_text() == expected
+    assert (out / "sub" / "a.svg").read_text() == expected
+
+
+def test_copy_added_later_reuses_previous_result(in_dir, tmp_path):
+    engine = FakeEngine()
+    out = tmp_path / "out"
+    _run(engine, in_dir, out)
+
+    engine.calls.clear()
+    (in_dir / "b_again.png").write_bytes(b"bbbb")
+    plan, stats = _run(engine, in_dir, out)
+    assert plan.duplicates == 1
+    assert engine.calls == []
+    assert stats.reused == 1
+    assert (out / "b_again.svg").read_text() == (out / "b.svg").read_text()
+
+
+def test_failed_duplicate_is_retried_by_its_copy(in_dir, tmp_path):
+    (in_dir / "b_copy.png").write_bytes(b"bbbb")
+    engine = FakeEngine(failing={"b.png"})
+    out = tmp_path / "out"
+    plan, stats = _run(engine, in_dir, out)
+
+    # 同内容的第一个输入失败后，等待它的副本自己处理，而不是复用不存在的结果
+    assert sorted(engine.calls) == ["a.png", "b.png", "b_copy.png", "c.png"]
+    assert (stats.done, stats.failed, stats.reused) == (3, 1, 0)
+    assert (out / "b_copy.svg").exists()
+
+
+def test_dedup_can_be_disabled(in_dir, tmp_path):
+    (in_dir / "a_copy.png").write_bytes(b"aaaa")
+    engine = FakeEngine()
+    plan, stats = _run(engine, in_dir, tmp_path / "out", dedup=False)
+
+    assert plan.duplicates == 0
+    assert sorted(engine.calls) == ["a.png", "a_copy.png", "b.png", "c.png"]
+    assert stats.reused == 0
+
+
+def test_exact_duplicates_point_to_first_path(tmp_path):
+    from src.batch.dedup import exact_duplicates
+
+    a, b, c = (tmp_path / n for n in ("a.png", "b.png", "c.png"))
+    dups = exact_duplicates({c: "h1", a: "h1", b: "h2"})
+    assert [(d.input_path, d.similar_to, d.distance, d.exact) for d in dups] == [(c, a, 0, True)]
@@ -0,0 +1,101 @@
+"""PackedBitmap：打包格式、读取图像时阈值化和裁剪"""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import src.processing.bitmap as bitmap_module
+from src.processing.bitmap import PackedBitmap
+
+
+def _random_mask(h: int, w: int, density: float = 0.3, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).random((h, w)) < density
+
+
+@pytest.mark.parametrize("width", [1, 7, 8, 9, 37, 64])
+def test_pbm_roundtrip(width):
+    mask = _random_mask(11, width, seed=width)
+    bitmap = PackedBitmap.from_array(mask)
+
+    data = bitmap.to_pbm()
+    assert data.startswith(f"P4\n{width} 11\n".encode("ascii"))
+    restored = PackedBitmap.from_pbm(data)
+
+    assert restored.shape == (11, width)
+    np.testing.assert_array_equal(restored.to_array(), mask)
+    assert restored.count() == int(mask.sum())
+
+
+def test_from_pbm_clears_padding_bits():
+    # 宽 3 像素：每行 1 字节，后 5 位是填充位，即使输入里置了 1 也要清零
+    bitmap = PackedBitmap.from_pbm(b"P4\n3 2\n\xff\xff")
+    assert bitmap.count() == 6
+    np.testing.assert_array_equal(bitmap.bits, [[0xE0], [0xE0]])
+
+
+def test_from_threshold_matches_comparison():
+    gray = np.random.default_rng(1).integers(0, 256, size=(20, 29), dtype=np.uint8)
+    np.testing.assert_array_equal(PackedBitmap.from_threshold(gray, 100).to_array(), gray <= 100)
+    np.testing.assert_array_equal(PackedBitmap.from_threshold(gray, 100, invert=True).to_array(),
+                                  gray > 100)
+
+
+@pytest.mark.parametrize("x, y, w, h", [
+    (0, 0, 16, 5),      # 字节对齐
+    (3, 2, 13, 7),      # 未对齐
+    (9, 0, 30, 4),      # 未对齐，跨多个字节
+    (30, 10, 20, 20),   # 超出右下边界，被截断
+    (-4, -3, 10, 6),    # 超出左上边界，被截断
+])
+def test_crop_matches_array_slice(x, y, w, h):
+    mask = _random_mask(17, 41, seed=2)
+    cropped = PackedBitmap.from_array(mask).crop(x, y, w, h)
+
+    expected = mask[max(0, y):max(0, y + h), max(0, x):max(0, x + w)]
+    assert cropped.shape == expected.shape
+    np.testing.assert_array_equal(cropped.to_array(), expected)
+    # 裁剪结果的填充位为 0，可以直接写成 PBM
+    assert cropped.count() == int(expected.sum())
+
+
+def test_crop_outside_is_empty():
+    bitmap = PackedBitmap.from_array(_random_mask(8, 8))
+    assert bitmap.crop(20, 20, 5, 5).shape == (0, 0)
+
+
+def _gray_reference(img: Image.Image) -> np.ndarray:
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    return np.asarray(img.convert("L"))
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "RGBA", "P"])
+def test_from_image_matches_whole_image_threshold(tmp_path, monkeypatch, mode):
+    # 行块很小，使图像跨越多个行块
+    monkeypatch.setattr(bitmap_module, "CHUNK_PIXELS", 16 * 37 * 5)
+    rng = np.random.default_rng(4)
+    img = Image.fromarray((rng.random((61, 37, 4)) * 255).astype(np.uint8), "RGBA")
+    if mode != "RGBA":
+        img = img.convert("RGB").convert(mode)
+    path = tmp_path / "input.png"
+    img.save(path)
+
+    for invert in (False, True):
+        expected = PackedBitmap.from_threshold(_gray_reference(img), 120, invert=invert)
+        result = PackedBitmap.from_image(path, 120, invert=invert)
+        np.testing.assert_array_equal(result.bits, expected.bits)
+
+
+def test_from_image_accepts_open_image():
+    img = Image.fromarray(np.array([[0, 200], [128, 129]], dtype=np.uint8))
+    result = PackedBitmap.from_image(img, 128)
+    np.testing.assert_array_equal(result.to_array(), [[True, False], [True, False]])
+
+
+def test_contour_binarize_agrees_with_from_threshold():
+    from src.processing.contour_trace import binarize
+
+    gray = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    for invert in (False, True):
+        expected = PackedBitmap.from_threshold(gray, 128, invert=invert).to_array()
+        np.testing.assert_array_equal(binarize(gray, 128, invert), expected)
@@ -0,0 +1,47 @@
+"""感知哈希：同一图像的不同保存方式哈希应相同或相近"""
+
+import numpy as np
+import pytest
+from PIL import Image, ImageFilter
+
+from src.processing.perceptual_hash import HashIndex, hash_images
+
+
+@pytest.fixture
+def picture() -> np.ndarray:
+    """平滑的随机灰度图，取值 0-1"""
+    rng = np.random.default_rng(1)
+    small = Image.fromarray((rng.random((20, 30)) * 255).astype(np.uint8))
+    img = small.resize((300, 200), Image.BICUBIC).filter(ImageFilter.GaussianBlur(3))
+    return np.asarray(img, dtype=np.float64) / 255
+
+
+def _distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+@pytest.mark.parametrize("method", ["phash", "dhash"])
+def test_16_bit_copy_hashes_like_8_bit(tmp_path, picture, method):
+    Image.fromarray((picture * 255).astype(np.uint8)).save(tmp_path / "8.png")
+    Image.fromarray((picture * 65535).astype(np.uint16)).save(tmp_path / "16.png")
+    Image.open(tmp_path / "16.png").convert("I").save(tmp_path / "32.tif")
+
+    h8, h16, h32 = hash_images([tmp_path / n for n in ("8.png", "16.png", "32.tif")], method)
+    assert _distance(h8, h16) <= 2
+    assert _distance(h8, h32) <= 2
+
+
+def test_undecodable_file_hashes_to_none(tmp_path, picture):
+    (tmp_path / "broken.png").write_bytes(b"not an image")
+    Image.fromarray((picture * 255).astype(np.uint8)).save(tmp_path / "ok.png")
+    broken, ok = hash_images([tmp_path / "broken.png", tmp_path / "ok.png"])
+    assert broken is None and isinstance(ok, int)
+
+
+def test_index_returns_neighbours_within_distance():
+    index = HashIndex(max_distance=3)
+    base = 0x0123456789ABCDEF
+    index.add(base)
+    index.add(base ^ 0b111)          # 距离 3
+    index.add(base ^ 0b1111)         # 距离 4
+    assert index.query(base) == [(0, 0), (1, 3)]
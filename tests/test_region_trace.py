@@ -0,0 +1,59 @@
+"""区域标签图矢量化：SVG 栅格化后应与标签图逐像素一致"""
+
+import numpy as np
+import pytest
+
+from src.processing.region_trace import labels_to_svg
+from src.processing.svg_raster import rasterize_svg
+
+
+def _palette(n: int) -> np.ndarray:
+    """n 种互不相同的颜色"""
+    idx = np.arange(n)
+    return np.stack([(idx * 37) % 256, (idx * 91 + 40) % 256, (idx * 53 + 90) % 256], axis=1)
+
+
+def _decode(rgb: np.ndarray, colors: np.ndarray) -> np.ndarray:
+    """把渲染结果的每个像素映射回颜色最接近的标签"""
+    diff = rgb[:, :, None, :].astype(np.int32) - colors[None, None, :, :].astype(np.int32)
+    return np.argmin((diff * diff).sum(axis=3), axis=2)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_labels_roundtrip(seed):
+    rng = np.random.default_rng(seed)
+    # 块状随机区域：包含相互包围的区域（孔洞）和多区域交汇点
+    coarse = rng.integers(0, 6, size=(8, 10))
+    labels = np.kron(coarse, np.ones((4, 4), dtype=coarse.dtype))
+    colors = _palette(6)
+
+    svg = labels_to_svg(labels, colors, tolerance=0)
+    rgb = rasterize_svg(svg, labels.shape[1], labels.shape[0])
+
+    np.testing.assert_array_equal(_decode(rgb, colors), labels)
+
+
+def test_nested_regions_roundtrip():
+    labels = np.zeros((24, 24), dtype=np.int64)
+    labels[4:20, 4:20] = 1
+    labels[8:16, 8:16] = 2
+    labels[11:13, 11:13] = 0
+    colors = _palette(3)
+
+    svg = labels_to_svg(labels, colors, tolerance=0)
+    rgb = rasterize_svg(svg, 24, 24)
+
+    np.testing.assert_array_equal(_decode(rgb, colors), labels)
+
+
+def test_simplified_boundaries_stay_close():
+    """简化后共享边界仍然重合，误差只出现在边界附近"""
+    yy, xx = np.mgrid[0:48, 0:48]
+    labels = ((xx - 24) ** 2 + (yy - 24) ** 2 < 15 ** 2).astype(np.int64)
+    labels[(xx > 30) & (yy < 10)] = 2
+    colors = _palette(3)
+
+    svg = labels_to_svg(labels, colors, tolerance=1.0)
+    decoded = _decode(rasterize_svg(svg, 48, 48), colors)
+
+    assert (decoded != labels).mean() < 0.05